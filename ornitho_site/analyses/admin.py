@@ -1,15 +1,63 @@
 from django.contrib import admin
-from .models import Analyse, BaselineAnalysis
+from .models import (
+	Analyse,
+	AnalysisSummary,
+	BaselineAnalysis,
+	BaselineCountry,
+	BaselinePresence,
+	BaselineSpecies,
+	BaselineVersion,
+)
 
 
 @admin.register(Analyse)
 class AnalyseAdmin(admin.ModelAdmin):
-	list_display = ("id", "titre", "user", "date_creation")
+	list_display = ("id", "titre", "user", "date_creation", "last_accessed", "baseline_version", "pin_baseline")
 	search_fields = ("titre", "life_list_file")
 	list_filter = ("date_creation",)
 
 
 @admin.register(BaselineAnalysis)
 class BaselineAnalysisAdmin(admin.ModelAdmin):
-	list_display = ("id", "name", "date_updated")
+	list_display = ("id", "name", "active_version", "date_updated")
 	search_fields = ("name",)
+
+
+@admin.register(BaselineVersion)
+class BaselineVersionAdmin(admin.ModelAdmin):
+	list_display = ("id", "content_hash", "date_creation")
+	search_fields = ("content_hash",)
+	exclude = ("baseline_json",)
+
+
+@admin.register(BaselineCountry)
+class BaselineCountryAdmin(admin.ModelAdmin):
+	list_display = ("id", "name", "continent", "total_species", "species_above_threshold", "max_species_count", "version")
+	search_fields = ("name", "continent")
+	list_filter = ("version", "continent")
+
+
+@admin.register(BaselineSpecies)
+class BaselineSpeciesAdmin(admin.ModelAdmin):
+	list_display = ("id", "rank", "name", "country_count", "above_threshold_count", "max_percentage", "max_country", "version")
+	search_fields = ("name",)
+	list_filter = ("version",)
+	list_select_related = ("max_country",)
+	raw_id_fields = ("max_country",)
+	ordering = ("version", "rank")
+
+
+@admin.register(BaselinePresence)
+class BaselinePresenceAdmin(admin.ModelAdmin):
+	list_display = ("id", "species", "country", "value")
+	search_fields = ("species__name", "country__name")
+	list_select_related = ("species", "country")
+	raw_id_fields = ("species", "country")
+
+
+@admin.register(AnalysisSummary)
+class AnalysisSummaryAdmin(admin.ModelAdmin):
+	list_display = ("id", "analyse", "version", "date_creation")
+	list_filter = ("version",)
+	raw_id_fields = ("analyse",)
+	exclude = ("summary_json",)
@@ -0,0 +1,159 @@
+"""
+Stockage relationnel d'une version du baseline.
+
+Le JSON d'une version (``BaselineVersion.baseline_json``) reste la source
+servie par les vues ; ces tables en donnent une forme normalisée
+(``BaselineCountry``, ``BaselineSpecies`` et la matrice creuse
+``BaselinePresence``) pour que les outils et l'admin répondent par des
+requêtes SQL indexées (totaux par pays, espèces d'un pays, pays d'une
+espèce) sans charger tout le JSON en mémoire.
+"""
+
+from django.db import transaction
+from django.db.models import Count, Q
+
+from .models import BaselineCountry, BaselinePresence, BaselineSpecies
+from core.baseline_index import SERVING_THRESHOLD, blanks_sort_key
+import math
+
+
+BULK_BATCH_SIZE = 5000
+
+
+def _finite_or_none(value):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return value if math.isfinite(value) else None
+
+
+def _name_key(name):
+    return str(name).strip().lower()
+
+
+def has_baseline_tables(version):
+    return BaselineCountry.objects.filter(version=version).exists()
+
+
+@transaction.atomic
+def store_baseline_tables(version, results, batch_size=BULK_BATCH_SIZE):
+    """
+    (Re)remplit les tables de ``version`` à partir de ses résultats, par
+    insertions groupées. Retourne ``{table: nombre de lignes}``.
+    """
+    BaselinePresence.objects.filter(species__version=version).delete()
+    BaselineSpecies.objects.filter(version=version).delete()
+    BaselineCountry.objects.filter(version=version).delete()
+
+    country_cols = results.get("blanks_country_cols", [])
+    country_continents = results.get("country_continents", {})
+    pays_stats = results.get("pays_stats", {})
+    countries = BaselineCountry.objects.bulk_create(
+        [
+            BaselineCountry(
+                version=version,
+                name=country,
+                continent=country_continents.get(country) or "",
+                total_species=int(pays_stats.get(country, {}).get("Total_Species", 0)),
+                species_above_threshold=int(pays_stats.get(country, {}).get("Species_Above_00009", 0)),
+                max_species_count=int(pays_stats.get(country, {}).get("Max_Species_Count", 0)),
+            )
+            for country in country_cols
+        ],
+        batch_size=batch_size,
+    )
+    country_by_name = {country.name: country for country in countries}
+
+    # Une ligne par nom normalisé (contrainte unique) : la mieux classée.
+    records_by_key = {}
+    for row in sorted(results.get("liste_blanks_records", []), key=blanks_sort_key):
+        if row.get("Species"):
+            records_by_key.setdefault(_name_key(row["Species"]), row)
+    records = list(records_by_key.values())
+    species = BaselineSpecies.objects.bulk_create(
+        [
+            BaselineSpecies(
+                version=version,
+                name=str(row["Species"]),
+                name_key=_name_key(row["Species"]),
+                rank=rank,
+                country_count=int(row.get("Country_Count") or 0),
+                above_threshold_count=int(row.get("Above_Threshold_Count") or 0),
+                max_percentage=_finite_or_none(row.get("Max_Percentage")) or 0.0,
+                max_country=country_by_name.get(row.get("Max_Percentage_Country")),
+                median_percentage=_finite_or_none(row.get("Median Percentage")),
+            )
+            for rank, row in enumerate(records, start=1)
+        ],
+        batch_size=batch_size,
+    )
+
+    def presences():
+        for row, species_obj in zip(records, species):
+            for country in countries:
+                value = _finite_or_none(row.get(country.name))
+                if value:
+                    yield BaselinePresence(species=species_obj, country=country, value=value)
+
+    n_presences = 0
+    batch = []
+    for presence in presences():
+        batch.append(presence)
+        if len(batch) >= batch_size:
+            BaselinePresence.objects.bulk_create(batch, batch_size=batch_size)
+            n_presences += len(batch)
+            batch = []
+    if batch:
+        BaselinePresence.objects.bulk_create(batch, batch_size=batch_size)
+        n_presences += len(batch)
+
+    return {"countries": len(countries), "species": len(species), "presences": n_presences}
+
+
+def country_totals(version, threshold=SERVING_THRESHOLD):
+    """
+    Nombre d'espèces présentes et au-dessus de ``threshold`` par pays,
+    calculé en SQL sur ``BaselinePresence``.
+
+    Les présences sont celles des lignes de blancs : ces totaux sont ceux de
+    ``filter_upload_results`` pour une life list vide, et non les
+    ``total_species`` stockés (calculés sur toute la matrice DV).
+    """
+    return list(
+        BaselineCountry.objects
+        .filter(version=version)
+        .annotate(
+            present=Count("presences", filter=Q(presences__value__gt=0)),
+            above=Count("presences", filter=Q(presences__value__gt=threshold)),
+        )
+        .order_by("-present", "name")
+        .values("name", "continent", "present", "above")
+    )
+
+
+def species_in_country(version, country_name, threshold=0.0, limit=None):
+    """
+    Espèces d'un pays dont la valeur dépasse ``threshold``, par valeur
+    décroissante : ``[(espèce, valeur, rang global), ...]``.
+    """
+    rows = (
+        BaselinePresence.objects
+        .filter(country__version=version, country__name=country_name, value__gt=threshold)
+        .order_by("-value", "species__name")
+        .values_list("species__name", "value", "species__rank")
+    )
+    return list(rows[:limit] if limit else rows)
+
+
+def countries_of_species(version, species_name):
+    """
+    Pays où une espèce est présente, par valeur décroissante :
+    ``[(pays, continent, valeur), ...]``.
+    """
+    return list(
+        BaselinePresence.objects
+        .filter(species__version=version, species__name_key=species_name.strip().lower())
+        .order_by("-value", "country__name")
+        .values_list("country__name", "country__continent", "value")
+    )
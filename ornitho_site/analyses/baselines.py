@@ -0,0 +1,388 @@
+"""
+Stockage et versionnement du baseline mondial.
+
+Chaque baseline compilé est une ``BaselineVersion`` immuable identifiée par le
+hash de son contenu. La ligne ``BaselineAnalysis`` "world_baseline" n'est plus
+qu'un pointeur vers la version active : une reconstruction publie d'abord une
+nouvelle version sans toucher au baseline servi, puis la promotion bascule le
+pointeur en une seule écriture.
+"""
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+
+from .models import Analyse, BaselineAnalysis, BaselineVersion
+from core.baseline_index import forget_baseline_index, get_baseline_index
+from core.regions import build_region_index, read_region_targets
+from core.timing import stage
+import hashlib
+import json
+import logging
+import os
+
+
+logger = logging.getLogger(__name__)
+
+BASELINE_NAME = "world_baseline"
+BASELINE_JSON_FILENAME = "baseline_world.json"
+
+COUNTRY_ALIASES = {
+    "United Republic of Tanzania": "Tanzania",
+    "Democratic Republic of the Congo": "Congo, Dem. Rep.",
+    "Republic of the Congo": "DR Congo.",
+    "Russia": "Russian Federation",
+    "The Bahamas": "Bahamas",
+    "Bolivia": "Bolivia",
+    "Venezuela": "Venezuela",
+    "Ivory Coast": "Cote d'Ivoire",
+    "eSwatini": "Eswatini",
+    "Palestine": "Palestinian Territory",
+    "Vietnam": "Viet Nam",
+    "Iran": "Iran (Islamic Republic of)",
+    "Syria": "Syrian Arab Republic",
+    "Czechia": "Czech Republic",
+    "New Caledonia": "New Caledonia",
+    "United States of America": "United States",
+    "Greenland": "Greenland",
+    "French Southern and Antarctic Lands": "French Southern and Antarctic Lands",
+    "Antarctica": "Antarctica",
+    "Republic of Serbia": "Serbia",
+}
+
+# {cache_key: results} ; cache_key = content_hash d'une version, ou
+# ("file", mtime) pour le fichier baseline hérité.
+_BASELINE_CACHE = {}
+
+
+def get_target_species_path():
+    return os.path.join(
+        settings.BASE_DIR,
+        "core",
+        "Especes_cibles_monde_copie.xlsx",
+    )
+
+
+def get_baseline_json_path():
+    return os.path.join(settings.BASE_DIR, "core", BASELINE_JSON_FILENAME)
+
+
+def get_baseline_artifact_dir():
+    return getattr(
+        settings,
+        "BASELINE_ARTIFACT_DIR",
+        os.path.join(settings.BASE_DIR, "core", "baselines"),
+    )
+
+
+def get_baseline_artifact_path(content_hash, extension="json"):
+    return os.path.join(get_baseline_artifact_dir(), f"baseline_{content_hash}.{extension}")
+
+
+def _write_json_atomically(path, results):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def load_baseline_from_file(path=None):
+    baseline_path = path or get_baseline_json_path()
+    if not os.path.exists(baseline_path):
+        return None
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def get_file_baseline_token():
+    baseline_path = get_baseline_json_path()
+    if not os.path.exists(baseline_path):
+        return None
+    return ("file", os.path.getmtime(baseline_path))
+
+
+def save_baseline_to_file(results):
+    _write_json_atomically(get_baseline_json_path(), results)
+
+
+def apply_country_aliases(results):
+    pays_stats = results.get("pays_stats", {})
+    blancks_par_pays = results.get("blancks_par_pays", {})
+    country_continents = results.get("country_continents", {})
+
+    for admin_name, excel_name in COUNTRY_ALIASES.items():
+        if excel_name in pays_stats:
+            pays_stats[admin_name] = pays_stats[excel_name]
+            blancks_par_pays[admin_name] = blancks_par_pays.get(excel_name, [])
+            country_continents[admin_name] = country_continents.get(excel_name)
+
+    return results
+
+
+def compute_baseline_hash(results):
+    """
+    Hash sha256 du contenu canonique (clés triées) d'un baseline compilé.
+    Deux reconstructions identiques donnent donc la même version.
+    """
+    canonical = json.dumps(results, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _cache_baseline(cache_key, results):
+    _BASELINE_CACHE.pop(cache_key, None)
+    _BASELINE_CACHE[cache_key] = results
+    max_versions = max(int(getattr(settings, "BASELINE_CACHE_MAX_VERSIONS", 2)), 1)
+    while len(_BASELINE_CACHE) > max_versions:
+        forget_baseline_index(_BASELINE_CACHE.pop(next(iter(_BASELINE_CACHE))))
+    return results
+
+
+def get_active_baseline_version():
+    """
+    Retourne la version active (sans charger le JSON) ou None.
+    """
+    pointer = (
+        BaselineAnalysis.objects
+        .filter(name=BASELINE_NAME)
+        .values("active_version_id")
+        .first()
+    )
+    if not pointer or pointer["active_version_id"] is None:
+        return None
+    return (
+        BaselineVersion.objects
+        .defer("baseline_json")
+        .filter(pk=pointer["active_version_id"])
+        .first()
+    )
+
+
+def load_baseline_version(version):
+    """
+    Charge (ou relit depuis le cache du process) le contenu d'une version.
+    Le JSON en base fait foi ; l'artefact fichier sert de repli.
+    """
+    cached = _BASELINE_CACHE.get(version.content_hash)
+    if cached is not None:
+        return cached
+
+    results = (
+        BaselineVersion.objects
+        .filter(pk=version.pk)
+        .values_list("baseline_json", flat=True)
+        .first()
+    )
+    if not results:
+        results = load_baseline_from_file(get_baseline_artifact_path(version.content_hash))
+    if not results:
+        return None
+    return _cache_baseline(version.content_hash, results)
+
+
+def load_compiled_baseline(version):
+    """
+    Matrice compilée (``core.world_matrix``) d'une version, ou None si la
+    version a été publiée sans artefact compilé.
+    """
+    if version is None:
+        return None
+    compiled_path = get_baseline_artifact_path(version.content_hash, "npz")
+    if not os.path.exists(compiled_path):
+        return None
+    from core.world_matrix import load_compiled_world_matrix
+
+    return load_compiled_world_matrix(compiled_path)
+
+
+def publish_baseline_version(results, compiled=None):
+    """
+    Enregistre un baseline compilé comme version immuable, sans l'activer.
+    Si une version de même contenu existe déjà, elle est réutilisée.
+    """
+    content_hash = compute_baseline_hash(results)
+    version = BaselineVersion.objects.defer("baseline_json").filter(content_hash=content_hash).first()
+    if version is None:
+        version = BaselineVersion.objects.create(
+            content_hash=content_hash,
+            baseline_json=results,
+        )
+    artifact_path = get_baseline_artifact_path(content_hash)
+    if not os.path.exists(artifact_path):
+        _write_json_atomically(artifact_path, results)
+    compiled_path = get_baseline_artifact_path(content_hash, "npz")
+    if compiled is not None and not os.path.exists(compiled_path):
+        from core.world_matrix import save_compiled_world_matrix
+
+        save_compiled_world_matrix(compiled, compiled_path)
+    _cache_baseline(content_hash, results)
+    return version
+
+
+def build_baseline_version(target_species_path, incremental=True, workers=None):
+    """
+    Recalcule le baseline depuis le fichier Excel et le publie comme
+    nouvelle version. Le baseline servi n'est pas modifié.
+
+    En mode incrémental, la matrice compilée de la version active sert de
+    point de départ : seules les paires de colonnes pays modifiées sont
+    recalculées. ``workers`` (par défaut ``BASELINE_BUILD_WORKERS``) fixe le
+    nombre de processus de calcul. Retourne ``(version, pays recalculés)``.
+    """
+    from core.world_blanks import compile_baseline_results
+
+    if workers is None:
+        workers = getattr(settings, "BASELINE_BUILD_WORKERS", 1)
+    previous_compiled = load_compiled_baseline(get_active_baseline_version()) if incremental else None
+    results, compiled = compile_baseline_results(target_species_path, previous_compiled, workers=max(int(workers), 1))
+    version = publish_baseline_version(apply_country_aliases(results), compiled)
+    return version, [str(country) for country in compiled["changed_columns"]]
+
+
+def promote_baseline_version(version):
+    """
+    Bascule atomiquement le pointeur "world_baseline" vers ``version``.
+    """
+    with transaction.atomic():
+        pointer, _ = BaselineAnalysis.objects.select_for_update().get_or_create(name=BASELINE_NAME)
+        pointer.active_version = version
+        pointer.save(update_fields=["active_version", "date_updated"])
+
+    results = load_baseline_version(version)
+    if results is not None:
+        save_baseline_to_file(results)
+    return pointer
+
+
+def find_baseline_version(hash_prefix):
+    matches = list(
+        BaselineVersion.objects
+        .defer("baseline_json")
+        .filter(content_hash__startswith=hash_prefix)[:2]
+    )
+    if len(matches) != 1:
+        return None
+    return matches[0]
+
+
+def prune_baseline_versions(dry_run=False):
+    """
+    Supprime les versions qui ne sont ni actives ni épinglées par une analyse.
+    Les analyses non épinglées ne servent que la version active : leur
+    référence à une version supprimée est simplement effacée.
+    Retourne la liste des hash supprimés.
+    """
+    active = get_active_baseline_version()
+    pinned = Analyse.objects.filter(baseline_version=OuterRef("pk"), pin_baseline=True)
+    unreferenced = (
+        BaselineVersion.objects
+        .defer("baseline_json")
+        .annotate(is_referenced=Exists(pinned))
+        .filter(is_referenced=False)
+    )
+    if active is not None:
+        unreferenced = unreferenced.exclude(pk=active.pk)
+
+    pruned = []
+    for version in unreferenced:
+        pruned.append(version.content_hash)
+        if dry_run:
+            continue
+        with transaction.atomic():
+            Analyse.objects.filter(baseline_version=version).update(baseline_version=None)
+            version.delete()
+        evicted = _BASELINE_CACHE.pop(version.content_hash, None)
+        if evicted is not None:
+            forget_baseline_index(evicted)
+        for extension in ("json", "npz"):
+            artifact_path = get_baseline_artifact_path(version.content_hash, extension)
+            if os.path.exists(artifact_path):
+                os.remove(artifact_path)
+    return pruned
+
+
+def get_baseline_results(target_species_path, allow_recompute=False, version=None):
+    """
+    Résultats du baseline ``version`` (par défaut la version active).
+    Sans version active, on se replie sur le fichier baseline hérité.
+    """
+    with stage("baseline_load"):
+        if version is None:
+            version = get_active_baseline_version()
+
+        if version is not None:
+            results = load_baseline_version(version)
+            if results is not None:
+                return results
+
+        file_token = get_file_baseline_token()
+        if file_token is not None:
+            cached = _BASELINE_CACHE.get(file_token)
+            if cached is not None:
+                return cached
+            file_baseline = load_baseline_from_file()
+            if file_baseline:
+                return _cache_baseline(file_token, file_baseline)
+
+        if allow_recompute:
+            version, _ = build_baseline_version(target_species_path)
+            promote_baseline_version(version)
+            return load_baseline_version(version)
+
+        return None
+
+
+def get_analysis_baseline_version(analyse):
+    """
+    Version servie pour une analyse : celle de sa création si l'analyse est
+    épinglée, sinon la version active.
+    """
+    if analyse is not None and analyse.pin_baseline and analyse.baseline_version_id:
+        return (
+            BaselineVersion.objects
+            .defer("baseline_json")
+            .filter(pk=analyse.baseline_version_id)
+            .first()
+        )
+    return get_active_baseline_version()
+
+
+def get_analysis_baseline_results(analyse):
+    return get_baseline_results(
+        get_target_species_path(),
+        version=get_analysis_baseline_version(analyse),
+    )
+
+
+def get_region_targets_path():
+    return getattr(
+        settings,
+        "REGION_TARGET_SPECIES_PATH",
+        os.path.join(settings.BASE_DIR, "core", "Especes_cibles_regions.csv"),
+    )
+
+
+def get_region_index(baseline_results):
+    """
+    Index régional (``core.regions``) aligné sur ``baseline_results``,
+    construit au premier appel puis gardé dans l'index du baseline tant que
+    le fichier régional ne change pas. None sans fichier régional ou si
+    celui-ci est illisible (colonnes manquantes, encodage) : les vues
+    régionales répondent alors 503 au lieu de faire tomber le processus.
+    """
+    path = get_region_targets_path()
+    if not path or not os.path.exists(path):
+        return None
+    token = (path, os.path.getmtime(path))
+    index = get_baseline_index(baseline_results)
+    cached = index.get("region_index")
+    if cached is not None and cached[0] == token:
+        return cached[1]
+    try:
+        with stage("baseline_load"):
+            region_index = build_region_index(baseline_results, read_region_targets(path), COUNTRY_ALIASES)
+    except (OSError, ValueError) as exc:
+        logger.warning("Region targets file %s unusable: %s", path, exc)
+        region_index = None
+    index["region_index"] = (token, region_index)
+    return region_index
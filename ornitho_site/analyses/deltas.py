@@ -0,0 +1,177 @@
+"""
+Résultats compacts d'une analyse (``Analyse.results_json``).
+
+  - ``species_delta_v1`` : liste triée des noms d'espèces de la life list ;
+  - ``species_delta_v2`` : bitmap sur les lignes d'une version du baseline
+    (``core.species_delta``) + noms hors baseline, avec le hash de cette
+    version. Décodé directement en masque NumPy quand la version servie est
+    celle de l'encodage ; sinon la life list est réencodée une fois sur la
+    version servie et l'analyse mise à jour.
+
+Les deux modes peuvent porter les dates de première observation
+(``first_seen``) : les vues acceptent alors ``as_of`` et retirent seulement
+les espèces vues à cette date.
+"""
+
+from django.db import DatabaseError
+
+from .baselines import load_baseline_version
+from .models import BaselineVersion
+from core.baseline_index import get_baseline_index, surviving_species_mask
+from core.species_delta import (
+    decode_species_bitmap,
+    encode_first_seen,
+    encode_species_bitmap,
+    first_seen_by_name,
+    first_seen_mask,
+    species_names_from_bitmap,
+)
+
+
+DELTA_V1 = "species_delta_v1"
+DELTA_V2 = "species_delta_v2"
+COMPACT_RESULT_MODES = (DELTA_V1, DELTA_V2)
+
+
+def is_compact_analysis_payload(payload):
+    return isinstance(payload, dict) and payload.get("result_mode") in COMPACT_RESULT_MODES
+
+
+def has_first_seen(payload):
+    return isinstance(payload, dict) and "first_seen" in payload
+
+
+def build_compact_analysis_payload(species_to_remove, baseline_version=None, baseline_results=None, first_seen=None):
+    """
+    Payload v2 sur ``baseline_version`` si la version et ses résultats sont
+    fournis, v1 (liste de noms) sinon. ``first_seen`` (``{nom: jour
+    ordinal}``) ajoute les dates de première observation.
+    """
+    if baseline_version is None or baseline_results is None:
+        payload = {
+            "result_mode": DELTA_V1,
+            "species_to_remove": sorted(species_to_remove),
+            "lifelist_count": len(species_to_remove),
+        }
+        if first_seen is not None:
+            payload["first_seen"] = {name: int(day) for name, day in first_seen.items()}
+        return payload
+
+    index = get_baseline_index(baseline_results)
+    bitmap, overflow = encode_species_bitmap(index, species_to_remove)
+    payload = {
+        "result_mode": DELTA_V2,
+        "baseline_hash": baseline_version.content_hash,
+        "n_rows": len(index["species_keys"]),
+        "bitmap": bitmap,
+        "overflow": overflow,
+        "lifelist_count": len(species_to_remove),
+    }
+    if first_seen is not None:
+        payload["first_seen"] = encode_first_seen(index, first_seen, overflow)
+    return payload
+
+
+def _encoding_index(payload):
+    # Index de la version qui a servi à encoder un payload v2, ou None.
+    try:
+        version = BaselineVersion.objects.defer("baseline_json").filter(content_hash=payload.get("baseline_hash")).first()
+    except DatabaseError:
+        version = None
+    results = load_baseline_version(version) if version is not None else None
+    if results is None:
+        return None
+    return get_baseline_index(results)
+
+
+def payload_species_names(payload):
+    """
+    Noms normalisés d'un payload compact, ou None si la version du baseline
+    qui a servi à l'encoder n'est plus disponible.
+    """
+    if payload.get("result_mode") == DELTA_V1:
+        return set(payload.get("species_to_remove", []))
+    index = _encoding_index(payload)
+    if index is None:
+        return None
+    return species_names_from_bitmap(index, payload["bitmap"], payload.get("overflow", []))
+
+
+def payload_first_seen(payload):
+    """
+    ``{nom: jour ordinal}`` d'un payload compact, ou None s'il n'a pas de
+    dates ou si sa version d'encodage n'est plus disponible.
+    """
+    if not has_first_seen(payload):
+        return None
+    if payload.get("result_mode") == DELTA_V1:
+        return dict(payload["first_seen"])
+    index = _encoding_index(payload)
+    if index is None:
+        return None
+    return first_seen_by_name(index, payload["first_seen"], payload.get("overflow", []))
+
+
+def _names_as_of(first_seen, as_of):
+    return {name for name, day in first_seen.items() if day <= as_of}
+
+
+def analysis_species_delta(analyse, payload, baseline_version, baseline_results, fallback=None, as_of=None):
+    """
+    Espèces retirées d'une analyse compacte pour le baseline servi : le
+    masque des lignes retirées (v2 encodé sur cette version), sinon un
+    ensemble de noms.
+
+    Un payload v2 encodé sur une autre version est réencodé sur
+    ``baseline_version`` et enregistré ; si sa version d'origine a disparu,
+    la life list est relue par ``fallback()`` (``{nom: jour ordinal}``).
+
+    ``as_of`` (jour ordinal) ne retire que les espèces vues à cette date ;
+    l'appelant vérifie ``has_first_seen(payload)``.
+    """
+    if payload.get("result_mode") == DELTA_V1:
+        if as_of is not None:
+            return _names_as_of(payload["first_seen"], as_of)
+        return set(payload.get("species_to_remove", []))
+
+    if baseline_version is not None and payload.get("baseline_hash") == baseline_version.content_hash:
+        if as_of is not None:
+            return first_seen_mask(payload["first_seen"], payload["n_rows"], as_of)
+        return decode_species_bitmap(payload["bitmap"], payload["n_rows"])
+
+    names = payload_species_names(payload)
+    first_seen = payload_first_seen(payload)
+    if names is None:
+        if fallback is None:
+            raise ValueError(f"Baseline version {payload.get('baseline_hash')} of analysis {analyse.pk} is gone")
+        first_seen = fallback()
+        names = set(first_seen)
+    if baseline_version is not None:
+        analyse.results_json = build_compact_analysis_payload(names, baseline_version, baseline_results, first_seen)
+        analyse.save(update_fields=["results_json"])
+    if as_of is not None:
+        return _names_as_of(first_seen, as_of)
+    return names
+
+
+def analysis_seen_mask(payload, baseline_version, baseline_results, fallback=None):
+    """
+    Masque des lignes de ``baseline_results`` retirées par une analyse
+    compacte, sans réencoder ni enregistrer le payload (une analyse épinglée
+    garde son encodage). ``fallback()`` relit la life list
+    (``{nom: jour ordinal}``) si la version d'origine d'un payload v2 a disparu.
+    """
+    index = get_baseline_index(baseline_results)
+    if (
+        payload.get("result_mode") == DELTA_V2
+        and baseline_version is not None
+        and payload.get("baseline_hash") == baseline_version.content_hash
+    ):
+        return decode_species_bitmap(payload["bitmap"], payload["n_rows"])
+
+    names = payload_species_names(payload)
+    if names is None:
+        if fallback is None:
+            raise ValueError(f"Baseline version {payload.get('baseline_hash')} is gone")
+        names = set(fallback())
+    return ~surviving_species_mask(index, names)
@@ -0,0 +1,216 @@
+"""
+File de jobs locale, stockée en base (table ``Job``).
+
+Les vues enfilent les traitements lourds (reconstruction du baseline,
+ré-analyse en masse, parsing des gros uploads) et la commande
+``manage.py run_jobs`` les exécute dans un pool de processus. Aucun broker
+externe n'est nécessaire : la base de données sert de file.
+"""
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .baselines import get_analysis_baseline_version, get_baseline_results, get_target_species_path
+from .lifelists import extract_first_seen_from_path
+from .models import Analyse, Job
+from datetime import timedelta
+import io
+import os
+import socket
+import traceback
+
+
+# ``results_json`` d'une analyse dont le parsing en arrière-plan a échoué.
+FAILED_JOB_RESULT_MODE = "failed_job"
+
+
+def _run_rebuild_baseline(job):
+    stdout = io.StringIO()
+    call_command(
+        "rebuild_baseline",
+        no_promote=bool(job.payload.get("no_promote")),
+        full=bool(job.payload.get("full")),
+        workers=job.payload.get("workers"),
+        precompute=job.payload.get("precompute"),
+        stdout=stdout,
+    )
+    return {"output": stdout.getvalue().strip()}
+
+
+def _run_reanalyse_all(job):
+    stdout = io.StringIO()
+    call_command("compact_analysis_results", force=True, stdout=stdout)
+    return {"output": stdout.getvalue().strip()}
+
+
+def _run_parse_upload(job):
+    from .deltas import build_compact_analysis_payload
+    from .precompute import patch_analysis_summary
+
+    analyse = Analyse.objects.get(pk=job.payload["analyse_id"])
+    first_seen = extract_first_seen_from_path(analyse.life_list_file.path)
+    version = get_analysis_baseline_version(analyse)
+    analyse.results_json = build_compact_analysis_payload(
+        set(first_seen),
+        version,
+        get_baseline_results(get_target_species_path(), version=version),
+        first_seen,
+    )
+    analyse.save(update_fields=["results_json"])
+    if getattr(settings, "INCREMENTAL_SUMMARY_ON_UPLOAD", True):
+        patch_analysis_summary(analyse)
+    return {"analyse_id": analyse.id, "lifelist_count": len(first_seen)}
+
+
+def _fail_parse_upload(job, error):
+    # L'analyse ne reste pas "pending_job" : les vues répondent une erreur.
+    Analyse.objects.filter(pk=job.payload.get("analyse_id")).update(results_json={
+        "result_mode": FAILED_JOB_RESULT_MODE,
+        "job_id": job.id,
+        "error": error,
+    })
+
+
+JOB_HANDLERS = {
+    "rebuild_baseline": _run_rebuild_baseline,
+    "reanalyse_all": _run_reanalyse_all,
+    "parse_upload": _run_parse_upload,
+}
+
+# Nettoyage spécifique à un type de job après un échec.
+JOB_FAILURE_HANDLERS = {
+    "parse_upload": _fail_parse_upload,
+}
+
+# Jobs dont une seule instance a du sens à la fois : un nouvel enqueue
+# retourne le job déjà en attente ou en cours.
+SINGLETON_JOB_KINDS = {"rebuild_baseline", "reanalyse_all"}
+
+
+def enqueue_job(kind, payload=None, user=None):
+    if kind not in JOB_HANDLERS:
+        raise ValueError(f"Unknown job kind: {kind}")
+
+    with transaction.atomic():
+        if kind in SINGLETON_JOB_KINDS:
+            pending = (
+                Job.objects
+                .filter(kind=kind, status__in=[Job.STATUS_QUEUED, Job.STATUS_RUNNING])
+                .order_by("id")
+                .first()
+            )
+            if pending is not None:
+                return pending
+        return Job.objects.create(kind=kind, payload=payload or {}, user=user)
+
+
+def runner_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def claim_next_job():
+    """
+    Passe le plus ancien job en attente à l'état "running" et le retourne.
+    L'UPDATE conditionnel garantit qu'un job n'est réclamé qu'une fois,
+    même avec plusieurs runners.
+    """
+    while True:
+        job_id = (
+            Job.objects
+            .filter(status=Job.STATUS_QUEUED)
+            .order_by("id")
+            .values_list("id", flat=True)
+            .first()
+        )
+        if job_id is None:
+            return None
+        now = timezone.now()
+        claimed = Job.objects.filter(pk=job_id, status=Job.STATUS_QUEUED).update(
+            status=Job.STATUS_RUNNING,
+            date_started=now,
+            runner=runner_id(),
+            heartbeat=now,
+        )
+        if claimed:
+            return Job.objects.get(pk=job_id)
+
+
+def heartbeat_jobs(job_ids):
+    """
+    Prolonge le bail des jobs en cours du runner.
+    """
+    if not job_ids:
+        return 0
+    return Job.objects.filter(pk__in=job_ids, status=Job.STATUS_RUNNING).update(heartbeat=timezone.now())
+
+
+def requeue_interrupted_jobs():
+    """
+    Remet en attente les jobs "running" abandonnés : sans battement depuis
+    ``JOB_LEASE_SECONDS`` (runner arrêté ou planté). Les jobs d'un runner
+    encore vivant, qui bat régulièrement, ne sont pas touchés.
+    """
+    lease = timedelta(seconds=getattr(settings, "JOB_LEASE_SECONDS", 60))
+    return (
+        Job.objects
+        .filter(status=Job.STATUS_RUNNING, heartbeat__lt=timezone.now() - lease)
+        .update(status=Job.STATUS_QUEUED, date_started=None, runner="", heartbeat=None)
+    )
+
+
+def mark_job_failed(job, error):
+    """
+    Passe ``job`` à l'état "failed" et applique son nettoyage d'échec
+    (``JOB_FAILURE_HANDLERS``).
+    """
+    job.status = Job.STATUS_FAILED
+    job.error = error
+    job.result = None
+    job.date_finished = timezone.now()
+    job.save(update_fields=["status", "error", "result", "date_finished"])
+    failure_handler = JOB_FAILURE_HANDLERS.get(job.kind)
+    if failure_handler is not None:
+        failure_handler(job, job_error_summary(error))
+
+
+def job_error_summary(error):
+    """
+    Dernière ligne d'une trace d'erreur (le type et le message), tronquée.
+    """
+    lines = [line for line in (error or "").strip().splitlines() if line.strip()]
+    return lines[-1][:200] if lines else ""
+
+
+def run_job(job_id):
+    """
+    Exécute un job déjà réclamé. Appelé dans un processus du pool.
+    """
+    close_old_connections()
+    job = Job.objects.get(pk=job_id)
+    try:
+        result = JOB_HANDLERS[job.kind](job)
+    except Exception:
+        mark_job_failed(job, traceback.format_exc())
+        return job.status
+    job.status = Job.STATUS_DONE
+    job.error = ""
+    job.result = result
+    job.date_finished = timezone.now()
+    job.save(update_fields=["status", "error", "result", "date_finished"])
+    return job.status
+
+
+def job_status_payload(job):
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "done": job.status in {Job.STATUS_DONE, Job.STATUS_FAILED},
+        "failed": job.status == Job.STATUS_FAILED,
+        "error": job_error_summary(job.error) if job.status == Job.STATUS_FAILED else None,
+        "date_creation": job.date_creation.isoformat(),
+        "date_started": job.date_started.isoformat() if job.date_started else None,
+        "date_finished": job.date_finished.isoformat() if job.date_finished else None,
+    }
@@ -0,0 +1,94 @@
+"""
+Lecture des life lists (export CSV eBird : colonnes ``Common Name`` et
+``Countable``).
+
+Les lecteurs ``extract_species_to_remove_*`` retournent l'ensemble des noms
+normalisés (minuscules, sans espaces de bord) des espèces comptables, les
+lecteurs ``extract_first_seen_*`` la date de première observation de chacune
+(colonne ``Date``) ; ils sont utilisés par les vues d'upload, les jobs et les
+commandes de maintenance.
+"""
+
+from core.timing import stage
+from datetime import datetime
+import csv
+import functools
+import io
+
+
+def extract_species_to_remove_from_file(file_obj):
+    file_obj.seek(0)
+    text_stream = io.TextIOWrapper(file_obj, encoding="utf-8", newline="")
+    try:
+        with stage("extract_species"):
+            reader = csv.DictReader(text_stream)
+            species_to_remove = {
+                row.get("Common Name").strip().lower()
+                for row in reader
+                if row.get("Countable") == "1" and row.get("Common Name")
+            }
+    finally:
+        text_stream.detach()
+    return species_to_remove
+
+
+def extract_species_to_remove_from_path(life_list_path):
+    species_to_remove = set()
+    with stage("extract_species"), open(life_list_path, newline="", encoding="utf-8") as csvfile:
+        reader = csv.DictReader(csvfile)
+        for row in reader:
+            if row.get("Countable") == "1":
+                species_name = row.get("Common Name")
+                if species_name:
+                    species_to_remove.add(species_name.strip().lower())
+    return species_to_remove
+
+
+LIFE_LIST_DATE_FORMATS = ("%d %b %Y", "%Y-%m-%d")
+
+
+@functools.lru_cache(maxsize=4096)
+def parse_life_list_date(value):
+    """
+    Jour ordinal d'une date de life list eBird ("10 Mar 2025"), 0 si la
+    date est absente ou illisible (l'espèce compte alors comme toujours vue).
+    """
+    value = (value or "").strip()
+    for date_format in LIFE_LIST_DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format).date().toordinal()
+        except ValueError:
+            continue
+    return 0
+
+
+def _first_seen_from_reader(reader):
+    first_seen = {}
+    for row in reader:
+        if row.get("Countable") != "1" or not row.get("Common Name"):
+            continue
+        species_name = row["Common Name"].strip().lower()
+        day = parse_life_list_date(row.get("Date"))
+        if species_name not in first_seen or day < first_seen[species_name]:
+            first_seen[species_name] = day
+    return first_seen
+
+
+def extract_first_seen_from_file(file_obj):
+    """
+    ``{nom normalisé: jour ordinal de première observation}`` d'une life
+    list ; les clés sont les espèces de ``extract_species_to_remove_from_file``.
+    """
+    file_obj.seek(0)
+    text_stream = io.TextIOWrapper(file_obj, encoding="utf-8", newline="")
+    try:
+        with stage("extract_species"):
+            first_seen = _first_seen_from_reader(csv.DictReader(text_stream))
+    finally:
+        text_stream.detach()
+    return first_seen
+
+
+def extract_first_seen_from_path(life_list_path):
+    with stage("extract_species"), open(life_list_path, newline="", encoding="utf-8") as csvfile:
+        return _first_seen_from_reader(csv.DictReader(csvfile))
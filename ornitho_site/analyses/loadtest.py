@@ -0,0 +1,390 @@
+"""
+Harnais de charge HTTP hors ligne.
+
+``manage.py load_test`` prépare une base SQLite jetable (utilisateurs, sessions
+et analyses compactes construites depuis de vraies life lists), lance un
+gunicorn local sur cette base, puis envoie un mélange pondéré de requêtes
+(page d'accueil, endpoints JSON des sections, upload) avec une concurrence
+donnée. Le rapport donne p50/p95/p99, le débit et la RSS de chaque worker.
+"""
+
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, get_user_model
+from django.contrib.auth.hashers import make_password
+from django.contrib.sessions.backends.db import SessionStore
+from django.urls import reverse
+
+from .baselines import (
+    get_active_baseline_version,
+    get_baseline_results,
+    get_target_species_path,
+    load_baseline_from_file,
+    promote_baseline_version,
+    publish_baseline_version,
+)
+from .lifelists import extract_species_to_remove_from_path
+from .models import Analyse
+
+import http.client
+import os
+import random
+import secrets
+import string
+import threading
+import time
+import uuid
+from urllib.parse import quote
+
+
+LOAD_TEST_USER_PREFIX = "loadtest_"
+
+# Poids par défaut de chaque type de requête.
+DEFAULT_MIX = {
+    "home": 5,
+    "home_analysis": 10,
+    "section_blanks": 10,
+    "section_blanks_by_country": 10,
+    "section_summary": 10,
+    "baseline_section_blanks": 5,
+    "baseline_section_blanks_by_country": 5,
+    "baseline_section_summary": 5,
+    "upload": 1,
+}
+
+
+def parse_mix(raw):
+    """
+    "home=5,upload=1" -> {"home": 5, "upload": 1}. Vide -> ``DEFAULT_MIX``.
+    """
+    if not raw:
+        return dict(DEFAULT_MIX)
+    mix = {}
+    for item in raw.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in DEFAULT_MIX:
+            raise ValueError(f"Unknown request kind: {name}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def seed_load_test_db(n_users, n_analyses, life_list_paths, baseline_json_path=None, seed=0):
+    """
+    Remplit la base courante pour un test de charge. Le baseline vient de
+    ``baseline_json_path`` s'il est fourni, sinon il est recalculé.
+
+    Returns
+    -------
+    manifest : dict
+        Sessions des utilisateurs, identifiants de leurs analyses et liste des
+        pays, lus ensuite par le générateur de charge.
+    """
+    from .deltas import build_compact_analysis_payload
+
+    if baseline_json_path:
+        version = publish_baseline_version(load_baseline_from_file(baseline_json_path))
+        promote_baseline_version(version)
+    baseline = get_baseline_results(get_target_species_path(), allow_recompute=True)
+    version = get_active_baseline_version()
+
+    User = get_user_model()
+    password = make_password(None)
+    User.objects.bulk_create([
+        User(username=f"{LOAD_TEST_USER_PREFIX}{idx}", password=password)
+        for idx in range(n_users)
+    ])
+    users = list(User.objects.filter(username__startswith=LOAD_TEST_USER_PREFIX).order_by("id"))
+
+    payloads = {
+        path: build_compact_analysis_payload(extract_species_to_remove_from_path(path), version, baseline)
+        for path in life_list_paths
+    }
+    rng = random.Random(seed)
+    Analyse.objects.bulk_create([
+        Analyse(
+            user=users[idx % len(users)] if users else None,
+            life_list_file=os.path.join("life_lists", os.path.basename(path)),
+            titre=os.path.basename(path),
+            results_json=payloads[path],
+            baseline_version=version,
+        )
+        for idx, path in enumerate(rng.choice(life_list_paths) for _ in range(n_analyses))
+    ])
+
+    analyses_by_user = {}
+    for analyse_id, user_id in Analyse.objects.values_list("id", "user_id"):
+        analyses_by_user.setdefault(user_id, []).append(analyse_id)
+
+    sessions = []
+    for user in users:
+        session = SessionStore()
+        session[SESSION_KEY] = str(user.pk)
+        session[BACKEND_SESSION_KEY] = "django.contrib.auth.backends.ModelBackend"
+        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        session.create()
+        sessions.append({
+            "user_id": user.pk,
+            "session_key": session.session_key,
+            "analyses": analyses_by_user.get(user.pk, []),
+        })
+
+    return {
+        "users": sessions,
+        "anonymous_analyses": analyses_by_user.get(None, []),
+        "countries": list(baseline.get("pays_list", [])) if baseline else [],
+    }
+
+
+def _request_target(kind, user, manifest, rng):
+    """
+    (méthode, chemin) d'une requête de type ``kind`` pour ``user``.
+    """
+    analyses = user["analyses"] or manifest["anonymous_analyses"]
+    analyse_id = rng.choice(analyses) if analyses else None
+    country = rng.choice(manifest["countries"]) if manifest["countries"] else ""
+
+    if kind == "home":
+        return "GET", reverse("analyses:home")
+    if kind == "home_analysis":
+        return "GET", f"{reverse('analyses:home')}?analysis={analyse_id}"
+    if kind == "section_blanks":
+        return "GET", f"{reverse('analyses:section_blanks_json', args=[analyse_id])}?page={rng.randint(1, 5)}"
+    if kind == "section_blanks_by_country":
+        return "GET", f"{reverse('analyses:section_blanks_by_country_json', args=[analyse_id])}?country={quote(country)}"
+    if kind == "section_summary":
+        return "GET", reverse("analyses:section_summary_json", args=[analyse_id])
+    if kind == "baseline_section_blanks":
+        return "GET", f"{reverse('analyses:baseline_section_blanks_json')}?page={rng.randint(1, 5)}"
+    if kind == "baseline_section_blanks_by_country":
+        return "GET", f"{reverse('analyses:baseline_section_blanks_by_country_json')}?country={quote(country)}"
+    if kind == "baseline_section_summary":
+        return "GET", reverse("analyses:baseline_section_summary_json")
+    if kind == "upload":
+        return "POST", reverse("analyses:upload")
+    raise ValueError(kind)
+
+
+def _multipart_upload(csrf_token, file_name, content):
+    boundary = uuid.uuid4().hex
+    body = (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="csrfmiddlewaretoken"\r\n\r\n{csrf_token}\r\n'
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="life_list"; filename="{file_name}"\r\n'
+        f"Content-Type: text/csv\r\n\r\n"
+    ).encode("utf-8") + content + f"\r\n--{boundary}--\r\n".encode("utf-8")
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+class _VirtualClient:
+    """
+    Connexion HTTP persistante d'un thread du générateur de charge.
+    """
+
+    def __init__(self, host, port, timeout):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.connection = None
+
+    def request(self, method, path, headers, body=None):
+        for attempt in range(2):
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            try:
+                self.connection.request(method, path, body=body, headers=headers)
+                response = self.connection.getresponse()
+                response.read()
+                return response.status
+            except (http.client.HTTPException, OSError):
+                self.connection.close()
+                self.connection = None
+                if attempt:
+                    raise
+        return None
+
+
+def run_load(host, port, manifest, mix, concurrency, duration=None, total_requests=None,
+             upload_files=(), timeout=60, seed=0):
+    """
+    Envoie des requêtes pendant ``duration`` secondes (ou jusqu'à
+    ``total_requests``) depuis ``concurrency`` threads.
+
+    Returns
+    -------
+    samples : list[tuple]
+        ``(type, statut HTTP ou None, latence en ms)`` par requête.
+    elapsed : float
+        Durée réelle du tir, en secondes.
+    """
+    kinds = [kind for kind, weight in mix.items() if weight > 0]
+    weights = [mix[kind] for kind in kinds]
+    uploads = [(os.path.basename(path), open(path, "rb").read()) for path in upload_files]
+    users = manifest["users"] or [{"session_key": None, "analyses": []}]
+
+    samples = []
+    samples_lock = threading.Lock()
+    counter = {"sent": 0}
+    deadline = time.perf_counter() + duration if duration else None
+
+    def next_slot():
+        with samples_lock:
+            if total_requests is not None and counter["sent"] >= total_requests:
+                return False
+            counter["sent"] += 1
+            return True
+
+    def worker(worker_idx):
+        rng = random.Random(seed * 1000 + worker_idx)
+        client = _VirtualClient(host, port, timeout)
+        csrf_token = "".join(secrets.choice(string.ascii_letters + string.digits) for _ in range(32))
+        local = []
+        while (deadline is None or time.perf_counter() < deadline) and next_slot():
+            user = users[rng.randrange(len(users))]
+            kind = rng.choices(kinds, weights)[0]
+            if kind == "upload" and not uploads:
+                continue
+            method, path = _request_target(kind, user, manifest, rng)
+            cookies = [f"csrftoken={csrf_token}"]
+            if user["session_key"]:
+                cookies.append(f"sessionid={user['session_key']}")
+            headers = {"Cookie": "; ".join(cookies)}
+            body = None
+            if kind == "upload":
+                body, headers["Content-Type"] = _multipart_upload(csrf_token, *rng.choice(uploads))
+
+            start = time.perf_counter()
+            try:
+                status = client.request(method, path, headers, body)
+            except (http.client.HTTPException, OSError):
+                status = None
+            local.append((kind, status, (time.perf_counter() - start) * 1000))
+        with samples_lock:
+            samples.extend(local)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(idx,), daemon=True) for idx in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples, time.perf_counter() - started
+
+
+def percentile(sorted_values, pct):
+    """
+    Percentile "nearest rank" d'une liste déjà triée.
+    """
+    if not sorted_values:
+        return None
+    rank = max(int(-(-pct * len(sorted_values) // 100)), 1)
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def _latency_stats(latencies, elapsed):
+    latencies = sorted(latencies)
+    return {
+        "count": len(latencies),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else None,
+        "p50_ms": _round(percentile(latencies, 50)),
+        "p95_ms": _round(percentile(latencies, 95)),
+        "p99_ms": _round(percentile(latencies, 99)),
+        "max_ms": _round(latencies[-1] if latencies else None),
+    }
+
+
+def _round(value):
+    return None if value is None else round(value, 2)
+
+
+def summarize_samples(samples, elapsed):
+    """
+    Statistiques globales et par type de requête. Une requête est en erreur
+    si elle n'a pas abouti ou si son statut est >= 400.
+    """
+    by_kind = {}
+    for kind, status, latency in samples:
+        by_kind.setdefault(kind, []).append((status, latency))
+
+    def stats(entries):
+        result = _latency_stats([latency for _, latency in entries], elapsed)
+        result["errors"] = sum(1 for status, _ in entries if status is None or status >= 400)
+        return result
+
+    return {
+        "elapsed_s": round(elapsed, 3),
+        "total": stats([(status, latency) for _, status, latency in samples]),
+        "by_kind": {kind: stats(entries) for kind, entries in sorted(by_kind.items())},
+    }
+
+
+def child_pids(parent_pid):
+    """
+    PID des processus enfants (workers gunicorn), lus dans /proc.
+    """
+    pids = []
+    if not os.path.isdir("/proc"):
+        return pids
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", encoding="utf-8") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        if int(fields[1]) == parent_pid:
+            pids.append(int(entry))
+    return sorted(pids)
+
+
+def rss_kb(pid):
+    try:
+        with open(f"/proc/{pid}/status", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+
+class RssSampler(threading.Thread):
+    """
+    Relève périodiquement la RSS des workers d'un master gunicorn.
+    """
+
+    def __init__(self, master_pid, interval=0.5):
+        super().__init__(daemon=True)
+        self.master_pid = master_pid
+        self.interval = interval
+        self.peak_kb = {}
+        self.last_kb = {}
+        self._stop_event = threading.Event()
+
+    def sample(self):
+        for pid in [self.master_pid] + child_pids(self.master_pid):
+            value = rss_kb(pid)
+            if value is None:
+                continue
+            self.last_kb[pid] = value
+            self.peak_kb[pid] = max(value, self.peak_kb.get(pid, 0))
+
+    def run(self):
+        while not self._stop_event.is_set():
+            self.sample()
+            self._stop_event.wait(self.interval)
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        self.sample()
+
+    def report(self):
+        return {
+            str(pid): {
+                "role": "master" if pid == self.master_pid else "worker",
+                "rss_mb": round(self.last_kb.get(pid, 0) / 1024, 1),
+                "peak_rss_mb": round(self.peak_kb[pid] / 1024, 1),
+            }
+            for pid in sorted(self.peak_kb)
+        }
@@ -0,0 +1,90 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from analyses.baselines import get_target_species_path
+from core.world_blanks import build_baseline_target_species, compute_liste_blanks_world_classified
+from core.world_matrix import segmented_median
+
+from itertools import chain
+import numpy as np
+import pandas as pd
+import time
+
+
+def _above_threshold_lists(dv_df, threshold):
+    """
+    Pourcentages > seuil par espèce, collectés comme dans
+    ``compute_liste_blanks_world_classified`` (ordre de première apparition).
+    """
+    above = {}
+    for i in range(0, dv_df.shape[1], 2):
+        if pd.isna(dv_df.iloc[0, i]):
+            continue
+        species_column = dv_df.iloc[1:, i]
+        values_column = pd.to_numeric(dv_df.iloc[1:, i + 1], errors="coerce")
+        for species, value in zip(species_column, values_column):
+            if pd.isna(species) or pd.isna(value):
+                continue
+            values = above.setdefault(species, [])
+            if value > threshold:
+                values.append(value)
+    return above
+
+
+def _legacy_medians(above_lists):
+    return [pd.Series(values).median() if values else 0 for values in above_lists]
+
+
+def _segmented_medians(above_lists):
+    return segmented_median(
+        np.repeat(np.arange(len(above_lists)), [len(values) for values in above_lists]),
+        np.fromiter(chain.from_iterable(above_lists), dtype=float),
+        len(above_lists),
+    )
+
+
+def _best_of(repeat, func, *args):
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+class Command(BaseCommand):
+    help = "Compare the per-species pd.Series median with the segmented median on the target species workbook"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement (best time is kept).")
+        parser.add_argument("--threshold", type=float, default=0.0009)
+
+    def handle(self, *args, **options):
+        repeat = max(options["repeat"], 1)
+        threshold = options["threshold"]
+
+        _, dv_df = build_baseline_target_species(get_target_species_path())
+        above_lists = list(_above_threshold_lists(dv_df, threshold).values())
+        value_count = sum(len(values) for values in above_lists)
+        self.stdout.write(f"{len(above_lists)} species, {value_count} above-threshold values")
+
+        legacy_time, legacy = _best_of(repeat, _legacy_medians, above_lists)
+        segmented_time, segmented = _best_of(repeat, _segmented_medians, above_lists)
+        self.stdout.write(f"pd.Series median per species: {legacy_time * 1000:.1f} ms")
+        self.stdout.write(f"segmented median:             {segmented_time * 1000:.1f} ms")
+
+        mismatches = [
+            idx for idx, (expected, value) in enumerate(zip(legacy, segmented))
+            if expected != value
+        ]
+        # Le tableau complet doit reproduire les médianes de l'implémentation précédente.
+        table_time, table = _best_of(1, compute_liste_blanks_world_classified, dv_df, threshold)
+        table_mismatches = int((table["Median Percentage"].to_numpy() != np.asarray(legacy, dtype=float)).sum())
+        self.stdout.write(f"compute_liste_blanks_world_classified: {table_time * 1000:.1f} ms")
+
+        if mismatches or table_mismatches:
+            raise CommandError(
+                f"Median mismatch: {len(mismatches)} species (segmented), "
+                f"{table_mismatches} species (classified table)."
+            )
+        self.stdout.write(self.style.SUCCESS("Medians identical to the per-species pd.Series implementation."))
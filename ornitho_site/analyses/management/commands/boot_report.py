@@ -0,0 +1,85 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+
+# Exécuté dans un interpréteur neuf : ce que fait un worker gunicorn au
+# démarrage, puis le chargement du baseline et de son index.
+BOOT_SCRIPT = """
+import json, sys, time
+
+def rss_kb():
+    with open("/proc/self/status", encoding="utf-8") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+
+started = time.perf_counter()
+from django.core.wsgi import get_wsgi_application
+get_wsgi_application()
+from django.urls import resolve
+resolve("/")
+boot_seconds = time.perf_counter() - started
+boot_rss = rss_kb()
+heavy = sorted(name for name in ("pandas", "openpyxl", "numpy") if name in sys.modules)
+
+started = time.perf_counter()
+from analyses.baselines import get_baseline_results, get_target_species_path
+from core.baseline_index import get_baseline_index
+results = get_baseline_results(get_target_species_path())
+if results is not None:
+    get_baseline_index(results)
+print(json.dumps({
+    "boot_seconds": boot_seconds,
+    "boot_rss_kb": boot_rss,
+    "boot_modules": heavy,
+    "warm_seconds": time.perf_counter() - started,
+    "warm_rss_kb": rss_kb(),
+    "baseline": results is not None,
+    "pandas_after_warm": "pandas" in sys.modules,
+}))
+"""
+
+
+class Command(BaseCommand):
+    help = "Measure worker boot time and RSS (app load, then baseline warmup) in fresh interpreters"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters to start.")
+        parser.add_argument("--json", action="store_true", help="Print the individual runs as JSON.")
+
+    def handle(self, *args, **options):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get("DJANGO_SETTINGS_MODULE", "ornitho_site.settings"))
+        runs = []
+        for _ in range(max(options["runs"], 1)):
+            completed = subprocess.run(
+                [sys.executable, "-c", BOOT_SCRIPT],
+                cwd=settings.BASE_DIR,
+                env=env,
+                capture_output=True,
+                text=True,
+            )
+            if completed.returncode != 0:
+                raise CommandError(f"Boot measurement failed:\n{completed.stderr}")
+            runs.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+
+        if options["json"]:
+            self.stdout.write(json.dumps(runs, indent=2))
+            return
+
+        def median(key):
+            return statistics.median(run[key] for run in runs)
+
+        self.stdout.write(f"Runs: {len(runs)} (medians)")
+        self.stdout.write(f"App boot        {median('boot_seconds') * 1000:>8.0f} ms  RSS {median('boot_rss_kb') / 1024:>7.1f} MB")
+        self.stdout.write(f"Baseline warmup {median('warm_seconds') * 1000:>8.0f} ms  RSS {median('warm_rss_kb') / 1024:>7.1f} MB")
+        self.stdout.write(f"Heavy modules after boot: {', '.join(runs[0]['boot_modules']) or 'none'}")
+        if not runs[0]["baseline"]:
+            self.stdout.write(self.style.WARNING("No baseline available: warmup figures only cover the imports."))
+        if runs[0]["pandas_after_warm"]:
+            self.stdout.write(self.style.WARNING("pandas was imported while serving the baseline."))
@@ -1,33 +1,195 @@
+from concurrent.futures import ProcessPoolExecutor
 from django.core.management.base import BaseCommand
+from django.db import transaction
 
+from analyses.baselines import get_analysis_baseline_version, get_baseline_results, get_target_species_path
+from analyses.deltas import (
+    DELTA_V2,
+    build_compact_analysis_payload,
+    is_compact_analysis_payload,
+    payload_first_seen,
+    payload_species_names,
+)
+from analyses.jobs import enqueue_job
+from analyses.lifelists import extract_first_seen_from_path
 from analyses.models import Analyse
-from analyses.views import extract_species_to_remove_from_path
+
+import csv
+import django
+import multiprocessing
+import time
+
+
+def iter_analysis_batches(queryset, batch_size, start_after=0):
+    """
+    Parcourt ``queryset`` par lots de ``batch_size`` analyses, par id
+    croissant (pagination par clé : chaque lot est une requête bornée, les
+    écritures faites entre deux lots ne perturbent pas le parcours).
+    """
+    last_id = start_after
+    while True:
+        batch = list(queryset.filter(pk__gt=last_id).order_by("pk")[:batch_size])
+        if not batch:
+            return
+        yield batch
+        last_id = batch[-1].pk
+
+
+def parse_life_list(path):
+    """
+    ``(dates de première observation, None)``, ou ``(None, erreur)`` si la
+    life list est illisible :
+    un fichier en échec ne doit pas interrompre le lot (ni le pool).
+    """
+    try:
+        return extract_first_seen_from_path(path), None
+    except (OSError, UnicodeDecodeError, csv.Error) as exc:
+        return None, f"{type(exc).__name__}: {exc}"
 
 
 class Command(BaseCommand):
-    help = "Convert stored analysis results_json to compact species delta mode"
+    help = "Convert stored analysis results_json to compact species delta mode (bitmap over the served baseline)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Re-parse every life list, including analyses that are already compact.",
+        )
+        parser.add_argument(
+            "--background",
+            action="store_true",
+            help="Enqueue a bulk re-analysis job for `run_jobs` instead of running now.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Analyses read, parsed and written (one transaction) per batch.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Processes used to parse life list CSVs (1 parses in this process).",
+        )
+        parser.add_argument(
+            "--start-after",
+            type=int,
+            default=0,
+            help="Resume after this analysis id (the last id reported by an interrupted run).",
+        )
 
     def handle(self, *args, **options):
-        converted = 0
-        skipped = 0
-
-        for analyse in Analyse.objects.all().only("id", "life_list_file", "results_json"):
-            current = analyse.results_json or {}
-            if current.get("result_mode") == "species_delta_v1":
-                skipped += 1
-                continue
-
-            species_to_remove = extract_species_to_remove_from_path(analyse.life_list_file.path)
-            analyse.results_json = {
-                "result_mode": "species_delta_v1",
-                "species_to_remove": sorted(species_to_remove),
-                "lifelist_count": len(species_to_remove),
-            }
-            analyse.save(update_fields=["results_json"])
-            converted += 1
+        if options["background"]:
+            job = enqueue_job("reanalyse_all")
+            self.stdout.write(self.style.SUCCESS(f"Enqueued job #{job.id} ({job.status})."))
+            return
+
+        batch_size = max(options["batch_size"], 1)
+        workers = max(options["workers"], 1)
+        queryset = Analyse.objects.only(
+            "id", "life_list_file", "results_json", "baseline_version", "pin_baseline",
+        )
+        total = queryset.filter(pk__gt=options["start_after"]).count()
+
+        if workers == 1:
+            self._migrate(queryset, total, batch_size, options, map)
+            return
+
+        # Même pool que ``run_jobs`` : processus "spawn" initialisant Django.
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=django.setup,
+        ) as executor:
+            self._migrate(
+                queryset, total, batch_size, options,
+                lambda func, paths: executor.map(func, paths, chunksize=max(len(paths) // workers, 1)),
+            )
+
+    def _migrate(self, queryset, total, batch_size, options, parse_map):
+        force = options["force"]
+        versions = {}
+        counts = {"converted": 0, "upgraded": 0, "skipped": 0, "failed": 0}
+        processed = 0
+        last_committed = options["start_after"]
+        started = time.perf_counter()
+
+        def served_version(analyse):
+            # Une requête par version servie, pas par analyse.
+            key = analyse.baseline_version_id if analyse.pin_baseline else None
+            if key not in versions:
+                versions[key] = get_analysis_baseline_version(analyse)
+            return versions[key]
+
+        def fail(analyse, error):
+            counts["failed"] += 1
+            self.stderr.write(f"Analysis #{analyse.pk} skipped: {error}")
+
+        try:
+            for batch in iter_analysis_batches(queryset, batch_size, options["start_after"]):
+                pending = []
+                to_parse = {}
+                for analyse in batch:
+                    current = analyse.results_json or {}
+                    version = served_version(analyse)
+                    if (
+                        not force
+                        and current.get("result_mode") == DELTA_V2
+                        and version is not None
+                        and current.get("baseline_hash") == version.content_hash
+                    ):
+                        counts["skipped"] += 1
+                        continue
+
+                    # v1, ou v2 encodé sur une autre version : pas besoin de relire le fichier.
+                    species_to_remove = None
+                    first_seen = None
+                    if is_compact_analysis_payload(current) and not force:
+                        species_to_remove = payload_species_names(current)
+                        first_seen = payload_first_seen(current)
+                    if species_to_remove is None:
+                        if not analyse.life_list_file:
+                            fail(analyse, "no life list file")
+                            continue
+                        to_parse[analyse.pk] = analyse.life_list_file.path
+                    pending.append((analyse, version, species_to_remove, first_seen))
+
+                parsed = dict(zip(to_parse, parse_map(parse_life_list, list(to_parse.values()))))
+
+                updated = []
+                for analyse, version, species_to_remove, first_seen in pending:
+                    if species_to_remove is None:
+                        first_seen, error = parsed[analyse.pk]
+                        if error is not None:
+                            fail(analyse, error)
+                            continue
+                        species_to_remove = set(first_seen)
+                        counts["converted"] += 1
+                    else:
+                        counts["upgraded"] += 1
+                    baseline = get_baseline_results(get_target_species_path(), version=version)
+                    analyse.results_json = build_compact_analysis_payload(species_to_remove, version, baseline, first_seen)
+                    updated.append(analyse)
+
+                with transaction.atomic():
+                    Analyse.objects.bulk_update(updated, ["results_json"])
+                last_committed = batch[-1].pk
+
+                processed += len(batch)
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f"{processed}/{total} analyses ({processed / elapsed:.0f}/s), "
+                    f"last id #{last_committed}"
+                )
+        finally:
+            # Affiché aussi après une interruption : reprise par --start-after.
+            self.stdout.write(f"Last committed id: {last_committed} (resume with --start-after {last_committed})")
 
         self.stdout.write(
             self.style.SUCCESS(
-                f"Converted: {converted}, already compact: {skipped}"
+                f"Converted: {counts['converted']}, upgraded: {counts['upgraded']}, "
+                f"already compact: {counts['skipped']}, failed: {counts['failed']}"
             )
         )
@@ -0,0 +1,97 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from analyses.profiling import get_profile_dir, list_profiles
+
+import io
+import os
+import pstats
+
+
+def _collapsed_summary(path, top):
+    """
+    Fonctions les plus échantillonnées d'un profil ``.collapsed`` :
+    en propre (sommet de pile) et en inclusif (présentes dans la pile).
+    """
+    self_counts = {}
+    inclusive_counts = {}
+    total = 0
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            stack, _, count = line.rstrip("\n").rpartition(" ")
+            count = int(count)
+            frames = [frame.rsplit(":", 1)[0] for frame in stack.split(";")]
+            total += count
+            self_counts[frames[-1]] = self_counts.get(frames[-1], 0) + count
+            for frame in set(frames):
+                inclusive_counts[frame] = inclusive_counts.get(frame, 0) + count
+
+    lines = [f"{total} samples"]
+    for title, counts in (("self", self_counts), ("inclusive", inclusive_counts)):
+        lines.append(f"\nTop {top} ({title}):")
+        for frame, count in sorted(counts.items(), key=lambda item: -item[1])[:top]:
+            lines.append(f"  {100 * count / max(total, 1):6.1f}%  {count:>7}  {frame}")
+    return "\n".join(lines)
+
+
+class Command(BaseCommand):
+    help = "List the request profiles captured with ?profile=... and summarize one of them"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=20, help="Number of profiles listed (most recent first).")
+        parser.add_argument("--view", help="Only list profiles of this view name.")
+        parser.add_argument("--analysis", type=int, help="Only list profiles of this analysis id.")
+        parser.add_argument("--show", metavar="PROFILE_ID", help="Print the top functions of this profile.")
+        parser.add_argument("--top", type=int, default=25, help="Functions printed by --show.")
+        parser.add_argument(
+            "--sort",
+            default="cumulative",
+            choices=["cumulative", "tottime", "ncalls"],
+            help="pstats sort order for cProfile profiles.",
+        )
+
+    def handle(self, *args, **options):
+        profiles = list_profiles()
+
+        if options["show"]:
+            meta = next((p for p in profiles if p["id"] == options["show"]), None)
+            if meta is None:
+                raise CommandError(f"Unknown profile: {options['show']}")
+            self._show(meta, options["top"], options["sort"])
+            return
+
+        if options["view"]:
+            profiles = [p for p in profiles if p.get("view") == options["view"]]
+        if options["analysis"] is not None:
+            profiles = [p for p in profiles if p.get("analyse_id") == options["analysis"]]
+
+        if not profiles:
+            self.stdout.write(f"No matching profile in {get_profile_dir()}.")
+            return
+
+        for meta in profiles[:options["limit"]]:
+            self.stdout.write(
+                f"{meta['id']:<70} {meta['mode']:<8} {meta['status']:>4} "
+                f"{meta['duration_ms']:>10.1f} ms  {meta['method']} {meta['url']}"
+            )
+        if len(profiles) > options["limit"]:
+            self.stdout.write(f"... {len(profiles) - options['limit']} older profiles not shown (--limit).")
+
+    def _show(self, meta, top, sort):
+        for key in ("url", "view", "analyse_id", "user", "status", "duration_ms", "created", "mode"):
+            self.stdout.write(f"{key:<12} {meta.get(key)}")
+        self.stdout.write("")
+
+        path = os.path.join(get_profile_dir(), meta["file"])
+        if not os.path.exists(path):
+            raise CommandError(f"Profile data not found: {path}")
+
+        if meta["mode"] == "sample":
+            self.stdout.write(_collapsed_summary(path, top))
+            self.stdout.write(f"\nFlame graph: flamegraph.pl {path} > {meta['id']}.svg")
+            return
+
+        output = io.StringIO()
+        stats = pstats.Stats(path, stream=output)
+        stats.strip_dirs().sort_stats(sort).print_stats(top)
+        self.stdout.write(output.getvalue())
+        self.stdout.write(f"Full profile: python -m pstats {path}  (or snakeviz {path})")
@@ -0,0 +1,211 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError
+from django.urls import reverse
+from django.utils import timezone
+
+from analyses.baselines import get_baseline_results, get_target_species_path
+from analyses.loadtest import RssSampler, parse_mix, run_load, summarize_samples
+
+import glob
+import http.client
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway SQLite database, start a local gunicorn on it and measure "
+        "latency percentiles, throughput and worker RSS under concurrent load"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=20, help="Seeded users (one session each).")
+        parser.add_argument("--analyses", type=int, default=200, help="Seeded compact analyses.")
+        parser.add_argument("--concurrency", type=int, default=8, help="Concurrent virtual clients.")
+        parser.add_argument("--duration", type=float, default=30.0, help="Seconds of measured load.")
+        parser.add_argument("--requests", type=int, help="Stop after this many requests instead of --duration.")
+        parser.add_argument("--warmup", type=int, help="Unmeasured requests sent first (default: 4 per worker).")
+        parser.add_argument("--mix", default="", help='Request weights, e.g. "section_summary=10,upload=1".')
+        parser.add_argument("--workers", type=int, default=2, help="gunicorn worker processes.")
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument(
+            "--gunicorn-arg",
+            action="append",
+            default=[],
+            dest="gunicorn_args",
+            help="Extra gunicorn argument (repeatable), e.g. --gunicorn-arg=--preload.",
+        )
+        parser.add_argument(
+            "--life-lists-dir",
+            default=os.path.join(settings.MEDIA_ROOT, "life_lists"),
+            help="Directory of eBird life list CSVs used to seed analyses and uploads.",
+        )
+        parser.add_argument("--workdir", help="Keep the database and server files in this directory.")
+        parser.add_argument("--timeout", type=float, default=120.0, help="Seconds to wait for gunicorn to answer.")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--output", help="Write the JSON report to this file.")
+
+    def handle(self, *args, **options):
+        try:
+            mix = parse_mix(options["mix"])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        life_lists = sorted(glob.glob(os.path.join(options["life_lists_dir"], "*.csv")))
+        if not life_lists:
+            raise CommandError(f"No life list CSV found in {options['life_lists_dir']}.")
+
+        workdir = options["workdir"] or tempfile.mkdtemp(prefix="ornitho_load_")
+        os.makedirs(workdir, exist_ok=True)
+        try:
+            report = self._run(options, mix, life_lists, workdir)
+        finally:
+            if not options["workdir"]:
+                shutil.rmtree(workdir, ignore_errors=True)
+
+        self._print_report(report)
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Report written to {options['output']}"))
+
+    def _run(self, options, mix, life_lists, workdir):
+        media_root = os.path.join(workdir, "media")
+        os.makedirs(os.path.join(media_root, "life_lists"), exist_ok=True)
+        for path in life_lists:
+            shutil.copy(path, os.path.join(media_root, "life_lists"))
+
+        env = dict(
+            os.environ,
+            DJANGO_SETTINGS_MODULE=os.environ.get("DJANGO_SETTINGS_MODULE", "ornitho_site.settings"),
+            DJANGO_SQLITE_PATH=os.path.join(workdir, "load_test.sqlite3"),
+            DJANGO_MEDIA_ROOT=media_root,
+            DJANGO_STATIC_ROOT=os.path.join(workdir, "static"),
+            DJANGO_DEBUG="False",
+        )
+
+        # Le baseline actif est copié tel quel pour éviter une reconstruction.
+        seed_args = []
+        try:
+            baseline = get_baseline_results(get_target_species_path())
+        except DatabaseError:
+            baseline = None
+        if baseline is not None:
+            baseline_path = os.path.join(workdir, "baseline.json")
+            with open(baseline_path, "w", encoding="utf-8") as f:
+                json.dump(baseline, f, ensure_ascii=False)
+            seed_args += ["--baseline-json", baseline_path]
+
+        manage = [sys.executable, os.path.join(settings.BASE_DIR, "manage.py")]
+        manifest_path = os.path.join(workdir, "manifest.json")
+        self.stdout.write(f"Seeding {workdir} ...")
+        for command in (
+            ["migrate", "--noinput"],
+            ["collectstatic", "--noinput"],
+            ["seed_load_test", "--users", str(options["users"]), "--analyses", str(options["analyses"]),
+             "--manifest", manifest_path, "--seed", str(options["seed"])]
+            + [arg for path in life_lists for arg in ("--life-list", path)] + seed_args,
+        ):
+            subprocess.run(manage + command, env=env, cwd=settings.BASE_DIR, check=True, stdout=subprocess.DEVNULL)
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+
+        host, port = "127.0.0.1", options["port"]
+        server = subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", "ornitho_site.wsgi",
+             "--bind", f"{host}:{port}", "--workers", str(options["workers"])]
+            + options["gunicorn_args"],
+            env=env,
+            cwd=settings.BASE_DIR,
+            stdout=subprocess.DEVNULL,
+            stderr=open(os.path.join(workdir, "gunicorn.log"), "w"),
+        )
+        try:
+            boot_seconds = self._wait_until_ready(server, host, port, options["timeout"])
+            sampler = RssSampler(server.pid)
+            sampler.sample()
+            boot_rss = sampler.report()
+            sampler.start()
+
+            warmup = options["warmup"] if options["warmup"] is not None else 4 * options["workers"]
+            if warmup:
+                run_load(host, port, manifest, {"baseline_section_summary": 1, "section_summary": 1},
+                         concurrency=options["workers"], total_requests=warmup, seed=options["seed"])
+
+            self.stdout.write(
+                f"Running {options['concurrency']} client(s) for "
+                + (f"{options['requests']} request(s)" if options["requests"] else f"{options['duration']:g}s")
+                + " ..."
+            )
+            samples, elapsed = run_load(
+                host, port, manifest, mix,
+                concurrency=options["concurrency"],
+                duration=None if options["requests"] else options["duration"],
+                total_requests=options["requests"],
+                upload_files=life_lists,
+                seed=options["seed"],
+            )
+            sampler.stop()
+        finally:
+            server.terminate()
+            try:
+                server.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                server.kill()
+
+        return {
+            "created": timezone.now().isoformat(),
+            "options": {
+                key: options[key]
+                for key in ("users", "analyses", "concurrency", "duration", "requests", "workers", "gunicorn_args", "seed")
+            },
+            "mix": mix,
+            "boot_seconds": round(boot_seconds, 2),
+            "boot_rss": boot_rss,
+            "rss": sampler.report(),
+            **summarize_samples(samples, elapsed),
+        }
+
+    def _wait_until_ready(self, server, host, port, timeout):
+        started = time.perf_counter()
+        path = reverse("analyses:baseline_section_summary_json")
+        while time.perf_counter() - started < timeout:
+            if server.poll() is not None:
+                raise CommandError("gunicorn exited during start-up (see gunicorn.log in --workdir).")
+            try:
+                connection = http.client.HTTPConnection(host, port, timeout=timeout)
+                connection.request("GET", path)
+                status = connection.getresponse().status
+                connection.close()
+                if status == 200:
+                    return time.perf_counter() - started
+            except OSError:
+                pass
+            time.sleep(0.2)
+        raise CommandError(f"gunicorn did not answer within {timeout:g}s.")
+
+    def _print_report(self, report):
+        total = report["total"]
+        self.stdout.write(
+            f"\n{total['count']} request(s) in {report['elapsed_s']:.1f}s, "
+            f"{total['throughput_rps']} req/s, {total['errors']} error(s), boot {report['boot_seconds']}s"
+        )
+        header = f"{'request':<36} {'count':>6} {'err':>4} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+        self.stdout.write(header)
+        for kind, stats in list(report["by_kind"].items()) + [("total", total)]:
+            self.stdout.write(
+                f"{kind:<36} {stats['count']:>6} {stats['errors']:>4} "
+                f"{stats['p50_ms'] or 0:>9.1f} {stats['p95_ms'] or 0:>9.1f} {stats['p99_ms'] or 0:>9.1f}"
+            )
+        for pid, rss in report["rss"].items():
+            boot = report["boot_rss"].get(pid, {}).get("rss_mb")
+            self.stdout.write(
+                f"{rss['role']} {pid}: boot {boot if boot is not None else '-'} MB, "
+                f"end {rss['rss_mb']} MB, peak {rss['peak_rss_mb']} MB"
+            )
@@ -0,0 +1,108 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from analyses.baselines import get_baseline_results, get_target_species_path
+from analyses.loadtest import rss_kb
+from analyses.lifelists import extract_species_to_remove_from_path
+from analyses.views import build_results_from_species_to_remove
+from core.baseline_index import get_baseline_index
+from core.memory import structure_breakdown
+from core.serving import compute_summary_from_baseline_delta
+
+import gc
+import json
+import os
+import time
+import tracemalloc
+
+
+def _mb(n_bytes):
+    return n_bytes / (1024 * 1024)
+
+
+def _measure(func, repeat):
+    """
+    Meilleur temps (ms) sur ``repeat`` appels, puis pic et reste alloués
+    (octets) d'un appel supplémentaire sous tracemalloc.
+    """
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = func()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return {"best_ms": round(min(timings), 2), "peak_bytes": peak, "retained_bytes": current}
+
+
+class Command(BaseCommand):
+    help = "Break down the memory held by the active baseline and its indexes, optionally measuring a life list request"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--life-list", help="eBird life list CSV used to measure the per-request allocations.")
+        parser.add_argument("--repeat", type=int, default=3, help="Timed runs per measured function.")
+        parser.add_argument("--json", action="store_true", help="Print the report as JSON.")
+
+    def handle(self, *args, **options):
+        pid = os.getpid()
+        report = {"rss_kb_before_load": rss_kb(pid)}
+
+        results = get_baseline_results(get_target_species_path())
+        if results is None:
+            raise CommandError("Baseline unavailable. Run `python manage.py rebuild_baseline` first.")
+        report["rss_kb_after_load"] = rss_kb(pid)
+        index = get_baseline_index(results)
+        report["rss_kb_after_index"] = rss_kb(pid)
+
+        # Index après le baseline : les chaînes partagées restent imputées au baseline.
+        structures = {f"baseline.{key}": value for key, value in results.items()}
+        structures.update({f"index.{key}": value for key, value in index.items()})
+        report["structures"] = [
+            {"name": name, "bytes": size}
+            for name, size in structure_breakdown(structures)
+        ]
+
+        if options["life_list"]:
+            species_to_remove = extract_species_to_remove_from_path(options["life_list"])
+            repeat = max(options["repeat"], 1)
+            report["requests"] = {
+                "build_results_from_species_to_remove": _measure(
+                    lambda: build_results_from_species_to_remove(species_to_remove, results), repeat,
+                ),
+                "compute_summary_from_baseline_delta": _measure(
+                    lambda: compute_summary_from_baseline_delta(results, species_to_remove), repeat,
+                ),
+            }
+            report["lifelist_count"] = len(species_to_remove)
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        for label, key in (("before load", "rss_kb_before_load"),
+                           ("after baseline", "rss_kb_after_load"),
+                           ("after index", "rss_kb_after_index")):
+            value = report[key]
+            self.stdout.write(f"RSS {label:<15} {value / 1024:>10.1f} MB" if value else f"RSS {label:<15} n/a")
+
+        total = sum(row["bytes"] for row in report["structures"])
+        self.stdout.write(f"\n{'Structure':<40} {'MB':>10} {'share':>7}")
+        for row in report["structures"]:
+            self.stdout.write(
+                f"{row['name']:<40} {_mb(row['bytes']):>10.2f} {100 * row['bytes'] / max(total, 1):>6.1f}%"
+            )
+        self.stdout.write(f"{'total':<40} {_mb(total):>10.2f}")
+
+        if "requests" in report:
+            self.stdout.write(f"\nLife list: {report['lifelist_count']} species")
+            for name, stats in report["requests"].items():
+                self.stdout.write(
+                    f"{name:<40} {stats['best_ms']:>9.1f} ms  peak {_mb(stats['peak_bytes']):>8.1f} MB"
+                    f"  retained {_mb(stats['retained_bytes']):>8.1f} MB"
+                )
@@ -0,0 +1,57 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from analyses.precompute import recent_analysis_ids, run_precompute
+
+import time
+
+
+class Command(BaseCommand):
+    help = "Precompute and store result summaries of recently accessed analyses for their served baseline"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=None,
+            help="Only analyses accessed in the last N days (default: PRECOMPUTE_RECENT_DAYS).",
+        )
+        parser.add_argument("--limit", type=int, default=None, help="At most N analyses, most recent first.")
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="Worker processes (default: PRECOMPUTE_WORKERS; 1 runs in this process).",
+        )
+        parser.add_argument(
+            "--duty-cycle",
+            type=float,
+            default=None,
+            help="Fraction of time spent computing, the rest sleeping (default: PRECOMPUTE_DUTY_CYCLE).",
+        )
+
+    def handle(self, *args, **options):
+        workers = options["workers"] or getattr(settings, "PRECOMPUTE_WORKERS", 1)
+        analyse_ids = recent_analysis_ids(options["days"], options["limit"])
+        self.stdout.write(f"Precomputing {len(analyse_ids)} analyses with {workers} worker(s).")
+
+        counts = {}
+        compute_seconds = 0.0
+        started = time.perf_counter()
+        for done, (analyse_id, status, elapsed) in enumerate(
+            run_precompute(analyse_ids, workers=workers, duty_cycle=options["duty_cycle"]),
+            start=1,
+        ):
+            kind = status.split(":", 1)[0]
+            counts[kind] = counts.get(kind, 0) + 1
+            compute_seconds += elapsed
+            if kind == "failed":
+                self.stderr.write(f"Analysis #{analyse_id} {status}")
+            if done % 50 == 0:
+                self.stdout.write(f"{done}/{len(analyse_ids)} analyses")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Stored: {counts.get('stored', 0)}, skipped: {counts.get('skipped', 0)}, "
+            f"missing: {counts.get('missing', 0)}, failed: {counts.get('failed', 0)} "
+            f"({compute_seconds:.1f}s computing, {time.perf_counter() - started:.1f}s elapsed)"
+        ))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from analyses.baselines import find_baseline_version, promote_baseline_version
+
+
+class Command(BaseCommand):
+    help = "Make a published baseline version the active one"
+
+    def add_arguments(self, parser):
+        parser.add_argument("content_hash", help="Content hash (or unique prefix) of the version to promote.")
+
+    def handle(self, *args, **options):
+        version = find_baseline_version(options["content_hash"])
+        if version is None:
+            raise CommandError(f"No unique baseline version matches {options['content_hash']!r}.")
+
+        promote_baseline_version(version)
+        self.stdout.write(self.style.SUCCESS(f"Baseline version {version.content_hash[:12]} is now active."))
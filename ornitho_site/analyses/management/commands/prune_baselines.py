@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from analyses.baselines import prune_baseline_versions
+
+
+class Command(BaseCommand):
+    help = "Delete baseline versions that are neither active nor referenced by an analysis"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Only list the versions that would be deleted.")
+
+    def handle(self, *args, **options):
+        pruned = prune_baseline_versions(dry_run=options["dry_run"])
+        for content_hash in pruned:
+            self.stdout.write(content_hash)
+
+        verb = "Would delete" if options["dry_run"] else "Deleted"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {len(pruned)} baseline version(s)."))
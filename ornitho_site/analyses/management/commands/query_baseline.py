@@ -0,0 +1,88 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from analyses.baseline_tables import (
+    countries_of_species,
+    country_totals,
+    has_baseline_tables,
+    species_in_country,
+    store_baseline_tables,
+)
+from analyses.baselines import find_baseline_version, get_active_baseline_version, load_baseline_version
+from analyses.models import BaselineVersion
+from core.baseline_index import SERVING_THRESHOLD
+
+
+class Command(BaseCommand):
+    help = "Query the relational baseline tables (per-country totals, species of a country, countries of a species)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--baseline", dest="baseline_hash", help="Hash prefix of the baseline version (default: active version).")
+        parser.add_argument("--totals", action="store_true", help="Species count per country.")
+        parser.add_argument("--country", help="List the species of this country (baseline column name).")
+        parser.add_argument("--species", help="List the countries of this species.")
+        parser.add_argument("--threshold", type=float, default=None, help="Value threshold for --totals and --country.")
+        parser.add_argument("--limit", type=int, default=50, help="Rows printed by --country (0 = all).")
+        parser.add_argument(
+            "--backfill",
+            action="store_true",
+            help="Populate the tables of every version that does not have them yet.",
+        )
+
+    def handle(self, *args, **options):
+        if options["backfill"]:
+            self._backfill()
+            return
+
+        if options["baseline_hash"]:
+            version = find_baseline_version(options["baseline_hash"])
+            if version is None:
+                raise CommandError(f"No single baseline version matches {options['baseline_hash']!r}.")
+        else:
+            version = get_active_baseline_version()
+            if version is None:
+                raise CommandError("No active baseline version.")
+        if not has_baseline_tables(version):
+            raise CommandError(
+                f"Version {version.content_hash[:12]} has no relational tables; run with --backfill first."
+            )
+
+        if options["totals"]:
+            threshold = SERVING_THRESHOLD if options["threshold"] is None else options["threshold"]
+            self.stdout.write(f"{'Country':<35} {'Continent':<20} {'Present':>8} {'Above':>8}")
+            for row in country_totals(version, threshold):
+                self.stdout.write(f"{row['name']:<35} {row['continent']:<20} {row['present']:>8} {row['above']:>8}")
+
+        if options["country"]:
+            threshold = 0.0 if options["threshold"] is None else options["threshold"]
+            rows = species_in_country(version, options["country"], threshold, limit=options["limit"] or None)
+            if not rows:
+                self.stdout.write(f"No species above {threshold} in {options['country']!r}.")
+            for name, value, rank in rows:
+                self.stdout.write(f"{rank:>6}  {value:>12.6f}  {name}")
+
+        if options["species"]:
+            rows = countries_of_species(version, options["species"])
+            if not rows:
+                self.stdout.write(f"Species {options['species']!r} not found in any country.")
+            for country, continent, value in rows:
+                self.stdout.write(f"{value:>12.6f}  {country} ({continent})")
+
+        if not (options["totals"] or options["country"] or options["species"]):
+            self.stdout.write("Nothing to do: pass --totals, --country, --species or --backfill.")
+
+    def _backfill(self):
+        filled = 0
+        for version in BaselineVersion.objects.defer("baseline_json").order_by("pk"):
+            if has_baseline_tables(version):
+                continue
+            results = load_baseline_version(version)
+            if results is None:
+                self.stdout.write(self.style.WARNING(f"Version {version.content_hash[:12]}: no content, skipped."))
+                continue
+            counts = store_baseline_tables(version, results)
+            filled += 1
+            self.stdout.write(
+                f"Version {version.content_hash[:12]}: {counts['countries']} countries, "
+                f"{counts['species']} species, {counts['presences']} presences."
+            )
+        self.stdout.write(self.style.SUCCESS(f"{filled} version(s) backfilled."))
@@ -1,28 +1,98 @@
 from django.conf import settings
+from django.core.management import call_command
 from django.core.management.base import BaseCommand
 
-from analyses.models import BaselineAnalysis
-from analyses.views import apply_country_aliases, save_baseline_to_file
-from core.world_blanks import compute_baseline_results
-
-import os
+from analyses.baseline_tables import has_baseline_tables, store_baseline_tables
+from analyses.baselines import (
+    build_baseline_version,
+    get_active_baseline_version,
+    get_target_species_path,
+    load_baseline_version,
+    promote_baseline_version,
+)
+from analyses.jobs import enqueue_job
 
 
 class Command(BaseCommand):
     help = "Rebuild the global baseline analysis from Especes_cibles_monde_copie.xlsx"
 
-    def handle(self, *args, **options):
-        target_species_path = os.path.join(
-            settings.BASE_DIR,
-            "core",
-            "Especes_cibles_monde_copie.xlsx",
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--no-promote",
+            action="store_true",
+            help="Publish the new baseline version without making it the active one.",
+        )
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Recompute every country instead of only the column pairs changed since the active version.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="Number of processes used to compute the baseline (default: BASELINE_BUILD_WORKERS).",
+        )
+        parser.add_argument(
+            "--precompute",
+            action="store_true",
+            default=None,
+            help="After promotion, precompute summaries of recently accessed analyses "
+                 "(default: BASELINE_PRECOMPUTE_AFTER_REBUILD).",
         )
+        parser.add_argument(
+            "--background",
+            action="store_true",
+            help="Enqueue the rebuild for `run_jobs` instead of running it now.",
+        )
+
+    def handle(self, *args, **options):
+        if options["background"]:
+            job = enqueue_job("rebuild_baseline", {
+                "no_promote": options["no_promote"],
+                "full": options["full"],
+                "workers": options["workers"],
+                "precompute": options["precompute"],
+            })
+            self.stdout.write(self.style.SUCCESS(f"Enqueued job #{job.id} ({job.status})."))
+            return
 
-        baseline, _ = BaselineAnalysis.objects.get_or_create(name="world_baseline")
-        baseline.baseline_json = apply_country_aliases(
-            compute_baseline_results(target_species_path)
+        previous = get_active_baseline_version()
+        version, changed_countries = build_baseline_version(
+            get_target_species_path(),
+            incremental=not options["full"],
+            workers=options["workers"],
         )
-        baseline.save(update_fields=["baseline_json"])
-        save_baseline_to_file(baseline.baseline_json)
+        if previous is not None and not options["full"]:
+            self.stdout.write(f"Recomputed {len(changed_countries)} changed country column(s).")
+
+        promoted = False
+        if previous is not None and previous.pk == version.pk:
+            self.stdout.write(self.style.SUCCESS(
+                f"Baseline unchanged, version {version.content_hash[:12]} is already active."
+            ))
+        elif options["no_promote"]:
+            self.stdout.write(self.style.SUCCESS(
+                f"Baseline version {version.content_hash[:12]} published (not promoted)."
+            ))
+        else:
+            promote_baseline_version(version)
+            self.stdout.write(self.style.SUCCESS(
+                f"Baseline rebuilt successfully, version {version.content_hash[:12]} is now active (DB + file)."
+            ))
+            promoted = True
+
+        # Tables relationnelles remplies après la promotion : le nouveau
+        # baseline est servi sans attendre les insertions.
+        if not has_baseline_tables(version):
+            counts = store_baseline_tables(version, load_baseline_version(version))
+            self.stdout.write(
+                f"Baseline tables stored: {counts['countries']} countries, "
+                f"{counts['species']} species, {counts['presences']} presences."
+            )
 
-        self.stdout.write(self.style.SUCCESS("Baseline rebuilt successfully (DB + file)."))
+        precompute = options["precompute"]
+        if precompute is None:
+            precompute = getattr(settings, "BASELINE_PRECOMPUTE_AFTER_REBUILD", False)
+        if promoted and precompute:
+            call_command("precompute_summaries", stdout=self.stdout, stderr=self.stderr)
@@ -0,0 +1,217 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from analyses.baselines import apply_country_aliases
+from analyses.lifelists import (
+    extract_species_to_remove_from_file,
+    extract_species_to_remove_from_path,
+)
+from core import serving, world_blanks
+from core.regions import LEVELS, build_region_index, region_records
+from core.synthetic import (
+    make_synthetic_dv,
+    make_synthetic_life_list_csv,
+    make_synthetic_region_targets,
+    synthetic_species_names,
+)
+from core.world_matrix import compile_world_matrix, compute_results_from_compiled
+
+import io
+import json
+import os
+import platform
+import statistics
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+
+DEFAULT_SIZES = "50x2000,100x5000,200x11000"
+DEFAULT_LIFE_LIST_ROWS = "500,5000"
+
+
+def _parse_sizes(raw):
+    sizes = []
+    for item in raw.split(","):
+        countries, species = item.lower().split("x")
+        sizes.append((int(countries), int(species)))
+    return sizes
+
+
+def _time_call(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+class Command(BaseCommand):
+    help = "Time the baseline and life list hot paths on synthetic data and store the results as JSON"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            default=DEFAULT_SIZES,
+            help=f"Comma-separated COUNTRIESxSPECIES target matrices (default: {DEFAULT_SIZES}).",
+        )
+        parser.add_argument(
+            "--life-list-rows",
+            default=DEFAULT_LIFE_LIST_ROWS,
+            help=f"Comma-separated life list sizes (default: {DEFAULT_LIFE_LIST_ROWS}).",
+        )
+        parser.add_argument("--density", type=float, default=0.06, help="Share of species present per country.")
+        parser.add_argument("--continents", type=int, default=10)
+        parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement.")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--only", default="", help="Comma-separated benchmark names to run (default: all).")
+        parser.add_argument("--excel", action="store_true", help="Also time the functions that read the Excel workbook.")
+        parser.add_argument("--output", help="JSON file to write (default: BENCHMARK_OUTPUT_DIR/benchmark_<timestamp>.json).")
+        parser.add_argument("--compare", help="Previous benchmark JSON; fail if a benchmark got slower than --max-regression.")
+        parser.add_argument("--max-regression", type=float, default=1.25, help="Allowed best-time ratio against --compare.")
+
+    def handle(self, *args, **options):
+        repeat = max(options["repeat"], 1)
+        only = {name for name in options["only"].split(",") if name}
+        life_list_sizes = [int(rows) for rows in options["life_list_rows"].split(",") if rows]
+        results = []
+
+        def record(name, params, func):
+            if only and name not in only:
+                return
+            timings = _time_call(func, repeat)
+            entry = {
+                "name": name,
+                **params,
+                "best_ms": round(min(timings), 3),
+                "mean_ms": round(statistics.mean(timings), 3),
+                "runs": repeat,
+            }
+            results.append(entry)
+            label = ", ".join(f"{key}={value}" for key, value in params.items())
+            self.stdout.write(f"{name:<40} {label:<45} {entry['best_ms']:>10.1f} ms")
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for n_countries, n_species in _parse_sizes(options["sizes"]):
+                dv_df = make_synthetic_dv(
+                    n_countries, n_species,
+                    density=options["density"],
+                    n_continents=options["continents"],
+                    seed=options["seed"],
+                )
+                matrix = {"countries": n_countries, "species": n_species}
+
+                # --- Construction du baseline ---
+                record("compute_liste_blanks_world_classified", matrix,
+                       lambda: world_blanks.compute_liste_blanks_world_classified(dv_df))
+                record("compute_liste_pays_with_nb_coches", matrix,
+                       lambda: world_blanks.compute_liste_pays_with_nb_coches(dv_df))
+                record("compute_blancks_important_by_countries", matrix,
+                       lambda: world_blanks.compute_blancks_important_by_countries(dv_df))
+                record("compute_continents_species_numbers", matrix,
+                       lambda: world_blanks.compute_continents_species_numbers(dv_df))
+                record("compute_results_from_dv", matrix,
+                       lambda: world_blanks.compute_results_from_dv(dv_df))
+                record("compile_world_matrix", matrix, lambda: compile_world_matrix(dv_df))
+                compiled = compile_world_matrix(dv_df)
+                record("compute_results_from_compiled", matrix, lambda: compute_results_from_compiled(compiled))
+
+                target_path = None
+                if options["excel"]:
+                    target_path = os.path.join(tmp_dir, f"targets_{n_countries}x{n_species}.xlsx")
+                    dv_df.to_excel(target_path, header=False, index=False)
+                    record("build_baseline_target_species", matrix,
+                           lambda: world_blanks.build_baseline_target_species(target_path))
+                    record("compute_baseline_results", matrix,
+                           lambda: world_blanks.compute_baseline_results(target_path))
+
+                # --- Service d'une life list ---
+                baseline_results = apply_country_aliases(compute_results_from_compiled(compiled))
+                species_names = synthetic_species_names(n_species)
+                # ~10 régions par pays.
+                region_rows = make_synthetic_region_targets(baseline_results, seed=options["seed"])
+                record("build_region_index", matrix, lambda: build_region_index(baseline_results, region_rows))
+                region_index = build_region_index(baseline_results, region_rows)
+                for rows in life_list_sizes:
+                    params = {**matrix, "life_list_rows": rows}
+                    csv_bytes = make_synthetic_life_list_csv(rows, species_names, seed=options["seed"])
+                    csv_path = os.path.join(tmp_dir, f"life_list_{n_species}_{rows}.csv")
+                    with open(csv_path, "wb") as f:
+                        f.write(csv_bytes)
+                    species_to_remove = extract_species_to_remove_from_path(csv_path)
+
+                    record("extract_species_to_remove_from_file", params,
+                           lambda: extract_species_to_remove_from_file(io.BytesIO(csv_bytes)))
+                    record("extract_species_to_remove_from_path", params,
+                           lambda: extract_species_to_remove_from_path(csv_path))
+                    record("filter_upload_results", params,
+                           lambda: serving.filter_upload_results(baseline_results, species_to_remove))
+                    record("compute_summary_from_baseline_delta", params,
+                           lambda: serving.compute_summary_from_baseline_delta(baseline_results, species_to_remove))
+                    for level in LEVELS:
+                        record(f"region_records_{level}", params,
+                               lambda: region_records(baseline_results, region_index, species_to_remove, level))
+                    if target_path:
+                        record("build_user_target_species", params,
+                               lambda: world_blanks.build_user_target_species(csv_path, target_path))
+                        record("analyser_world_blanks", params,
+                               lambda: world_blanks.analyser_world_blanks(csv_path, target_path))
+
+        report = {
+            "created": timezone.now().isoformat(),
+            "environment": {
+                "python": platform.python_version(),
+                "numpy": np.__version__,
+                "pandas": pd.__version__,
+                "machine": platform.machine(),
+                "cpu_count": os.cpu_count(),
+            },
+            "options": {
+                key: options[key]
+                for key in ("sizes", "life_list_rows", "density", "continents", "repeat", "seed", "excel")
+            },
+            "results": results,
+        }
+
+        output = options["output"]
+        if not output:
+            output_dir = getattr(settings, "BENCHMARK_OUTPUT_DIR", os.path.join(settings.BASE_DIR, "benchmarks"))
+            os.makedirs(output_dir, exist_ok=True)
+            output = os.path.join(output_dir, f"benchmark_{timezone.now():%Y%m%d_%H%M%S}.json")
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Results written to {output}"))
+
+        if options["compare"]:
+            self._compare(options["compare"], results, options["max_regression"])
+
+    def _compare(self, previous_path, results, max_regression):
+        with open(previous_path, encoding="utf-8") as f:
+            previous = json.load(f)
+
+        def key(entry):
+            return tuple(
+                (field, entry.get(field))
+                for field in ("name", "countries", "species", "life_list_rows")
+            )
+
+        previous_by_key = {key(entry): entry for entry in previous.get("results", [])}
+        regressions = []
+        for entry in results:
+            before = previous_by_key.get(key(entry))
+            if not before or not before.get("best_ms"):
+                continue
+            ratio = entry["best_ms"] / before["best_ms"]
+            if ratio > max_regression:
+                regressions.append(
+                    f"{entry['name']} {dict(key(entry)[1:])}: "
+                    f"{before['best_ms']:.1f} ms -> {entry['best_ms']:.1f} ms (x{ratio:.2f})"
+                )
+
+        if regressions:
+            raise CommandError("Benchmark regressions:\n" + "\n".join(regressions))
+        self.stdout.write(self.style.SUCCESS(f"No regression above x{max_regression} against {previous_path}."))
@@ -0,0 +1,69 @@
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from analyses.jobs import claim_next_job, heartbeat_jobs, mark_job_failed, requeue_interrupted_jobs, run_job
+from analyses.models import Job
+
+import django
+import multiprocessing
+import time
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs (baseline rebuilds, bulk re-analysis, large uploads)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=2, help="Number of worker processes.")
+        parser.add_argument("--poll-interval", type=float, default=2.0, help="Seconds between queue polls when idle.")
+        parser.add_argument("--once", action="store_true", help="Exit once the queue is drained.")
+
+    def handle(self, *args, **options):
+        workers = max(options["workers"], 1)
+        requeued = requeue_interrupted_jobs()
+        if requeued:
+            self.stdout.write(f"Requeued {requeued} interrupted job(s).")
+
+        running = {}
+        # "spawn" : chaque processus du pool initialise Django avec ses propres
+        # connexions plutôt que d'hériter de celles du runner.
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=django.setup,
+        ) as executor:
+            try:
+                while True:
+                    # Bail des jobs en cours ; jobs abandonnés par un autre runner.
+                    heartbeat_jobs([job.id for job in running.values()])
+                    requeued = requeue_interrupted_jobs()
+                    if requeued:
+                        self.stdout.write(f"Requeued {requeued} interrupted job(s).")
+
+                    while len(running) < workers:
+                        job = claim_next_job()
+                        if job is None:
+                            break
+                        self.stdout.write(f"Starting {job}")
+                        running[executor.submit(run_job, job.id)] = job
+
+                    if not running:
+                        if options["once"]:
+                            break
+                        connections.close_all()
+                        time.sleep(options["poll_interval"])
+                        continue
+
+                    done, _ = wait(running, timeout=options["poll_interval"], return_when=FIRST_COMPLETED)
+                    for future in done:
+                        job = running.pop(future)
+                        try:
+                            status = future.result()
+                        except Exception as exc:
+                            mark_job_failed(Job.objects.get(pk=job.id), repr(exc))
+                            self.stderr.write(f"Job #{job.id} crashed its worker: {exc}")
+                            continue
+                        style = self.style.SUCCESS if status == "done" else self.style.ERROR
+                        self.stdout.write(style(f"Job #{job.id} ({job.kind}) {status}"))
+            except KeyboardInterrupt:
+                self.stdout.write("Interrupted, waiting for running jobs to finish...")
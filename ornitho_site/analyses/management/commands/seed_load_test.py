@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from analyses.loadtest import seed_load_test_db
+
+import json
+
+
+class Command(BaseCommand):
+    help = "Seed the current database with load-test users, sessions and compact analyses (used by load_test)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=20)
+        parser.add_argument("--analyses", type=int, default=200)
+        parser.add_argument("--life-list", action="append", default=[], dest="life_lists", help="Life list CSV (repeatable).")
+        parser.add_argument("--baseline-json", help="Baseline results JSON to publish and promote instead of rebuilding.")
+        parser.add_argument("--manifest", required=True, help="Where to write the JSON manifest for the load generator.")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        manifest = seed_load_test_db(
+            options["users"],
+            options["analyses"],
+            options["life_lists"],
+            baseline_json_path=options["baseline_json"],
+            seed=options["seed"],
+        )
+        with open(options["manifest"], "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {len(manifest['users'])} user(s) and {options['analyses']} analyse(s)."
+        ))
@@ -0,0 +1,125 @@
+"""
+Middlewares de l'application analyses.
+"""
+
+from django.conf import settings
+from django.db import connections
+
+from analyses.profiling import PROFILE_MODES, run_profiled, save_profile
+from core.memory import PEAK_ALLOC_HISTOGRAMS
+from core.timing import (
+    STAGE_HISTOGRAMS,
+    add_stage_time,
+    server_timing_header,
+    start_collection,
+    stop_collection,
+)
+from contextlib import ExitStack
+import random
+import time
+import tracemalloc
+
+
+def _time_query(execute, sql, params, many, context):
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        add_stage_time("db", time.perf_counter() - started)
+
+
+class StageTimingMiddleware:
+    """
+    Sur une fraction ``STAGE_TIMING_SAMPLE_RATE`` des requêtes, mesure les
+    étapes nommées (``core.timing.stage``) et le temps passé en base, les
+    renvoie dans l'en-tête ``Server-Timing`` et les ajoute aux histogrammes
+    exposés par ``metrics_view``. Hors échantillon, la requête passe sans
+    autre coût qu'un tirage aléatoire.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = float(getattr(settings, "STAGE_TIMING_SAMPLE_RATE", 0.0))
+
+    def __call__(self, request):
+        if self.sample_rate <= 0 or (self.sample_rate < 1 and random.random() >= self.sample_rate):
+            return self.get_response(request)
+
+        token = start_collection()
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(_time_query))
+                response = self.get_response(request)
+        finally:
+            timings = stop_collection(token)
+        timings["total"] = time.perf_counter() - started
+
+        match = getattr(request, "resolver_match", None)
+        view_name = match.view_name if match else "unresolved"
+        STAGE_HISTOGRAMS.observe_all(view_name, timings)
+        response["Server-Timing"] = server_timing_header(timings)
+        return response
+
+
+class PeakAllocationMiddleware:
+    """
+    Sur une fraction ``TRACEMALLOC_SAMPLE_RATE`` des requêtes, trace les
+    allocations Python (tracemalloc) le temps de la requête, renvoie le pic
+    en octets dans l'en-tête ``X-Peak-Alloc`` et l'ajoute aux histogrammes de
+    ``metrics_view``. Le traçage ralentit fortement la requête mesurée :
+    garder un taux faible.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = float(getattr(settings, "TRACEMALLOC_SAMPLE_RATE", 0.0))
+
+    def __call__(self, request):
+        if self.sample_rate <= 0 or (self.sample_rate < 1 and random.random() >= self.sample_rate):
+            return self.get_response(request)
+
+        # Si le traçage est déjà actif (PYTHONTRACEMALLOC...), on le laisse actif.
+        was_tracing = tracemalloc.is_tracing()
+        if not was_tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        start_bytes = tracemalloc.get_traced_memory()[0]
+        try:
+            response = self.get_response(request)
+            peak_bytes = tracemalloc.get_traced_memory()[1] - start_bytes
+        finally:
+            if not was_tracing:
+                tracemalloc.stop()
+
+        match = getattr(request, "resolver_match", None)
+        PEAK_ALLOC_HISTOGRAMS.observe(match.view_name if match else "unresolved", "request", peak_bytes)
+        response["X-Peak-Alloc"] = str(peak_bytes)
+        return response
+
+
+class ProfilerMiddleware:
+    """
+    Pour un utilisateur staff, ``?profile=cprofile`` (ou ``?profile=1``)
+    exécute la requête sous cProfile et ``?profile=sample`` sous
+    l'échantillonneur de piles ; le profil est enregistré dans
+    ``PROFILE_OUTPUT_DIR`` et son identifiant renvoyé dans l'en-tête
+    ``X-Profile-Id``. Doit suivre AuthenticationMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        flag = request.GET.get("profile")
+        if not flag or not request.user.is_staff:
+            return self.get_response(request)
+
+        mode = "cprofile" if flag in ("1", "true") else flag
+        if mode not in PROFILE_MODES:
+            return self.get_response(request)
+
+        response, profiler, duration = run_profiled(mode, self.get_response, request)
+        response["X-Profile-Id"] = save_profile(mode, profiler, request, response, duration)
+        return response
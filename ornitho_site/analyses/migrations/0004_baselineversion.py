@@ -0,0 +1,99 @@
+import hashlib
+import json
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def _content_hash(results):
+    canonical = json.dumps(results, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def move_baselines_to_versions(apps, schema_editor):
+    BaselineAnalysis = apps.get_model("analyses", "BaselineAnalysis")
+    BaselineVersion = apps.get_model("analyses", "BaselineVersion")
+
+    for baseline in BaselineAnalysis.objects.exclude(baseline_json=None):
+        version, _ = BaselineVersion.objects.get_or_create(
+            content_hash=_content_hash(baseline.baseline_json),
+            defaults={"baseline_json": baseline.baseline_json},
+        )
+        baseline.active_version = version
+        baseline.save(update_fields=["active_version"])
+
+
+def move_versions_to_baselines(apps, schema_editor):
+    BaselineAnalysis = apps.get_model("analyses", "BaselineAnalysis")
+
+    for baseline in BaselineAnalysis.objects.exclude(active_version=None).select_related("active_version"):
+        baseline.baseline_json = baseline.active_version.baseline_json
+        baseline.save(update_fields=["baseline_json"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("analyses", "0003_baselineanalysis"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BaselineVersion",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "content_hash",
+                    models.CharField(max_length=64, unique=True),
+                ),
+                (
+                    "baseline_json",
+                    models.JSONField(blank=True, null=True),
+                ),
+                (
+                    "date_creation",
+                    models.DateTimeField(auto_now_add=True),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name="baselineanalysis",
+            name="active_version",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="analyses.baselineversion",
+            ),
+        ),
+        migrations.AddField(
+            model_name="analyse",
+            name="baseline_version",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="analyses",
+                to="analyses.baselineversion",
+            ),
+        ),
+        migrations.AddField(
+            model_name="analyse",
+            name="pin_baseline",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(move_baselines_to_versions, move_versions_to_baselines),
+        migrations.RemoveField(
+            model_name="baselineanalysis",
+            name="baseline_json",
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 4.2.27 on 2026-10-19 01:50
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analyses', '0005_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BaselineCountry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200)),
+                ('continent', models.CharField(blank=True, max_length=100)),
+                ('total_species', models.IntegerField(default=0)),
+                ('species_above_threshold', models.IntegerField(default=0)),
+                ('max_species_count', models.IntegerField(default=0)),
+                ('version', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='countries', to='analyses.baselineversion')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='BaselineSpecies',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200)),
+                ('name_key', models.CharField(max_length=200)),
+                ('rank', models.IntegerField()),
+                ('country_count', models.IntegerField(default=0)),
+                ('above_threshold_count', models.IntegerField(default=0)),
+                ('max_percentage', models.FloatField(default=0.0)),
+                ('median_percentage', models.FloatField(blank=True, null=True)),
+                ('max_country', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='analyses.baselinecountry')),
+                ('version', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='species', to='analyses.baselineversion')),
+            ],
+            options={
+                'verbose_name_plural': 'baseline species',
+            },
+        ),
+        migrations.CreateModel(
+            name='BaselinePresence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('value', models.FloatField()),
+                ('country', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='presences', to='analyses.baselinecountry')),
+                ('species', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='presences', to='analyses.baselinespecies')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='baselinespecies',
+            index=models.Index(fields=['version', 'rank'], name='analyses_ba_version_79bbe9_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='baselinepresence',
+            index=models.Index(fields=['country', 'value', 'species'], name='presence_country_cover'),
+        ),
+        migrations.AddIndex(
+            model_name='baselinepresence',
+            index=models.Index(fields=['species', 'country', 'value'], name='presence_species_cover'),
+        ),
+        migrations.AddConstraint(
+            model_name='baselinecountry',
+            constraint=models.UniqueConstraint(fields=('version', 'name'), name='baseline_country_unique_name'),
+        ),
+        migrations.AddConstraint(
+            model_name='baselinespecies',
+            constraint=models.UniqueConstraint(fields=('version', 'name_key'), name='baseline_species_unique_name_key'),
+        ),
+    ]
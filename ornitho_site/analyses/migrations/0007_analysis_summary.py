@@ -0,0 +1,37 @@
+# Generated by Django 4.2.27 on 2026-10-19 01:57
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analyses', '0006_baseline_tables'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='analyse',
+            name='last_accessed',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='AnalysisSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('summary_json', models.JSONField()),
+                ('rank_offsets_json', models.JSONField(default=dict)),
+                ('date_creation', models.DateTimeField(auto_now_add=True)),
+                ('analyse', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='summaries', to='analyses.analyse')),
+                ('version', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='analyses.baselineversion')),
+            ],
+            options={
+                'verbose_name_plural': 'analysis summaries',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='analysissummary',
+            constraint=models.UniqueConstraint(fields=('analyse', 'version'), name='analysis_summary_unique_version'),
+        ),
+    ]
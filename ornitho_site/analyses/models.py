@@ -2,22 +2,170 @@ from django.db import models
 from django.contrib.auth.models import User
 
 
+class BaselineVersion(models.Model):
+    content_hash = models.CharField(max_length=64, unique=True)
+    baseline_json = models.JSONField(null=True, blank=True)
+    date_creation = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.content_hash[:12]
+
+
+class BaselineCountry(models.Model):
+    version = models.ForeignKey(BaselineVersion, on_delete=models.CASCADE, related_name="countries")
+    name = models.CharField(max_length=200)
+    continent = models.CharField(max_length=100, blank=True)
+    total_species = models.IntegerField(default=0)
+    species_above_threshold = models.IntegerField(default=0)
+    max_species_count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["version", "name"], name="baseline_country_unique_name"),
+        ]
+
+    def __str__(self):
+        return self.name
+
+
+class BaselineSpecies(models.Model):
+    version = models.ForeignKey(BaselineVersion, on_delete=models.CASCADE, related_name="species")
+    name = models.CharField(max_length=200)
+    # Nom normalisé (minuscules, sans espaces de bord), comme les life lists.
+    name_key = models.CharField(max_length=200)
+    rank = models.IntegerField()
+    country_count = models.IntegerField(default=0)
+    above_threshold_count = models.IntegerField(default=0)
+    max_percentage = models.FloatField(default=0.0)
+    max_country = models.ForeignKey(
+        BaselineCountry,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+    median_percentage = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        verbose_name_plural = "baseline species"
+        indexes = [
+            models.Index(fields=["version", "rank"]),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=["version", "name_key"], name="baseline_species_unique_name_key"),
+        ]
+
+    def __str__(self):
+        return self.name
+
+
+class BaselinePresence(models.Model):
+    """
+    Valeur non nulle d'une espèce dans un pays (matrice creuse du baseline).
+    """
+    species = models.ForeignKey(BaselineSpecies, on_delete=models.CASCADE, related_name="presences", db_index=False)
+    country = models.ForeignKey(BaselineCountry, on_delete=models.CASCADE, related_name="presences", db_index=False)
+    value = models.FloatField()
+
+    class Meta:
+        # Index couvrants : totaux et listes par pays, pays d'une espèce,
+        # sans lecture de la table.
+        indexes = [
+            models.Index(fields=["country", "value", "species"], name="presence_country_cover"),
+            models.Index(fields=["species", "country", "value"], name="presence_species_cover"),
+        ]
+
+
 class Analyse(models.Model):
     user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
     life_list_file = models.FileField(upload_to="life_lists/")
     results_json = models.JSONField(null=True, blank=True)
     date_creation = models.DateTimeField(auto_now_add=True)
     titre = models.CharField(max_length=200, blank=True)
+    baseline_version = models.ForeignKey(
+        BaselineVersion,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name="analyses",
+    )
+    pin_baseline = models.BooleanField(default=False)
+    # Dernière consultation (à ``ANALYSIS_ACCESS_RESOLUTION`` près) : ordre
+    # de priorité des précalculs après une reconstruction du baseline.
+    last_accessed = models.DateTimeField(null=True, blank=True, db_index=True)
 
     def __str__(self):
         return self.titre or f"Analyse #{self.pk}"
 
 
+class AnalysisSummary(models.Model):
+    """
+    Agrégats précalculés d'une analyse pour une version du baseline
+    (``analyses.precompute``) : résumé par pays et par continent, rangs
+    globaux des blancs importants de chaque pays.
+    """
+    analyse = models.ForeignKey(Analyse, on_delete=models.CASCADE, related_name="summaries")
+    version = models.ForeignKey(BaselineVersion, on_delete=models.CASCADE, related_name="+")
+    summary_json = models.JSONField()
+    rank_offsets_json = models.JSONField(default=dict)
+    date_creation = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name_plural = "analysis summaries"
+        constraints = [
+            models.UniqueConstraint(fields=["analyse", "version"], name="analysis_summary_unique_version"),
+        ]
+
+    def __str__(self):
+        return f"{self.analyse} @ {self.version}"
+
+
 class BaselineAnalysis(models.Model):
     name = models.CharField(max_length=200, unique=True, default="world_baseline")
-    baseline_json = models.JSONField(null=True, blank=True)
+    active_version = models.ForeignKey(
+        BaselineVersion,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
     date_creation = models.DateTimeField(auto_now_add=True)
     date_updated = models.DateTimeField(auto_now=True)
 
     def __str__(self):
-        return self.name
\ No newline at end of file
+        return self.name
+
+
+class Job(models.Model):
+    STATUS_QUEUED = "queued"
+    STATUS_RUNNING = "running"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, "En attente"),
+        (STATUS_RUNNING, "En cours"),
+        (STATUS_DONE, "Terminé"),
+        (STATUS_FAILED, "Échec"),
+    ]
+
+    kind = models.CharField(max_length=50)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    payload = models.JSONField(default=dict, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    date_creation = models.DateTimeField(auto_now_add=True)
+    date_started = models.DateTimeField(null=True, blank=True)
+    date_finished = models.DateTimeField(null=True, blank=True)
+    # Runner qui exécute le job ("hôte:pid") et dernier signe de vie : un job
+    # "running" sans battement depuis JOB_LEASE_SECONDS est considéré abandonné.
+    runner = models.CharField(max_length=255, blank=True)
+    heartbeat = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "id"]),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.pk} ({self.status})"
\ No newline at end of file
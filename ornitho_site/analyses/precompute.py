@@ -0,0 +1,253 @@
+"""
+Précalcul des résumés d'analyses (table ``AnalysisSummary``).
+
+Après une reconstruction du baseline, les résultats de chaque analyse sont
+à recalculer pour la nouvelle version : sans précalcul, c'est la première
+visite qui paie le calcul du delta. ``run_precompute`` calcule et enregistre,
+pour les analyses consultées récemment (``Analyse.last_accessed``, les plus
+récentes d'abord), les agrégats par pays et par continent et les rangs
+globaux des blancs de chaque pays ; les vues les servent tant que la version
+servie est celle du précalcul.
+
+À l'upload d'une nouvelle version de sa life list, le résumé précalculé de
+la dernière analyse de l'utilisateur est corrigé des seules espèces
+ajoutées ou retirées (``patch_analysis_summary``) au lieu d'être recalculé.
+
+Le calcul tourne dans un pool de processus de priorité basse (``nice``) et
+chaque tâche se met en pause après son calcul pour ne pas occuper plus de
+``duty_cycle`` du temps d'un CPU : le trafic en direct reste prioritaire.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from .baselines import get_analysis_baseline_version, get_baseline_results, get_target_species_path
+from .deltas import DELTA_V2, is_compact_analysis_payload
+from .models import Analyse, AnalysisSummary
+from core.serving import compute_summary_from_baseline_delta, country_rank_offsets, patch_summary_from_delta
+from core.species_delta import changed_bitmap_rows, decode_species_bitmap
+import django
+import multiprocessing
+import os
+import time
+
+
+SUMMARY_FIELDS = (
+    "liste_pays_records",
+    "continents_records",
+    "pays_stats",
+    "country_continents",
+    "species_min",
+    "species_max",
+)
+
+# Priorité des processus du pool de précalcul (``os.nice``).
+PRECOMPUTE_NICENESS = 10
+_PRIORITY_LOWERED = False
+
+
+def touch_analysis(analyse):
+    """
+    Date la consultation d'une analyse, au plus une écriture par
+    ``ANALYSIS_ACCESS_RESOLUTION`` secondes.
+    """
+    now = timezone.now()
+    resolution = timedelta(seconds=getattr(settings, "ANALYSIS_ACCESS_RESOLUTION", 300))
+    if analyse.last_accessed is not None and now - analyse.last_accessed < resolution:
+        return
+    Analyse.objects.filter(pk=analyse.pk).update(last_accessed=now)
+    analyse.last_accessed = now
+
+
+def get_analysis_summary(analyse, version, field="summary_json"):
+    """
+    Résumé (``field="summary_json"``) ou rangs par pays
+    (``"rank_offsets_json"``) précalculés de ``analyse`` pour ``version``,
+    ou None.
+    """
+    if version is None:
+        return None
+    return (
+        AnalysisSummary.objects
+        .filter(analyse_id=analyse.pk, version_id=version.pk)
+        .values_list(field, flat=True)
+        .first()
+    )
+
+
+def build_analysis_summary(analyse):
+    """
+    Calcule et enregistre le résumé d'une analyse compacte pour la version
+    qui lui est servie ; les résumés d'autres versions sont supprimés.
+    Retourne la version, ou None si rien n'a été calculé.
+    """
+    from .views import get_compact_analysis_delta
+
+    stored = analyse.results_json or {}
+    if not is_compact_analysis_payload(stored):
+        return None
+    version = get_analysis_baseline_version(analyse)
+    if version is None:
+        return None
+    baseline, species_to_remove = get_compact_analysis_delta(analyse, stored, version)
+    if baseline is None:
+        return None
+
+    summary = compute_summary_from_baseline_delta(baseline, species_to_remove)
+    AnalysisSummary.objects.update_or_create(
+        analyse=analyse,
+        version=version,
+        defaults={
+            "summary_json": {field: summary[field] for field in SUMMARY_FIELDS},
+            "rank_offsets_json": country_rank_offsets(baseline, species_to_remove),
+        },
+    )
+    AnalysisSummary.objects.filter(analyse=analyse).exclude(version=version).delete()
+    return version
+
+
+def patch_analysis_summary(analyse):
+    """
+    Dérive le résumé d'une analyse compacte qui vient d'être uploadée de
+    celui, précalculé, de la dernière analyse du même utilisateur : seules
+    les lignes qui diffèrent entre les deux bitmaps sont agrégées. Les deux
+    payloads doivent être encodés sur la version servie ; aucune life list
+    n'est relue. Retourne la version, ou None si rien n'a été dérivé (les
+    vues calculent alors à la demande).
+    """
+    stored = analyse.results_json or {}
+    if analyse.user_id is None or stored.get("result_mode") != DELTA_V2:
+        return None
+    previous = (
+        Analyse.objects
+        .filter(user_id=analyse.user_id)
+        .exclude(pk=analyse.pk)
+        .order_by("-date_creation", "-id")
+        .only("id", "results_json")
+        .first()
+    )
+    if previous is None:
+        return None
+    version = get_analysis_baseline_version(analyse)
+    previous_stored = previous.results_json or {}
+    if (
+        version is None
+        or stored.get("baseline_hash") != version.content_hash
+        or previous_stored.get("result_mode") != DELTA_V2
+        or previous_stored.get("baseline_hash") != version.content_hash
+    ):
+        return None
+    previous_summary = (
+        AnalysisSummary.objects
+        .filter(analyse_id=previous.pk, version_id=version.pk)
+        .values_list("summary_json", "rank_offsets_json")
+        .first()
+    )
+    if previous_summary is None:
+        return None
+    baseline = get_baseline_results(get_target_species_path(), version=version)
+    if baseline is None:
+        return None
+
+    newly_seen, unseen = changed_bitmap_rows(previous_stored["bitmap"], stored["bitmap"], stored["n_rows"])
+    summary, rank_offsets = patch_summary_from_delta(
+        baseline,
+        *previous_summary,
+        decode_species_bitmap(previous_stored["bitmap"], previous_stored["n_rows"]),
+        newly_seen,
+        unseen,
+    )
+    AnalysisSummary.objects.update_or_create(
+        analyse=analyse,
+        version=version,
+        defaults={"summary_json": summary, "rank_offsets_json": rank_offsets},
+    )
+    return version
+
+
+def recent_analysis_ids(days=None, limit=None):
+    """
+    Analyses consultées depuis moins de ``days`` jours, les plus récemment
+    consultées d'abord.
+    """
+    if days is None:
+        days = getattr(settings, "PRECOMPUTE_RECENT_DAYS", 30)
+    ids = (
+        Analyse.objects
+        .filter(last_accessed__gte=timezone.now() - timedelta(days=days))
+        .order_by("-last_accessed", "-id")
+        .values_list("id", flat=True)
+    )
+    return list(ids[:limit] if limit else ids)
+
+
+def _lower_priority():
+    # Une seule fois par processus : ``os.nice`` est cumulatif.
+    global _PRIORITY_LOWERED
+    if _PRIORITY_LOWERED:
+        return
+    _PRIORITY_LOWERED = True
+    try:
+        os.nice(PRECOMPUTE_NICENESS)
+    except (AttributeError, OSError):
+        pass
+
+
+def precompute_analysis(analyse_id, duty_cycle=1.0, lower_priority=False):
+    """
+    Tâche du pool : précalcule une analyse puis se met en pause pour que le
+    calcul n'occupe que ``duty_cycle`` du temps. ``lower_priority`` baisse
+    la priorité du processus (processus du pool uniquement).
+
+    Returns
+    -------
+    tuple
+        ``(analyse_id, statut, secondes de calcul)`` ; statut parmi
+        "stored", "skipped", "missing" et "failed: ...".
+    """
+    if lower_priority:
+        _lower_priority()
+    close_old_connections()
+    started = time.perf_counter()
+    try:
+        analyse = Analyse.objects.filter(pk=analyse_id).first()
+        if analyse is None:
+            status = "missing"
+        else:
+            status = "stored" if build_analysis_summary(analyse) is not None else "skipped"
+    except Exception as exc:
+        status = f"failed: {exc!r}"
+    elapsed = time.perf_counter() - started
+    if 0 < duty_cycle < 1:
+        time.sleep(elapsed * (1 - duty_cycle) / duty_cycle)
+    return analyse_id, status, elapsed
+
+
+def run_precompute(analyse_ids, workers=1, duty_cycle=None):
+    """
+    Précalcule ``analyse_ids`` dans l'ordre donné (priorité décroissante) ;
+    générateur des résultats de ``precompute_analysis``, dans le même ordre.
+    """
+    if duty_cycle is None:
+        duty_cycle = getattr(settings, "PRECOMPUTE_DUTY_CYCLE", 0.5)
+
+    if workers <= 1:
+        for analyse_id in analyse_ids:
+            yield precompute_analysis(analyse_id, duty_cycle)
+        return
+
+    # "spawn", comme ``run_jobs`` : chaque processus a ses propres connexions.
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=django.setup,
+    ) as executor:
+        yield from executor.map(
+            precompute_analysis,
+            analyse_ids,
+            [duty_cycle] * len(analyse_ids),
+            [True] * len(analyse_ids),
+        )
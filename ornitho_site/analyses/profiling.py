@@ -0,0 +1,165 @@
+"""
+Profilage à la demande d'une requête (staff uniquement).
+
+Deux modes :
+
+  - ``cprofile`` : profil déterministe, sauvegardé en ``.pstats`` ;
+  - ``sample`` : échantillonnage périodique de la pile du thread de la
+    requête, sauvegardé en piles "repliées" (``.collapsed``, une ligne
+    ``frame;frame;frame N``) lisibles par flamegraph.pl ou speedscope.
+
+Chaque profil est accompagné d'un fichier ``.json`` de métadonnées (URL,
+vue, analyse, utilisateur, durée, statut) lu par ``manage.py list_profiles``.
+"""
+
+from django.conf import settings
+from django.utils import timezone
+
+import cProfile
+import json
+import os
+import re
+import sys
+import threading
+import time
+
+
+PROFILE_MODES = ("cprofile", "sample")
+
+
+def get_profile_dir():
+    return getattr(settings, "PROFILE_OUTPUT_DIR", os.path.join(settings.BASE_DIR, "profiles"))
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", os.path.basename(code.co_filename))
+    return f"{module}:{code.co_name}:{frame.f_lineno}"
+
+
+class SamplingProfiler:
+    """
+    Relève la pile du thread ``thread_id`` toutes les ``interval`` secondes
+    depuis un thread dédié et compte les piles identiques.
+    """
+
+    def __init__(self, thread_id, interval=0.001):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = {}
+        self.samples = 0
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            labels = []
+            while frame is not None:
+                labels.append(_frame_label(frame))
+                frame = frame.f_back
+            key = ";".join(reversed(labels))
+            self.stacks[key] = self.stacks.get(key, 0) + 1
+            self.samples += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        self._thread.join()
+
+    def collapsed(self):
+        return "".join(
+            f"{stack} {count}\n"
+            for stack, count in sorted(self.stacks.items(), key=lambda item: -item[1])
+        )
+
+
+def run_profiled(mode, func, *args, **kwargs):
+    """
+    Exécute ``func`` sous le profileur ``mode``.
+    Retourne ``(résultat, profileur, durée en secondes)``.
+    """
+    started = time.perf_counter()
+    if mode == "sample":
+        profiler = SamplingProfiler(
+            threading.get_ident(),
+            interval=float(getattr(settings, "PROFILE_SAMPLE_INTERVAL", 0.001)),
+        )
+        profiler.start()
+        try:
+            result = func(*args, **kwargs)
+        finally:
+            profiler.stop()
+    else:
+        profiler = cProfile.Profile()
+        result = profiler.runcall(func, *args, **kwargs)
+    return result, profiler, time.perf_counter() - started
+
+
+def _slug(value):
+    return re.sub(r"[^A-Za-z0-9]+", "-", value).strip("-")[:60] or "root"
+
+
+def save_profile(mode, profiler, request, response, duration):
+    """
+    Écrit le profil et ses métadonnées ; retourne l'identifiant du profil
+    (nom de fichier sans extension), clé : horodatage, URL et analyse.
+    """
+    match = getattr(request, "resolver_match", None)
+    analyse_id = (match.kwargs.get("analyse_id") if match else None) or request.GET.get("analysis")
+    profile_id = "_".join(filter(None, [
+        timezone.now().strftime("%Y%m%d_%H%M%S_%f"),
+        _slug(request.path),
+        f"a{analyse_id}" if analyse_id else "",
+    ]))
+
+    profile_dir = get_profile_dir()
+    os.makedirs(profile_dir, exist_ok=True)
+    base_path = os.path.join(profile_dir, profile_id)
+    if mode == "sample":
+        data_file = f"{profile_id}.collapsed"
+        with open(f"{base_path}.collapsed", "w", encoding="utf-8") as f:
+            f.write(profiler.collapsed())
+    else:
+        data_file = f"{profile_id}.pstats"
+        profiler.dump_stats(f"{base_path}.pstats")
+
+    metadata = {
+        "id": profile_id,
+        "mode": mode,
+        "file": data_file,
+        "created": timezone.now().isoformat(),
+        "method": request.method,
+        "url": request.get_full_path(),
+        "view": match.view_name if match else None,
+        "analyse_id": int(analyse_id) if str(analyse_id or "").isdigit() else None,
+        "user": request.user.get_username(),
+        "status": response.status_code,
+        "duration_ms": round(duration * 1000, 2),
+    }
+    if mode == "sample":
+        metadata["samples"] = profiler.samples
+    with open(f"{base_path}.json", "w", encoding="utf-8") as f:
+        json.dump(metadata, f, indent=2)
+    return profile_id
+
+
+def list_profiles():
+    """
+    Métadonnées des profils enregistrés, du plus récent au plus ancien.
+    """
+    profile_dir = get_profile_dir()
+    if not os.path.isdir(profile_dir):
+        return []
+    profiles = []
+    for name in os.listdir(profile_dir):
+        if not name.endswith(".json"):
+            continue
+        with open(os.path.join(profile_dir, name), encoding="utf-8") as f:
+            profiles.append(json.load(f))
+    profiles.sort(key=lambda meta: meta.get("created", ""), reverse=True)
+    return profiles
@@ -0,0 +1,99 @@
+"""
+Dates de première observation et paramètre ``as_of`` des vues.
+"""
+
+from datetime import date
+
+from django.test import TestCase
+from django.urls import reverse
+
+from ..deltas import build_compact_analysis_payload
+from ..lifelists import extract_first_seen_from_file, parse_life_list_date
+from ..models import Analyse
+from .utils import ActiveBaselineMixin, synthetic_baseline, synthetic_life_list
+from core.baseline_index import get_baseline_index
+from core.species_delta import encode_first_seen, first_seen_by_name, first_seen_mask
+import io
+import numpy as np
+
+
+def day(value):
+    return date.fromisoformat(value).toordinal()
+
+
+class FirstSeenTests(TestCase):
+
+    def test_parse_life_list_date(self):
+        self.assertEqual(parse_life_list_date("03 Jun 2019"), day("2019-06-03"))
+        self.assertEqual(parse_life_list_date(" 2019-06-03 "), day("2019-06-03"))
+        self.assertEqual(parse_life_list_date("June 2019"), 0)
+        self.assertEqual(parse_life_list_date(None), 0)
+
+    def test_reader_keeps_earliest_countable_date(self):
+        content = (
+            "Common Name,Countable,Date\n"
+            "Black Kite,1,12 May 2020\n"
+            "black kite,1,2018-04-01\n"
+            "Wallcreeper,1,\n"
+            "Domestic Goose,0,2017-01-01\n"
+        ).encode("utf-8")
+        self.assertEqual(
+            extract_first_seen_from_file(io.BytesIO(content)),
+            {"black kite": day("2018-04-01"), "wallcreeper": 0},
+        )
+
+    def test_mask_matches_brute_force(self):
+        index = get_baseline_index(synthetic_baseline())
+        species_keys = index["species_keys"]
+        rng = np.random.default_rng(5)
+        names = sorted(synthetic_life_list(80, seed=5))
+        first_seen = dict(zip(names, rng.integers(day("2000-01-01"), day("2020-01-01"), len(names)).tolist()))
+        first_seen["not a baseline species"] = day("2010-01-01")
+        overflow = ["not a baseline species"]
+        encoded = encode_first_seen(index, first_seen, overflow)
+
+        self.assertEqual(first_seen_by_name(index, encoded, overflow), first_seen)
+        for as_of in (0, day("2005-06-01"), day("2012-01-01"), day("2030-01-01")):
+            expected = np.array([bool(key) and first_seen.get(key, as_of + 1) <= as_of for key in species_keys])
+            np.testing.assert_array_equal(first_seen_mask(encoded, len(species_keys), as_of), expected)
+
+
+class AsOfViewTests(ActiveBaselineMixin, TestCase):
+
+    first_seen = {"black kite": day("2015-05-01"), "wallcreeper": day("2021-08-15")}
+
+    def create_analysis(self, first_seen):
+        return Analyse.objects.create(
+            results_json=build_compact_analysis_payload(
+                set(self.first_seen), self.baseline_version, self.baseline, first_seen,
+            ),
+        )
+
+    def species(self, analyse, **params):
+        response = self.client.get(reverse("analyses:section_blanks_json", args=[analyse.pk]), {"page_size": 200, **params})
+        self.assertEqual(response.status_code, 200)
+        return {row["Species"] for row in response.json()["blanks_data"]}
+
+    def test_as_of_restores_later_species(self):
+        analyse = self.create_analysis(self.first_seen)
+        today = self.species(analyse)
+        self.assertNotIn("Wallcreeper", today)
+        self.assertEqual(self.species(analyse, as_of="2021-08-15"), today)
+        self.assertEqual(self.species(analyse, as_of="2020-01-01"), today | {"Wallcreeper"})
+        self.assertEqual(self.species(analyse, as_of="2010-01-01"), today | {"Wallcreeper", "Black Kite"})
+
+        url = reverse("analyses:section_summary_json", args=[analyse.pk])
+        self.assertEqual(self.client.get(url, {"as_of": "2020-01-01"}).status_code, 200)
+
+    def test_invalid_requests(self):
+        analyse = self.create_analysis(self.first_seen)
+        url = reverse("analyses:section_blanks_json", args=[analyse.pk])
+        self.assertEqual(self.client.get(url, {"as_of": "2020-13-01"}).status_code, 400)
+
+        without_dates = self.create_analysis(None)
+        url = reverse("analyses:section_summary_json", args=[without_dates.pk])
+        self.assertEqual(self.client.get(url, {"as_of": "2020-01-01"}).status_code, 400)
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+        url = reverse("analyses:section_blanks_json", args=[analyse.pk + 99])
+        self.assertEqual(self.client.get(url, {"as_of": "2020-01-01"}).status_code, 404)
@@ -0,0 +1,54 @@
+"""
+Index dérivés du baseline : masques d'appartenance aux continents.
+"""
+
+from django.test import TestCase
+
+from .utils import small_baseline
+from core.baseline_index import (
+    continent_mask_counts,
+    continent_mask_dtype,
+    continents_records_from_masks,
+    get_baseline_index,
+    surviving_species_mask,
+)
+import numpy as np
+
+
+class ContinentMaskTests(TestCase):
+
+    def test_mask_dtype_fits_the_continents(self):
+        self.assertIs(continent_mask_dtype(6), np.uint8)
+        self.assertIs(continent_mask_dtype(9), np.uint16)
+        self.assertIs(continent_mask_dtype(64), np.uint64)
+        with self.assertRaises(ValueError):
+            continent_mask_dtype(65)
+
+    def test_counts_totals_and_unique_species(self):
+        totals, unique = continent_mask_counts(np.array([0b001, 0b011, 0b010, 0b100, 0, 0b110]), 3)
+        np.testing.assert_array_equal(totals, [2, 3, 2])
+        np.testing.assert_array_equal(unique, [1, 1, 1])
+
+    def test_records_match_baseline_continents(self):
+        baseline = small_baseline()
+        index = get_baseline_index(baseline)
+        self.assertEqual(
+            continents_records_from_masks(index, index["has_species"]),
+            baseline["continents_records"],
+        )
+
+    def test_records_after_removal(self):
+        index = get_baseline_index(small_baseline())
+        kept = surviving_species_mask(index, {"black kite", "andean condor", "sword-billed hummingbird"})
+        self.assertEqual(continents_records_from_masks(index, kept & index["has_species"]), [
+            {"Continent": "Europe", "Total_Species": 3, "Unique_Species": 3},
+            {"Continent": "South America", "Total_Species": 1, "Unique_Species": 1},
+        ])
+        kept &= surviving_species_mask(index, {"torrent duck"})
+        self.assertEqual(
+            [row["Continent"] for row in continents_records_from_masks(index, kept & index["has_species"])],
+            ["Europe"],
+        )
+        self.assertEqual(
+            len(continents_records_from_masks(index, kept & index["has_species"], include_empty=True)), 2
+        )
@@ -0,0 +1,79 @@
+"""
+Tables relationnelles d'une version du baseline et commande ``query_baseline``.
+"""
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from ..baseline_tables import (
+    countries_of_species,
+    country_totals,
+    has_baseline_tables,
+    species_in_country,
+    store_baseline_tables,
+)
+from ..models import BaselinePresence, BaselineSpecies
+from .utils import ActiveBaselineMixin
+from core.serving import filter_upload_results
+import io
+
+
+class BaselineTablesTests(ActiveBaselineMixin, TestCase):
+
+    def test_publish_does_not_fill_tables(self):
+        self.assertFalse(has_baseline_tables(self.baseline_version))
+
+    def test_store_is_idempotent(self):
+        counts = store_baseline_tables(self.baseline_version, self.baseline)
+        self.assertEqual(counts, {"countries": 3, "species": 7, "presences": 10})
+        self.assertEqual(store_baseline_tables(self.baseline_version, self.baseline), counts)
+        self.assertEqual(BaselineSpecies.objects.filter(version=self.baseline_version).count(), 7)
+        self.assertEqual(BaselinePresence.objects.filter(species__version=self.baseline_version).count(), 10)
+
+    def test_duplicated_names_keep_best_ranked_row(self):
+        results = dict(self.baseline)
+        kite = next(row for row in results["liste_blanks_records"] if row["Species"] == "Black Kite")
+        results["liste_blanks_records"] = results["liste_blanks_records"] + [{**kite, "Species": "black kite ", "Spain": 0.5}]
+        counts = store_baseline_tables(self.baseline_version, results)
+        self.assertEqual(counts["species"], 7)
+        self.assertEqual(countries_of_species(self.baseline_version, "Black Kite")[0][:2], ("Spain", "Europe"))
+
+    def test_queries_match_serving(self):
+        store_baseline_tables(self.baseline_version, self.baseline)
+        served = filter_upload_results(self.baseline, set())["liste_pays_records"]
+        self.assertEqual(
+            {row["name"]: (row["present"], row["above"]) for row in country_totals(self.baseline_version)},
+            {row["Country"]: (row["Total_Species"], row["Species_Above_00009"]) for row in served},
+        )
+        self.assertEqual(
+            [name for name, _value, _rank in species_in_country(self.baseline_version, "Spain")],
+            ["Eurasian Hoopoe", "Black Kite", "Iberian Green Woodpecker"],
+        )
+        self.assertEqual(
+            [country for country, _continent, _value in countries_of_species(self.baseline_version, "black kite")],
+            ["Spain", "France", "Ecuador"],
+        )
+
+
+class QueryBaselineCommandTests(ActiveBaselineMixin, TestCase):
+
+    def run_command(self, **options):
+        stdout = io.StringIO()
+        call_command("query_baseline", stdout=stdout, **options)
+        return stdout.getvalue()
+
+    def test_requires_backfill(self):
+        with self.assertRaises(CommandError):
+            self.run_command(totals=True)
+        self.assertIn("1 version(s) backfilled", self.run_command(backfill=True))
+        self.assertIn("0 version(s) backfilled", self.run_command(backfill=True))
+
+    def test_totals_country_and_species(self):
+        self.run_command(backfill=True)
+        output = self.run_command(totals=True, country="France", species="Wallcreeper")
+        self.assertIn("Ecuador", output)
+        self.assertIn("Wallcreeper", output)
+        self.assertIn("France (Europe)", output)
+        with self.assertRaises(CommandError):
+            self.run_command(baseline_hash="ffffffffffff", totals=True)
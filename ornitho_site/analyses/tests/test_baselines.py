@@ -0,0 +1,85 @@
+"""
+Versions du baseline : publication, promotion et nettoyage.
+"""
+
+from django.test import TestCase, override_settings
+
+from ..baselines import (
+    _BASELINE_CACHE,
+    compute_baseline_hash,
+    get_active_baseline_version,
+    get_analysis_baseline_results,
+    get_baseline_artifact_path,
+    get_baseline_json_path,
+    promote_baseline_version,
+    prune_baseline_versions,
+    publish_baseline_version,
+)
+from ..models import Analyse, BaselineVersion
+from .utils import small_baseline
+import os
+import tempfile
+
+
+class BaselineVersionTests(TestCase):
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        settings_override = override_settings(BASE_DIR=tmp_dir.name, BASELINE_ARTIFACT_DIR=tmp_dir.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        _BASELINE_CACHE.clear()
+        self.addCleanup(_BASELINE_CACHE.clear)
+
+    def test_publish_is_idempotent_and_does_not_activate(self):
+        results = small_baseline()
+        version = publish_baseline_version(results)
+
+        self.assertEqual(version.content_hash, compute_baseline_hash(results))
+        self.assertEqual(publish_baseline_version(small_baseline()).pk, version.pk)
+        self.assertEqual(BaselineVersion.objects.count(), 1)
+        self.assertTrue(os.path.exists(get_baseline_artifact_path(version.content_hash)))
+        self.assertIsNone(get_active_baseline_version())
+
+    def test_promote_switches_the_active_version(self):
+        first = publish_baseline_version(small_baseline())
+        second = publish_baseline_version(small_baseline("0.07"))
+
+        promote_baseline_version(first)
+        self.assertEqual(get_active_baseline_version().pk, first.pk)
+        promote_baseline_version(second)
+        self.assertEqual(get_active_baseline_version().pk, second.pk)
+        self.assertTrue(os.path.exists(get_baseline_json_path()))
+
+    def test_pinned_analysis_keeps_its_version(self):
+        first = publish_baseline_version(small_baseline())
+        promote_baseline_version(first)
+        pinned = Analyse.objects.create(baseline_version=first, pin_baseline=True)
+        unpinned = Analyse.objects.create(baseline_version=first)
+        second = publish_baseline_version(small_baseline("0.07"))
+        promote_baseline_version(second)
+
+        _BASELINE_CACHE.clear()
+        self.assertEqual(compute_baseline_hash(get_analysis_baseline_results(pinned)), first.content_hash)
+        self.assertEqual(compute_baseline_hash(get_analysis_baseline_results(unpinned)), second.content_hash)
+
+    def test_prune_keeps_active_and_pinned_versions(self):
+        pinned = publish_baseline_version(small_baseline("0.06"))
+        unpinned = publish_baseline_version(small_baseline("0.07"))
+        active = publish_baseline_version(small_baseline())
+        promote_baseline_version(active)
+        Analyse.objects.create(baseline_version=pinned, pin_baseline=True)
+        analyse = Analyse.objects.create(baseline_version=unpinned)
+
+        self.assertEqual(prune_baseline_versions(dry_run=True), [unpinned.content_hash])
+        self.assertEqual(BaselineVersion.objects.count(), 3)
+
+        self.assertEqual(prune_baseline_versions(), [unpinned.content_hash])
+        self.assertEqual(
+            set(BaselineVersion.objects.values_list("pk", flat=True)),
+            {pinned.pk, active.pk},
+        )
+        self.assertFalse(os.path.exists(get_baseline_artifact_path(unpinned.content_hash)))
+        analyse.refresh_from_db()
+        self.assertIsNone(analyse.baseline_version_id)
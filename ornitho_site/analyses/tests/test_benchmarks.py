@@ -0,0 +1,65 @@
+"""
+Données synthétiques et commande ``run_benchmarks``.
+"""
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from .utils import synthetic_baseline, synthetic_dv
+from core.synthetic import make_synthetic_dv, make_synthetic_life_list_csv, synthetic_species_names
+from core.world_blanks import compute_results_from_dv
+import io
+import json
+import os
+import tempfile
+
+
+class SyntheticDataTests(TestCase):
+
+    def test_dv_is_deterministic(self):
+        dv = make_synthetic_dv(5, 40, density=0.3, n_continents=2, seed=3)
+        self.assertTrue(dv.equals(make_synthetic_dv(5, 40, density=0.3, n_continents=2, seed=3)))
+        self.assertEqual(dv.shape[1], 10)
+        self.assertEqual(dv.iloc[0].tolist()[:4], ["Country 000", "Continent 00", "Country 001", "Continent 01"])
+
+    def test_compiled_baseline_matches_pandas_baseline(self):
+        self.assertEqual(compute_results_from_dv(synthetic_dv()), synthetic_baseline())
+
+    def test_life_list_csv_has_the_requested_rows(self):
+        csv_bytes = make_synthetic_life_list_csv(25, synthetic_species_names(10), seed=4)
+        lines = csv_bytes.decode("utf-8").splitlines()
+        self.assertEqual(len(lines), 26)
+        self.assertTrue(lines[0].startswith("Row #,Taxon Order"))
+
+
+class RunBenchmarksTests(TestCase):
+
+    def run_benchmarks(self, *args):
+        stdout = io.StringIO()
+        call_command(
+            "run_benchmarks",
+            "--sizes", "4x60", "--life-list-rows", "20", "--repeat", "1",
+            "--only", "compile_world_matrix,filter_upload_results",
+            *args,
+            stdout=stdout,
+        )
+        return stdout.getvalue()
+
+    def test_writes_results_and_compares(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            output = os.path.join(tmp_dir, "bench.json")
+            self.run_benchmarks("--output", output)
+            with open(output, encoding="utf-8") as f:
+                report = json.load(f)
+            self.assertEqual(
+                [entry["name"] for entry in report["results"]],
+                ["compile_world_matrix", "filter_upload_results"],
+            )
+
+            for entry in report["results"]:
+                entry["best_ms"] = 1e-6
+            previous = os.path.join(tmp_dir, "previous.json")
+            with open(previous, "w", encoding="utf-8") as f:
+                json.dump(report, f)
+            with self.assertRaisesMessage(CommandError, "Benchmark regressions"):
+                self.run_benchmarks("--output", output, "--compare", previous)
@@ -0,0 +1,82 @@
+"""
+Commande ``compact_analysis_results`` : lots, erreurs par fichier, reprise.
+"""
+
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import TestCase
+
+from ..deltas import DELTA_V2, build_compact_analysis_payload, payload_species_names
+from ..lifelists import extract_species_to_remove_from_file, extract_species_to_remove_from_path
+from ..management.commands.compact_analysis_results import parse_life_list
+from ..models import Analyse
+from .utils import ActiveBaselineMixin, life_list_csv
+import io
+import os
+
+
+class LifeListParsingTests(ActiveBaselineMixin, TestCase):
+
+    def test_readers_keep_countable_normalized_names(self):
+        content = life_list_csv(" Black Kite", "Wallcreeper") + b"Domestic Goose,0\n"
+        analyse = Analyse.objects.create(life_list_file=ContentFile(content, name="life_list.csv"))
+        expected = {"black kite", "wallcreeper"}
+        self.assertEqual(extract_species_to_remove_from_path(analyse.life_list_file.path), expected)
+        self.assertEqual(extract_species_to_remove_from_file(io.BytesIO(content)), expected)
+        self.assertEqual(parse_life_list(analyse.life_list_file.path), (dict.fromkeys(expected, 0), None))
+
+    def test_unreadable_file_is_reported(self):
+        species, error = parse_life_list(os.path.join(self.tmp_dir, "missing.csv"))
+        self.assertIsNone(species)
+        self.assertIn("FileNotFoundError", error)
+
+
+class CompactAnalysisResultsTests(ActiveBaselineMixin, TestCase):
+
+    def run_command(self, **options):
+        stdout = io.StringIO()
+        stderr = io.StringIO()
+        call_command("compact_analysis_results", stdout=stdout, stderr=stderr, **options)
+        return stdout.getvalue(), stderr.getvalue()
+
+    def create_analyses(self):
+        return [
+            Analyse.objects.create(life_list_file=ContentFile(life_list_csv("Black Kite"), name="a.csv")),
+            Analyse.objects.create(
+                life_list_file="life_lists/a.csv",
+                results_json=build_compact_analysis_payload({"wallcreeper"}),
+            ),
+            Analyse.objects.create(life_list_file=ContentFile(b"\xff\xfe\x00bad", name="b.csv")),
+            Analyse.objects.create(life_list_file="life_lists/missing.csv"),
+            Analyse.objects.create(life_list_file=ContentFile(life_list_csv("Andean Condor"), name="c.csv")),
+        ]
+
+    def test_failed_files_are_counted_and_skipped(self):
+        analyses = self.create_analyses()
+        stdout, stderr = self.run_command(batch_size=2)
+
+        self.assertIn("Converted: 2, upgraded: 1, already compact: 0, failed: 2", stdout)
+        self.assertIn(f"Last committed id: {analyses[-1].pk}", stdout)
+        self.assertIn(f"Analysis #{analyses[2].pk} skipped: UnicodeDecodeError", stderr)
+        self.assertIn(f"Analysis #{analyses[3].pk} skipped: FileNotFoundError", stderr)
+
+        expected = [{"black kite"}, {"wallcreeper"}, None, None, {"andean condor"}]
+        for analyse, names in zip(analyses, expected):
+            analyse.refresh_from_db()
+            if names is None:
+                self.assertIsNone(analyse.results_json)
+            else:
+                self.assertEqual(analyse.results_json["result_mode"], DELTA_V2)
+                self.assertEqual(payload_species_names(analyse.results_json), names)
+
+        stdout, _ = self.run_command()
+        self.assertIn("Converted: 0, upgraded: 0, already compact: 3, failed: 2", stdout)
+
+    def test_start_after_resumes(self):
+        analyses = self.create_analyses()
+        stdout, _ = self.run_command(start_after=analyses[3].pk)
+        self.assertIn("Converted: 1, upgraded: 0, already compact: 0, failed: 0", stdout)
+        self.assertIn(f"Last committed id: {analyses[-1].pk}", stdout)
+
+        stdout, _ = self.run_command(start_after=analyses[-1].pk)
+        self.assertIn(f"Last committed id: {analyses[-1].pk}", stdout)
@@ -0,0 +1,102 @@
+"""
+Analyse de groupe : matrice membres × espèces et endpoints ``group/``.
+"""
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from ..deltas import build_compact_analysis_payload
+from ..models import Analyse
+from .utils import ActiveBaselineMixin, synthetic_baseline, synthetic_life_list
+from core.baseline_index import SERVING_THRESHOLD, get_baseline_index
+from core.groups import blank_members_by_country, group_blank_members, group_removed_mask
+from core.serving import filter_upload_results
+import numpy as np
+
+
+class GroupMatrixTests(TestCase):
+
+    def test_counts_match_brute_force(self):
+        baseline = synthetic_baseline()
+        index = get_baseline_index(baseline)
+        life_lists = [synthetic_life_list(100, seed=seed) for seed in range(3)]
+        seen = [np.array([key in names for key in index["species_keys"]]) for names in life_lists]
+
+        blank_members = group_blank_members(index, seen)
+        self.assertEqual(blank_members.tolist(), [sum(not mask[i] for mask in seen) for i in range(len(blank_members))])
+        np.testing.assert_array_equal(group_removed_mask(blank_members, 3), np.logical_or.reduce(seen))
+
+        by_country = blank_members_by_country(baseline, blank_members, 3)
+        records = baseline["liste_blanks_records"]
+        for country in baseline["blanks_country_cols"][:4]:
+            values = [float(row.get(country) or 0) for row in records]
+            for k in range(4):
+                total = sum(1 for i, value in enumerate(values) if value > 0 and blank_members[i] == k)
+                above = sum(1 for i, value in enumerate(values) if value > SERVING_THRESHOLD and blank_members[i] == k)
+                self.assertEqual(by_country[country]["total"][k], total)
+                self.assertEqual(by_country[country]["above_threshold"][k], above)
+
+
+class GroupViewTests(ActiveBaselineMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.alice = User.objects.create_user("alice", password="pw")
+        self.bob = User.objects.create_user("bob", password="pw")
+        self.first = self.create_analysis(self.alice, {"black kite", "wallcreeper"})
+        self.second = self.create_analysis(self.bob, {"black kite", "andean condor"})
+        self.group = f"{self.first.pk},{self.second.pk}"
+
+    def create_analysis(self, user, names):
+        return Analyse.objects.create(
+            user=user,
+            results_json=build_compact_analysis_payload(names, self.baseline_version, self.baseline),
+        )
+
+    def get(self, name, user=None, **params):
+        if user is not None:
+            self.client.force_login(user)
+        return self.client.get(reverse(f"analyses:{name}"), params)
+
+    def species(self, response):
+        return {row["Species"] for row in response.json()["blanks_data"]}
+
+    def test_members_and_staff_only(self):
+        for name in ("group_section_summary_json", "group_section_blanks_json", "group_section_blanks_by_country_json"):
+            self.assertEqual(self.get(name, analyses=self.group).status_code, 403, name)
+        outsider = User.objects.create_user("carol", password="pw")
+        self.assertEqual(self.get("group_section_summary_json", outsider, analyses=self.group).status_code, 403)
+        self.assertEqual(self.get("group_section_summary_json", self.bob, analyses=self.group).status_code, 200)
+        staff = User.objects.create_user("staff", password="pw", is_staff=True)
+        self.assertEqual(self.get("group_section_summary_json", staff, analyses=self.group).status_code, 200)
+
+    @override_settings(GROUP_ANALYSIS_MAX_MEMBERS=2)
+    def test_invalid_groups(self):
+        self.client.force_login(self.alice)
+        self.assertEqual(self.get("group_section_blanks_json").status_code, 400)
+        self.assertEqual(self.get("group_section_blanks_json", analyses="1,x").status_code, 400)
+        self.assertEqual(self.get("group_section_blanks_json", analyses=f"{self.first.pk},{self.second.pk + 99}").status_code, 404)
+        third = self.create_analysis(self.alice, set())
+        self.assertEqual(self.get("group_section_blanks_json", analyses=f"{self.group},{third.pk}").status_code, 400)
+        self.assertEqual(self.get("group_section_blanks_json", analyses=self.group, min_members="all").status_code, 400)
+
+    def test_min_members_selects_intersection_or_union(self):
+        self.client.force_login(self.alice)
+        first, second = (
+            {row["Species"] for row in filter_upload_results(self.baseline, names)["liste_blanks_records"]}
+            for names in ({"black kite", "wallcreeper"}, {"black kite", "andean condor"})
+        )
+        everyone = self.get("group_section_blanks_json", analyses=self.group, page_size=200)
+        self.assertEqual(self.species(everyone), first & second)
+        self.assertEqual({row["_blank_members"] for row in everyone.json()["blanks_data"]}, {2})
+
+        anyone = self.get("group_section_blanks_json", analyses=self.group, min_members=1, page_size=200)
+        self.assertEqual(self.species(anyone), first | second)
+        self.assertEqual(anyone.json()["group"], {"analyses": [self.first.pk, self.second.pk], "members": 2, "min_members": 1})
+
+    def test_summary_counts_blank_members(self):
+        payload = self.get("group_section_summary_json", self.alice, analyses=self.group).json()
+        # Espagne : milan noir vu par les deux, huppe et pic vus par personne.
+        self.assertEqual(payload["blank_members_by_country"]["Spain"]["total"], [1, 0, 2])
+        self.assertEqual(payload["blank_members_by_country"]["France"]["total"], [1, 1, 1])
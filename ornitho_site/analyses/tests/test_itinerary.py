@@ -0,0 +1,87 @@
+"""
+Itinéraire multi-pays (``core.itinerary``) et ses endpoints.
+"""
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from ..deltas import build_compact_analysis_payload
+from ..models import Analyse
+from .utils import ActiveBaselineMixin, synthetic_baseline, synthetic_life_list
+from core.baseline_index import SERVING_THRESHOLD
+from core.itinerary import plan_itinerary
+
+
+def plain_greedy(baseline, species_to_remove, k, weighted=False):
+    """
+    Glouton sans tas : à chaque étape, tous les pays sont réévalués.
+    """
+    rows = [
+        row for row in baseline["liste_blanks_records"]
+        if row.get("Species") and str(row["Species"]).strip().lower() not in species_to_remove
+    ]
+
+    def value(row, country):
+        value = float(row.get(country) or 0)
+        return value if value > SERVING_THRESHOLD else 0.0
+
+    best = [0.0] * len(rows)
+    chosen = []
+    for _ in range(k):
+        gains = {}
+        for country in baseline["blanks_country_cols"]:
+            if country in chosen:
+                continue
+            if weighted:
+                gains[country] = sum(max(value(row, country) - b, 0) for row, b in zip(rows, best))
+            else:
+                gains[country] = sum(1 for row, b in zip(rows, best) if value(row, country) and not b)
+        if not gains or max(gains.values()) <= 0:
+            break
+        country = max(gains, key=lambda name: (gains[name], -baseline["blanks_country_cols"].index(name)))
+        chosen.append(country)
+        best = [max(b, value(row, country)) if weighted else (b or value(row, country)) for row, b in zip(rows, best)]
+    return chosen, sum(1 for b in best if b)
+
+
+class ItineraryTests(TestCase):
+
+    def test_lazy_greedy_matches_plain_greedy(self):
+        baseline = synthetic_baseline()
+        life_list = synthetic_life_list(50, seed=2)
+        for weighted in (False, True):
+            plan = plan_itinerary(baseline, life_list, 4, weighted=weighted)
+            countries, covered = plain_greedy(baseline, life_list, 4, weighted=weighted)
+            self.assertEqual([step["country"] for step in plan["steps"]], countries, weighted)
+            self.assertEqual(plan["steps"][-1]["cumulative_species"], covered)
+        remaining = [
+            row for row in baseline["liste_blanks_records"]
+            if row.get("Species") and str(row["Species"]).strip().lower() not in life_list
+        ]
+        self.assertEqual(plan["total_blanks"], len(remaining))
+
+    def test_stops_when_nothing_is_left(self):
+        baseline = synthetic_baseline()
+        plan = plan_itinerary(baseline, set(), 50)
+        self.assertLess(len(plan["steps"]), 50)
+        self.assertEqual(plan["steps"][-1]["cumulative_species"], sum(step["new_species"] for step in plan["steps"]))
+
+
+class ItineraryViewTests(ActiveBaselineMixin, TestCase):
+
+    def test_analysis_itinerary(self):
+        analyse = Analyse.objects.create(
+            results_json=build_compact_analysis_payload({"eurasian hoopoe"}, self.baseline_version, self.baseline),
+        )
+        url = reverse("analyses:itinerary_json", args=[analyse.pk])
+        payload = self.client.get(url, {"k": 2}).json()
+        self.assertEqual(payload["k"], 2)
+        self.assertEqual([step["country"] for step in payload["steps"]], ["Ecuador", "France"])
+        self.assertEqual([step["new_species"] for step in payload["steps"]], [4, 1])
+        self.assertTrue(self.client.get(url, {"weighted": "1"}).json()["weighted"])
+
+    @override_settings(ITINERARY_MAX_COUNTRIES=2)
+    def test_invalid_requests(self):
+        self.assertEqual(self.client.get(reverse("analyses:baseline_itinerary_json"), {"k": "five"}).status_code, 400)
+        self.assertEqual(self.client.get(reverse("analyses:baseline_itinerary_json"), {"k": 9}).json()["k"], 2)
+        self.assertEqual(self.client.get(reverse("analyses:itinerary_json", args=[999])).status_code, 404)
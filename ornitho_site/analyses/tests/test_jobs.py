@@ -0,0 +1,112 @@
+"""
+File de jobs : transitions d'état, échecs, baux et accès au statut.
+"""
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from ..jobs import (
+    FAILED_JOB_RESULT_MODE,
+    JOB_HANDLERS,
+    claim_next_job,
+    enqueue_job,
+    heartbeat_jobs,
+    job_status_payload,
+    requeue_interrupted_jobs,
+    run_job,
+)
+from ..models import Analyse, Job
+from datetime import timedelta
+from unittest import mock
+
+
+class JobQueueTests(TestCase):
+
+    def test_job_runs_to_done(self):
+        with mock.patch.dict(JOB_HANDLERS, {"parse_upload": lambda job: {"ok": True}}):
+            job = enqueue_job("parse_upload", {"analyse_id": 0})
+            self.assertEqual(job.status, Job.STATUS_QUEUED)
+
+            claimed = claim_next_job()
+            self.assertEqual(claimed.pk, job.pk)
+            self.assertEqual(claimed.status, Job.STATUS_RUNNING)
+            self.assertTrue(claimed.runner)
+            self.assertIsNotNone(claimed.heartbeat)
+            self.assertIsNone(claim_next_job())
+
+            self.assertEqual(run_job(job.pk), Job.STATUS_DONE)
+        job.refresh_from_db()
+        self.assertEqual(job.result, {"ok": True})
+        self.assertTrue(job_status_payload(job)["done"])
+
+    def test_singleton_kinds_are_enqueued_once(self):
+        first = enqueue_job("reanalyse_all")
+        self.assertEqual(enqueue_job("reanalyse_all").pk, first.pk)
+        with self.assertRaises(ValueError):
+            enqueue_job("unknown")
+
+    def test_failed_upload_marks_analysis_failed(self):
+        analyse = Analyse.objects.create(life_list_file="life_lists/missing.csv")
+        job = enqueue_job("parse_upload", {"analyse_id": analyse.pk})
+        Analyse.objects.filter(pk=analyse.pk).update(results_json={"result_mode": "pending_job", "job_id": job.id})
+        url = reverse("analyses:section_summary_json", args=[analyse.pk])
+        self.assertEqual(self.client.get(url).status_code, 202)
+
+        claim_next_job()
+        self.assertEqual(run_job(job.pk), Job.STATUS_FAILED)
+
+        analyse.refresh_from_db()
+        self.assertEqual(analyse.results_json["result_mode"], FAILED_JOB_RESULT_MODE)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 422)
+        self.assertIn("FileNotFoundError", response.json()["detail"])
+        job.refresh_from_db()
+        payload = job_status_payload(job)
+        self.assertTrue(payload["failed"])
+        self.assertTrue(payload["error"].startswith("FileNotFoundError"))
+
+    @override_settings(JOB_LEASE_SECONDS=60)
+    def test_only_stale_jobs_are_requeued(self):
+        live = enqueue_job("parse_upload", {"analyse_id": 0})
+        stale = enqueue_job("parse_upload", {"analyse_id": 0})
+        claim_next_job()
+        claim_next_job()
+        Job.objects.filter(pk=stale.pk).update(heartbeat=timezone.now() - timedelta(minutes=5))
+        Job.objects.filter(pk=live.pk).update(heartbeat=timezone.now() - timedelta(minutes=5))
+        heartbeat_jobs([live.pk])
+
+        self.assertEqual(requeue_interrupted_jobs(), 1)
+        live.refresh_from_db()
+        stale.refresh_from_db()
+        self.assertEqual(live.status, Job.STATUS_RUNNING)
+        self.assertEqual(stale.status, Job.STATUS_QUEUED)
+        self.assertEqual((stale.runner, stale.heartbeat, stale.date_started), ("", None, None))
+
+
+class JobStatusViewTests(TestCase):
+
+    def setUp(self):
+        self.owner = User.objects.create_user("owner")
+        self.job = enqueue_job("rebuild_baseline", user=self.owner)
+        self.url = reverse("analyses:job_status", args=[self.job.pk])
+
+    def test_owner_and_staff_see_the_job(self):
+        self.client.force_login(self.owner)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["id"], self.job.pk)
+
+        self.client.force_login(User.objects.create_user("staff", is_staff=True))
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+
+    def test_other_users_are_forbidden(self):
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+        self.client.force_login(User.objects.create_user("other"))
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    def test_anonymous_upload_job_is_public(self):
+        job = enqueue_job("parse_upload", {"analyse_id": 0})
+        self.assertEqual(self.client.get(reverse("analyses:job_status", args=[job.pk])).status_code, 200)
+        self.assertEqual(self.client.get(reverse("analyses:job_status", args=[job.pk + 100])).status_code, 404)
@@ -0,0 +1,64 @@
+"""
+Harnais de test de charge : mix de requêtes, statistiques et base de test.
+"""
+
+from django.test import TestCase, override_settings
+
+from ..baselines import _BASELINE_CACHE
+from ..loadtest import DEFAULT_MIX, parse_mix, percentile, seed_load_test_db, summarize_samples
+from ..models import Analyse
+from .utils import small_baseline
+from core.synthetic import make_synthetic_life_list_csv
+import json
+import os
+import tempfile
+
+
+class LoadTestHelpersTests(TestCase):
+
+    def test_parse_mix(self):
+        self.assertEqual(parse_mix(""), DEFAULT_MIX)
+        self.assertEqual(parse_mix("home=5,upload"), {"home": 5.0, "upload": 1.0})
+        with self.assertRaises(ValueError):
+            parse_mix("unknown=1")
+
+    def test_percentile_is_nearest_rank(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([7.0], 95), 7.0)
+        self.assertIsNone(percentile([], 50))
+
+    def test_summarize_counts_errors_per_kind(self):
+        summary = summarize_samples([
+            ("home", 200, 10.0),
+            ("home", 500, 30.0),
+            ("upload", None, 50.0),
+        ], elapsed=2.0)
+        self.assertEqual(summary["total"]["count"], 3)
+        self.assertEqual(summary["total"]["errors"], 2)
+        self.assertEqual(summary["total"]["throughput_rps"], 1.5)
+        self.assertEqual(summary["by_kind"]["home"]["p50_ms"], 10.0)
+        self.assertEqual(summary["by_kind"]["upload"]["errors"], 1)
+
+
+class SeedLoadTestDbTests(TestCase):
+
+    def test_seeds_users_sessions_and_analyses(self):
+        with tempfile.TemporaryDirectory() as tmp_dir, \
+                override_settings(BASE_DIR=tmp_dir, BASELINE_ARTIFACT_DIR=tmp_dir):
+            self.addCleanup(_BASELINE_CACHE.clear)
+            baseline_path = os.path.join(tmp_dir, "baseline.json")
+            with open(baseline_path, "w", encoding="utf-8") as f:
+                json.dump(small_baseline(), f)
+            life_list_path = os.path.join(tmp_dir, "life_list.csv")
+            with open(life_list_path, "wb") as f:
+                f.write(make_synthetic_life_list_csv(3, ["Black Kite", "Wallcreeper", "Andean Condor"]))
+
+            manifest = seed_load_test_db(2, 5, [life_list_path], baseline_json_path=baseline_path)
+
+        self.assertEqual(len(manifest["users"]), 2)
+        self.assertEqual(sum(len(user["analyses"]) for user in manifest["users"]), 5)
+        self.assertEqual(manifest["countries"], ["Ecuador", "France", "Spain"])
+        self.assertEqual(Analyse.objects.count(), 5)
+        self.assertEqual(Analyse.objects.first().results_json["lifelist_count"], 3)
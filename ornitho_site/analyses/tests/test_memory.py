@@ -0,0 +1,51 @@
+"""
+Comptabilité mémoire : tailles profondes et en-tête X-Peak-Alloc.
+"""
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from .utils import ActiveBaselineMixin
+from core.memory import PEAK_ALLOC_HISTOGRAMS, deep_sizeof, structure_breakdown
+import numpy as np
+import sys
+import tracemalloc
+
+
+class DeepSizeofTests(TestCase):
+
+    def test_counts_referenced_objects_once(self):
+        array = np.zeros(1000, dtype=np.float64)
+        self.assertGreaterEqual(deep_sizeof({"a": array}), array.nbytes)
+        shared = ["x" * 1000]
+        rows = dict(structure_breakdown({"first": {"k": shared}, "second": [shared]}))
+        self.assertGreater(rows["first"], rows["second"])
+        self.assertEqual(rows["second"], sys.getsizeof([shared]))
+
+    def test_views_count_their_base_data_once(self):
+        array = np.zeros(1000, dtype=np.float64)
+        self.assertLess(deep_sizeof(array[:10]), array.nbytes + 1000)
+
+
+class PeakAllocationMiddlewareTests(ActiveBaselineMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        PEAK_ALLOC_HISTOGRAMS.reset()
+        self.addCleanup(PEAK_ALLOC_HISTOGRAMS.reset)
+
+    @override_settings(TRACEMALLOC_SAMPLE_RATE=1.0)
+    def test_sampled_request_reports_peak_allocation(self):
+        response = self.client.get(reverse("analyses:baseline_section_summary_json"))
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(int(response["X-Peak-Alloc"]), 0)
+        self.assertFalse(tracemalloc.is_tracing())
+
+        self.client.force_login(User.objects.create_user("staff", is_staff=True))
+        metrics = self.client.get(reverse("analyses:metrics")).content.decode()
+        self.assertIn('ornitho_request_peak_alloc_bytes_count{view="analyses:baseline_section_summary_json"', metrics)
+
+    def test_unsampled_request_has_no_header(self):
+        response = self.client.get(reverse("analyses:baseline_section_summary_json"))
+        self.assertNotIn("X-Peak-Alloc", response)
@@ -0,0 +1,195 @@
+"""
+Précalcul des résumés d'analyses (``analyses.precompute``).
+"""
+
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from ..baselines import promote_baseline_version, publish_baseline_version
+from ..deltas import build_compact_analysis_payload
+from ..models import Analyse, AnalysisSummary
+from ..precompute import (
+    SUMMARY_FIELDS,
+    build_analysis_summary,
+    get_analysis_summary,
+    patch_analysis_summary,
+    recent_analysis_ids,
+    touch_analysis,
+)
+from .utils import ActiveBaselineMixin, small_baseline, synthetic_baseline, synthetic_life_list
+from core.baseline_index import get_baseline_index
+from core.serving import (
+    blanks_by_country_from_offsets,
+    blanks_by_country_rows,
+    compute_summary_from_baseline_delta,
+    country_rank_offsets,
+    filter_upload_results,
+    patch_summary_from_delta,
+)
+from core.species_delta import changed_bitmap_rows, decode_species_bitmap, encode_species_bitmap
+import io
+import numpy as np
+
+
+class RankOffsetsTests(TestCase):
+
+    def test_offsets_serve_like_blanks_by_country(self):
+        baseline = synthetic_baseline()
+        life_list = synthetic_life_list(80, seed=5)
+        offsets = country_rank_offsets(baseline, life_list)
+        filtered = filter_upload_results(baseline, life_list)
+        for country in baseline["blanks_country_cols"] + ["Atlantis"]:
+            self.assertEqual(
+                blanks_by_country_from_offsets(baseline, offsets, country),
+                blanks_by_country_rows(filtered["liste_blanks_records"], filtered["blancks_par_pays"], country),
+                country,
+            )
+
+
+class PatchSummaryTests(TestCase):
+
+    def patch(self, baseline, previous_names, names):
+        index = get_baseline_index(baseline)
+        n_rows = len(index["species_keys"])
+        previous_bitmap = encode_species_bitmap(index, previous_names)[0]
+        bitmap = encode_species_bitmap(index, names)[0]
+        newly_seen, unseen = changed_bitmap_rows(previous_bitmap, bitmap, n_rows)
+
+        previous_removed = decode_species_bitmap(previous_bitmap, n_rows)
+        removed = decode_species_bitmap(bitmap, n_rows)
+        np.testing.assert_array_equal(newly_seen, np.flatnonzero(removed & ~previous_removed))
+        np.testing.assert_array_equal(unseen, np.flatnonzero(previous_removed & ~removed))
+
+        previous = compute_summary_from_baseline_delta(baseline, previous_names)
+        return patch_summary_from_delta(
+            baseline,
+            {field: previous[field] for field in SUMMARY_FIELDS},
+            country_rank_offsets(baseline, previous_names),
+            previous_removed,
+            newly_seen,
+            unseen,
+        )
+
+    def assertPatched(self, baseline, previous_names, names):
+        summary, offsets = self.patch(baseline, previous_names, names)
+        expected = compute_summary_from_baseline_delta(baseline, names)
+        for field in SUMMARY_FIELDS:
+            self.assertEqual(summary[field], expected[field], field)
+        self.assertEqual(offsets, country_rank_offsets(baseline, names))
+
+    def test_patch_matches_full_computation(self):
+        baseline = synthetic_baseline()
+        previous = synthetic_life_list(120, seed=7)
+        rng = np.random.default_rng(7)
+        dropped = set(rng.choice(sorted(previous), size=15, replace=False).tolist())
+        names = (previous - dropped) | synthetic_life_list(20, seed=8)
+        self.assertPatched(baseline, previous, names)
+        self.assertPatched(baseline, names, previous)
+
+    def test_edge_cases(self):
+        baseline = synthetic_baseline()
+        life_list = synthetic_life_list(60, seed=9)
+        self.assertPatched(baseline, life_list, life_list)
+        self.assertPatched(baseline, set(), life_list)
+        self.assertPatched(baseline, life_list, set())
+        self.assertPatched(small_baseline(), {"black kite"}, {"wallcreeper", "eurasian hoopoe"})
+
+
+class PrecomputeTests(ActiveBaselineMixin, TestCase):
+
+    def create_analysis(self, names=("black kite",), accessed_days_ago=0):
+        return Analyse.objects.create(
+            results_json=build_compact_analysis_payload(set(names), self.baseline_version, self.baseline),
+            last_accessed=timezone.now() - timedelta(days=accessed_days_ago),
+        )
+
+    @override_settings(ANALYSIS_ACCESS_RESOLUTION=300)
+    def test_touch_is_rate_limited(self):
+        analyse = self.create_analysis(accessed_days_ago=1)
+        touch_analysis(analyse)
+        first = Analyse.objects.get(pk=analyse.pk).last_accessed
+        self.assertGreater(first, timezone.now() - timedelta(minutes=1))
+        touch_analysis(Analyse.objects.get(pk=analyse.pk))
+        self.assertEqual(Analyse.objects.get(pk=analyse.pk).last_accessed, first)
+
+    def test_stored_summary_is_served_identically(self):
+        analyse = self.create_analysis()
+        url = reverse("analyses:section_summary_json", args=[analyse.pk])
+        by_country_url = reverse("analyses:section_blanks_by_country_json", args=[analyse.pk])
+        computed = self.client.get(url).content
+        computed_by_country = self.client.get(by_country_url, {"country": "Spain"}).content
+
+        self.assertEqual(build_analysis_summary(analyse), self.baseline_version)
+        self.assertIsNotNone(get_analysis_summary(analyse, self.baseline_version))
+        self.assertEqual(self.client.get(url).content, computed)
+        self.assertEqual(self.client.get(by_country_url, {"country": "Spain"}).content, computed_by_country)
+
+    def test_new_version_replaces_summary(self):
+        analyse = self.create_analysis()
+        build_analysis_summary(analyse)
+        other = publish_baseline_version(small_baseline("0.07"))
+        promote_baseline_version(other)
+
+        self.assertIsNone(get_analysis_summary(analyse, other))
+        self.assertEqual(build_analysis_summary(Analyse.objects.get(pk=analyse.pk)), other)
+        self.assertEqual(list(AnalysisSummary.objects.filter(analyse=analyse).values_list("version", flat=True)), [other.pk])
+
+    @override_settings(PRECOMPUTE_RECENT_DAYS=30)
+    def test_command_precomputes_recent_analyses(self):
+        recent = self.create_analysis(accessed_days_ago=1)
+        latest = self.create_analysis(("wallcreeper",))
+        self.create_analysis(accessed_days_ago=60)
+        not_compact = Analyse.objects.create(last_accessed=timezone.now())
+        self.assertEqual(recent_analysis_ids(), [not_compact.pk, latest.pk, recent.pk])
+
+        stdout = io.StringIO()
+        call_command("precompute_summaries", workers=1, duty_cycle=1.0, stdout=stdout)
+        self.assertIn("Stored: 2, skipped: 1, missing: 0, failed: 0", stdout.getvalue())
+        self.assertEqual(
+            set(AnalysisSummary.objects.values_list("analyse_id", flat=True)),
+            {recent.pk, latest.pk},
+        )
+
+
+class PatchAnalysisSummaryTests(ActiveBaselineMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user("alice", password="pw")
+
+    def create_analysis(self, names, compact_v2=True):
+        return Analyse.objects.create(
+            user=self.user,
+            results_json=build_compact_analysis_payload(
+                set(names),
+                self.baseline_version if compact_v2 else None,
+                self.baseline if compact_v2 else None,
+            ),
+        )
+
+    def test_summary_is_derived_from_previous_upload(self):
+        previous = self.create_analysis({"black kite", "torrent duck"})
+        build_analysis_summary(previous)
+        analyse = self.create_analysis({"black kite", "wallcreeper"})
+        self.assertEqual(patch_analysis_summary(analyse), self.baseline_version)
+
+        patched = AnalysisSummary.objects.get(analyse=analyse)
+        build_analysis_summary(analyse)
+        computed = AnalysisSummary.objects.get(analyse=analyse)
+        self.assertEqual(patched.summary_json, computed.summary_json)
+        self.assertEqual(patched.rank_offsets_json, computed.rank_offsets_json)
+
+    def test_only_latest_upload_with_summary_is_used(self):
+        older = self.create_analysis({"black kite"})
+        build_analysis_summary(older)
+        self.create_analysis({"wallcreeper"})
+        self.assertIsNone(patch_analysis_summary(self.create_analysis({"eurasian hoopoe"})))
+
+        latest = self.create_analysis({"black kite"}, compact_v2=False)
+        build_analysis_summary(latest)
+        self.assertIsNone(patch_analysis_summary(self.create_analysis({"black kite"})))
+        self.assertFalse(AnalysisSummary.objects.exclude(analyse__in=[older, latest]).exists())
@@ -0,0 +1,52 @@
+"""
+Profilage à la demande : en-tête X-Profile-Id et ``list_profiles``.
+"""
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from ..profiling import list_profiles
+from .utils import ActiveBaselineMixin
+import io
+import os
+import tempfile
+
+
+class ProfilerMiddlewareTests(ActiveBaselineMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        profile_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(profile_dir.cleanup)
+        self.profile_dir = profile_dir.name
+        settings_override = override_settings(PROFILE_OUTPUT_DIR=self.profile_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.url = reverse("analyses:baseline_section_summary_json")
+
+    def test_staff_request_is_profiled(self):
+        self.client.force_login(User.objects.create_user("staff", is_staff=True))
+        for flag, extension in (("1", ".pstats"), ("sample", ".collapsed")):
+            with self.subTest(flag=flag):
+                response = self.client.get(self.url, {"profile": flag})
+                self.assertEqual(response.status_code, 200)
+                profile_id = response["X-Profile-Id"]
+                self.assertTrue(os.path.exists(os.path.join(self.profile_dir, profile_id + extension)))
+
+        profiles = list_profiles()
+        self.assertEqual(len(profiles), 2)
+        self.assertEqual({meta["view"] for meta in profiles}, {"analyses:baseline_section_summary_json"})
+
+        stdout = io.StringIO()
+        call_command("list_profiles", "--show", profiles[-1]["id"], "--top", "5", stdout=stdout)
+        self.assertIn("Full profile", stdout.getvalue())
+
+    def test_other_users_are_not_profiled(self):
+        self.assertNotIn("X-Profile-Id", self.client.get(self.url, {"profile": "1"}))
+        self.client.force_login(User.objects.create_user("user"))
+        self.assertNotIn("X-Profile-Id", self.client.get(self.url, {"profile": "1"}))
+        self.client.force_login(User.objects.create_user("staff", is_staff=True))
+        self.assertNotIn("X-Profile-Id", self.client.get(self.url, {"profile": "unknown"}))
+        self.assertEqual(list_profiles(), [])
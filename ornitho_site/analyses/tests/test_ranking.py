@@ -0,0 +1,76 @@
+"""
+Classement des pays par gain attendu (``section/ranking/``).
+"""
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from ..baselines import _BASELINE_CACHE
+from ..deltas import build_compact_analysis_payload
+from ..models import Analyse
+from .utils import ActiveBaselineMixin, synthetic_baseline, synthetic_life_list
+from core.baseline_index import SERVING_THRESHOLD
+from core.serving import rank_countries_by_expected_gain
+import tempfile
+
+
+class ExpectedGainTests(TestCase):
+
+    def test_scores_match_row_sums(self):
+        baseline = synthetic_baseline()
+        life_list = synthetic_life_list(70, seed=4)
+        expected = {}
+        for country in baseline["blanks_country_cols"]:
+            expected[country] = sum(
+                float(row.get(country) or 0)
+                for row in baseline["liste_blanks_records"]
+                if row.get("Species")
+                and str(row["Species"]).strip().lower() not in life_list
+                and float(row.get(country) or 0) > SERVING_THRESHOLD
+            )
+
+        ranking, n_candidates = rank_countries_by_expected_gain(baseline, life_list)
+        self.assertEqual(n_candidates, len(expected))
+        for row in ranking:
+            self.assertAlmostEqual(row["Expected_Gain"], expected[row["Country"]], places=2)
+        gains = [row["Expected_Gain"] for row in ranking]
+        self.assertEqual(gains, sorted(gains, reverse=True))
+
+        top, _ = rank_countries_by_expected_gain(baseline, life_list, k=3)
+        self.assertEqual(top, ranking[:3])
+        continent = ranking[0]["Continent"]
+        filtered, n_candidates = rank_countries_by_expected_gain(baseline, life_list, continent=continent)
+        self.assertEqual(filtered, [row for row in ranking if row["Continent"] == continent])
+        self.assertEqual(n_candidates, len(filtered))
+
+
+class RankingViewTests(ActiveBaselineMixin, TestCase):
+
+    def test_analysis_ranking(self):
+        analyse = Analyse.objects.create(
+            results_json=build_compact_analysis_payload({"black kite"}, self.baseline_version, self.baseline),
+        )
+        payload = self.client.get(reverse("analyses:section_ranking_json", args=[analyse.pk]), {"k": 2}).json()
+        self.assertEqual([row["Country"] for row in payload["ranking"]], ["Spain", "France"])
+        self.assertEqual(payload["total_count"], 3)
+        self.assertEqual(payload["gain_max"], payload["ranking"][0]["Expected_Gain"])
+
+        payload = self.client.get(
+            reverse("analyses:section_ranking_json", args=[analyse.pk]), {"k": 0, "continent": "Europe"},
+        ).json()
+        self.assertEqual({row["Country"] for row in payload["ranking"]}, {"France", "Spain"})
+
+    def test_invalid_requests(self):
+        self.assertEqual(self.client.get(reverse("analyses:baseline_section_ranking_json"), {"k": "x"}).status_code, 400)
+        self.assertEqual(self.client.get(reverse("analyses:section_ranking_json", args=[999])).status_code, 404)
+
+
+class RankingWithoutBaselineTests(TestCase):
+
+    def test_baseline_ranking_unavailable(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        _BASELINE_CACHE.clear()
+        with override_settings(BASE_DIR=tmp_dir.name, BASELINE_ARTIFACT_DIR=tmp_dir.name):
+            response = self.client.get(reverse("analyses:baseline_section_ranking_json"))
+        self.assertEqual(response.status_code, 503)
@@ -0,0 +1,129 @@
+"""
+Espèces cibles régionales : cumuls région -> pays -> continent et endpoints
+``section/regions/``.
+"""
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from ..deltas import build_compact_analysis_payload
+from ..models import Analyse
+from .utils import ActiveBaselineMixin, synthetic_baseline, synthetic_life_list
+from core.regions import LEVELS, build_region_index, read_region_targets, region_records
+from core.serving import compute_summary_from_baseline_delta
+from core.synthetic import make_synthetic_region_targets
+from core.world_matrix import compile_world_matrix, compute_results_from_compiled
+import numpy as np
+import os
+import pandas as pd
+
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fixtures")
+REGION_TARGETS_SAMPLE = os.path.join(FIXTURES_DIR, "region_targets_sample.csv")
+
+
+class RegionRollupTests(TestCase):
+    """
+    Cumuls région -> pays -> continent face aux agrégats par pays.
+    """
+
+    def assert_rollups_match_summary(self, baseline, region_index, species_to_remove):
+        summary = compute_summary_from_baseline_delta(baseline, species_to_remove)
+        countries = {
+            row["Name"]: row for row in region_records(baseline, region_index, species_to_remove, "country")
+        }
+        for row in summary["liste_pays_records"]:
+            if not row["Total_Species"]:
+                continue
+            self.assertEqual(countries[row["Country"]]["Parent"], row["Continent"])
+            self.assertEqual(countries[row["Country"]]["Total_Species"], row["Total_Species"])
+            self.assertEqual(countries[row["Country"]]["Species_Above_00009"], row["Species_Above_00009"])
+        continents = {
+            row["Name"]: row["Total_Species"]
+            for row in region_records(baseline, region_index, species_to_remove, "continent")
+        }
+        self.assertEqual(
+            continents,
+            {row["Continent"]: row["Total_Species"] for row in summary["continents_records"]},
+        )
+
+    def test_synthetic_rollups_match_country_summary(self):
+        baseline = synthetic_baseline()
+        region_index = build_region_index(baseline, make_synthetic_region_targets(baseline, seed=12))
+        self.assertEqual(region_index["unmatched"], 0)
+        for species_to_remove in (set(), synthetic_life_list(120, seed=13)):
+            with self.subTest(n_removed=len(species_to_remove)):
+                self.assert_rollups_match_summary(baseline, region_index, species_to_remove)
+
+    def test_region_level_filters_by_country(self):
+        baseline = synthetic_baseline()
+        region_index = build_region_index(baseline, make_synthetic_region_targets(baseline, seed=12))
+        records = region_records(baseline, region_index, set(), "region", parent="Country 004")
+        self.assertTrue(records)
+        self.assertEqual({row["Parent"] for row in records}, {"Country 004"})
+        self.assertEqual(set(LEVELS), set(region_index["levels"]))
+
+    def test_fixture_rollups_match_country_summary(self):
+        # Petit DV couvert entièrement par le CSV régional de test.
+        dv = pd.DataFrame([
+            ["France", "Europe", "Spain", "Europe", "Ecuador", "South America"],
+            ["Eurasian Hoopoe", "0.05", "Eurasian Hoopoe", "0.12", "Andean Condor", "0.01"],
+            ["Black Kite", "0.02", "Black Kite", "0.04", "Sword-billed Hummingbird", "0.002"],
+            ["Wallcreeper", "0.0005", "Iberian Green Woodpecker", "0.03", np.nan, np.nan],
+        ])
+        baseline = compute_results_from_compiled(compile_world_matrix(dv))
+        region_rows = read_region_targets(REGION_TARGETS_SAMPLE)
+        region_index = build_region_index(baseline, region_rows, {"Republic of Ecuador": "Ecuador"})
+
+        # Espèce inconnue, et FR-OCC revendiquée par un second pays.
+        self.assertEqual(region_index["unmatched"], 2)
+        regions = region_index["levels"]["region"]
+        self.assertEqual(
+            {name: regions["parents"][idx] for idx, name in enumerate(regions["names"])},
+            {"FR-OCC": 0, "FR-PAC": 0, "ES-AN": 1, "ES-CL": 1, "EC-A": 2, "EC-P": 2},
+        )
+        for species_to_remove in (set(), {"black kite", "andean condor"}):
+            with self.subTest(species_to_remove=species_to_remove):
+                self.assert_rollups_match_summary(baseline, region_index, species_to_remove)
+        self.assertEqual(
+            region_records(baseline, region_index, {"black kite"}, "region", parent="Spain"),
+            [
+                {"Name": "ES-AN", "Parent": "Spain", "Total_Species": 1, "Species_Above_00009": 1},
+                {"Name": "ES-CL", "Parent": "Spain", "Total_Species": 1, "Species_Above_00009": 1},
+            ],
+        )
+
+
+@override_settings(REGION_TARGET_SPECIES_PATH=REGION_TARGETS_SAMPLE)
+class RegionViewTests(ActiveBaselineMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.analyse = Analyse.objects.create(
+            results_json=build_compact_analysis_payload({"black kite"}, self.baseline_version, self.baseline),
+        )
+        self.url = reverse("analyses:section_regions_json", args=[self.analyse.pk])
+
+    def test_regions_of_a_country(self):
+        payload = self.client.get(self.url, {"parent": "Spain"}).json()
+        self.assertEqual(payload["level"], "region")
+        self.assertEqual([row["Name"] for row in payload["records"]], ["ES-AN", "ES-CL"])
+        self.assertEqual([row["Total_Species"] for row in payload["records"]], [1, 1])
+
+        baseline = self.client.get(reverse("analyses:baseline_section_regions_json"), {"parent": "Spain"}).json()
+        self.assertEqual([row["Total_Species"] for row in baseline["records"]], [2, 2])
+
+    def test_invalid_requests(self):
+        self.assertEqual(self.client.get(self.url, {"level": "county"}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {"as_of": "yesterday"}).status_code, 400)
+        url = reverse("analyses:section_regions_json", args=[self.analyse.pk + 99])
+        self.assertEqual(self.client.get(url).status_code, 404)
+        with override_settings(REGION_TARGET_SPECIES_PATH=os.path.join(self.tmp_dir, "missing.csv")):
+            self.assertEqual(self.client.get(self.url).status_code, 503)
+
+    def test_malformed_file_answers_503(self):
+        path = os.path.join(self.tmp_dir, "regions.csv")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("Species,Country\nBlack Kite,Spain\n")
+        with override_settings(REGION_TARGET_SPECIES_PATH=path), self.assertLogs("analyses.baselines", "WARNING"):
+            self.assertEqual(self.client.get(self.url).status_code, 503)
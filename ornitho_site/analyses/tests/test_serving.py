@@ -0,0 +1,164 @@
+"""
+Chemins de service (``core.serving``) face à l'ancien calcul pandas.
+"""
+
+from django.test import TestCase
+
+from .utils import small_baseline, synthetic_baseline, synthetic_life_list
+from core.baseline_index import SERVING_THRESHOLD, blanks_sort_key
+from core.serving import (
+    blanks_by_country_rows,
+    compute_summary_from_baseline_delta,
+    filter_upload_results,
+    filtered_baseline_rows,
+    paginate_blanks,
+)
+from core.world_blanks import normalize_species_name
+import os
+import pandas as pd
+import subprocess
+import sys
+
+
+SUMMARY_FIELDS = (
+    "liste_pays_records",
+    "continents_records",
+    "pays_stats",
+    "country_continents",
+    "species_min",
+    "species_max",
+    "blancks_par_pays",
+    "pays_list",
+)
+
+
+def reference_filter_upload_results(baseline_results, species_to_remove, threshold=SERVING_THRESHOLD):
+    """
+    Ancien ``filter_upload_results`` (copie des lignes + DataFrame pandas),
+    réduit aux champs comparés.
+    """
+    filtered = [
+        row for row in baseline_results["liste_blanks_records"]
+        if normalize_species_name(row.get("Species")) not in species_to_remove
+    ]
+    filtered.sort(key=blanks_sort_key)
+    country_cols = baseline_results["blanks_country_cols"]
+    country_continents = baseline_results["country_continents"]
+
+    df = pd.DataFrame(filtered)
+    values = df[country_cols].apply(pd.to_numeric, errors="coerce").fillna(0.0)
+    present = values.gt(0.0)
+    above = values.gt(float(threshold))
+    max_counts = df["Max_Percentage_Country"].fillna("").value_counts()
+
+    liste_pays_records = [
+        {
+            "Country": country,
+            "Continent": country_continents.get(country),
+            "Total_Species": int(present[country].sum()),
+            "Species_Above_00009": int(above[country].sum()),
+            "Max_Species_Count": int(max_counts.get(country, 0)),
+        }
+        for country in country_cols
+    ]
+    liste_pays_records.sort(key=lambda r: (-r["Total_Species"], str(r["Country"]).lower()))
+
+    continent_presence = {}
+    for country in country_cols:
+        continent = country_continents.get(country)
+        if continent:
+            continent_presence.setdefault(continent, []).append(country)
+    presence = pd.DataFrame({
+        continent: present[countries].any(axis=1) for continent, countries in continent_presence.items()
+    })
+    n_continents = presence.sum(axis=1)
+    continents_records = sorted(
+        (
+            {
+                "Continent": continent,
+                "Total_Species": int(presence[continent].sum()),
+                "Unique_Species": int((presence[continent] & n_continents.eq(1)).sum()),
+            }
+            for continent in presence.columns
+        ),
+        key=lambda r: str(r["Continent"]).lower(),
+    )
+
+    blancks_par_pays = {}
+    for row in filtered:
+        country = row.get("Max_Percentage_Country")
+        if country in country_cols:
+            blancks_par_pays.setdefault(country, []).append({
+                "species": row.get("Species") or "",
+                "value": float(pd.to_numeric(row.get(country), errors="coerce") or 0.0),
+            })
+    for rows in blancks_par_pays.values():
+        rows.sort(key=lambda r: (-r["value"], r["species"]))
+
+    return {
+        "species": [row["Species"] for row in filtered],
+        "liste_pays_records": liste_pays_records,
+        "continents_records": continents_records,
+        "blancks_par_pays": blancks_par_pays,
+    }
+
+
+class ServingEquivalenceTests(TestCase):
+
+    def test_filter_upload_results_matches_pandas_reference(self):
+        baseline = synthetic_baseline()
+        for species_to_remove in (set(), synthetic_life_list(120, seed=3, extra={"not a bird"})):
+            with self.subTest(n_removed=len(species_to_remove)):
+                expected = reference_filter_upload_results(baseline, species_to_remove)
+                results = filter_upload_results(baseline, species_to_remove)
+                self.assertEqual([row["Species"] for row in results["liste_blanks_records"]], expected["species"])
+                self.assertEqual(results["liste_pays_records"], expected["liste_pays_records"])
+                self.assertEqual(results["continents_records"], expected["continents_records"])
+                self.assertEqual(results["blancks_par_pays"], expected["blancks_par_pays"])
+                self.assertEqual(results["pays_list"], sorted(expected["blancks_par_pays"]))
+
+    def test_summary_from_delta_matches_filter_upload_results(self):
+        baseline = synthetic_baseline()
+        species_to_remove = synthetic_life_list(120, seed=3)
+        results = filter_upload_results(baseline, species_to_remove)
+        summary = compute_summary_from_baseline_delta(baseline, species_to_remove)
+        for field in SUMMARY_FIELDS:
+            with self.subTest(field=field):
+                self.assertEqual(summary[field], results[field])
+
+    def test_filtered_rows_are_shared_baseline_rows(self):
+        baseline = small_baseline()
+        rows = filtered_baseline_rows(baseline, {"black kite"})
+        self.assertEqual(len(rows), len(baseline["liste_blanks_records"]) - 1)
+        self.assertTrue(all(any(row is shared for shared in baseline["liste_blanks_records"]) for row in rows))
+
+
+class BlanksPaginationTests(TestCase):
+
+    def test_search_country_and_pages(self):
+        baseline = small_baseline()
+        rows = baseline["liste_blanks_records"]
+        total, page = paginate_blanks(rows, country="Spain", page=1, page_size=2)
+        self.assertEqual(total, 3)
+        self.assertEqual([row["Species"] for row in page], ["Black Kite", "Eurasian Hoopoe"])
+        self.assertEqual([row["_global_rank"] for row in page], [1, 2])
+        self.assertNotIn("_global_rank", rows[0])
+
+        total, page = paginate_blanks(rows, country="Spain", page=2, page_size=2)
+        self.assertEqual((total, [row["_global_rank"] for row in page]), (3, [3]))
+        self.assertEqual(paginate_blanks(rows, search="kite")[0], 1)
+
+    def test_blanks_by_country_carry_global_rank(self):
+        baseline = small_baseline()
+        rows = blanks_by_country_rows(baseline["liste_blanks_records"], baseline["blancks_par_pays"], "Spain")
+        self.assertEqual([row["species"] for row in rows], ["Black Kite", "Eurasian Hoopoe", "Iberian Green Woodpecker"])
+        self.assertEqual([row["global_rank"] for row in rows], sorted(row["global_rank"] for row in rows))
+        self.assertEqual(blanks_by_country_rows(baseline["liste_blanks_records"], baseline["blancks_par_pays"], "Peru"), [])
+
+
+class ServingImportTests(TestCase):
+
+    def test_serving_path_does_not_import_pandas(self):
+        code = "import sys, core.serving, analyses; sys.exit('pandas' in sys.modules)"
+        project_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        self.assertEqual(subprocess.run([sys.executable, "-c", code], cwd=project_dir).returncode, 0)
@@ -0,0 +1,94 @@
+"""
+Delta compact d'une life list (``species_delta_v2``) : bitmap sur les lignes
+du baseline, résolution et réencodage des payloads.
+"""
+
+from django.test import TestCase
+
+from ..baselines import publish_baseline_version
+from ..deltas import DELTA_V1, DELTA_V2, analysis_species_delta, build_compact_analysis_payload, payload_species_names
+from ..models import Analyse
+from .test_serving import SUMMARY_FIELDS
+from .utils import ActiveBaselineMixin, small_baseline, synthetic_baseline, synthetic_life_list
+from core.baseline_index import get_baseline_index
+from core.serving import compute_summary_from_baseline_delta, filter_upload_results
+from core.species_delta import decode_species_bitmap, encode_species_bitmap, species_names_from_bitmap
+import numpy as np
+
+
+class SpeciesBitmapTests(TestCase):
+
+    def test_round_trip(self):
+        index = get_baseline_index(synthetic_baseline())
+        life_list = synthetic_life_list(40, extra=["not a baseline species"])
+        bitmap, overflow = encode_species_bitmap(index, life_list)
+        self.assertEqual(overflow, ["not a baseline species"])
+
+        mask = decode_species_bitmap(bitmap, len(index["species_keys"]))
+        expected = np.array([key in life_list for key in index["species_keys"]])
+        np.testing.assert_array_equal(mask, expected)
+        self.assertEqual(species_names_from_bitmap(index, bitmap, overflow), life_list)
+        with self.assertRaises(ValueError):
+            decode_species_bitmap(bitmap, len(index["species_keys"]) + 8)
+
+    def test_row_mask_serves_like_names(self):
+        baseline = synthetic_baseline()
+        index = get_baseline_index(baseline)
+        life_list = synthetic_life_list(60, seed=3)
+        mask = decode_species_bitmap(encode_species_bitmap(index, life_list)[0], len(index["species_keys"]))
+
+        by_names = filter_upload_results(baseline, life_list)
+        by_mask = filter_upload_results(baseline, mask)
+        self.assertEqual(by_mask["liste_blanks_records"], by_names["liste_blanks_records"])
+        by_names = compute_summary_from_baseline_delta(baseline, life_list)
+        by_mask = compute_summary_from_baseline_delta(baseline, mask)
+        for field in SUMMARY_FIELDS:
+            self.assertEqual(by_mask[field], by_names[field], field)
+
+
+class CompactPayloadTests(ActiveBaselineMixin, TestCase):
+
+    life_list = {"black kite", "wallcreeper", "snowy owl"}
+
+    def test_payload_versions(self):
+        v1 = build_compact_analysis_payload(self.life_list)
+        self.assertEqual(v1["result_mode"], DELTA_V1)
+        self.assertEqual(payload_species_names(v1), self.life_list)
+
+        v2 = build_compact_analysis_payload(self.life_list, self.baseline_version, self.baseline)
+        self.assertEqual(v2["result_mode"], DELTA_V2)
+        self.assertEqual(v2["baseline_hash"], self.baseline_version.content_hash)
+        self.assertEqual(v2["overflow"], ["snowy owl"])
+        self.assertEqual(payload_species_names(v2), self.life_list)
+
+    def test_same_version_decodes_to_mask(self):
+        payload = build_compact_analysis_payload(self.life_list, self.baseline_version, self.baseline)
+        analyse = Analyse.objects.create(results_json=payload)
+        delta = analysis_species_delta(analyse, payload, self.baseline_version, self.baseline)
+        self.assertEqual(delta.dtype, bool)
+        self.assertEqual(int(delta.sum()), 2)
+
+    def test_other_version_is_reencoded(self):
+        other_results = small_baseline("0.07")
+        other = publish_baseline_version(other_results)
+        payload = build_compact_analysis_payload(self.life_list, other, other_results)
+        analyse = Analyse.objects.create(results_json=payload)
+
+        names = analysis_species_delta(analyse, payload, self.baseline_version, self.baseline)
+        self.assertEqual(names, self.life_list)
+        analyse.refresh_from_db()
+        self.assertEqual(analyse.results_json["baseline_hash"], self.baseline_version.content_hash)
+
+    def test_missing_version_uses_fallback(self):
+        payload = build_compact_analysis_payload(self.life_list, self.baseline_version, self.baseline)
+        payload["baseline_hash"] = "0" * 64
+        analyse = Analyse.objects.create(results_json=payload)
+        with self.assertRaises(ValueError):
+            analysis_species_delta(analyse, payload, self.baseline_version, self.baseline)
+
+        names = analysis_species_delta(
+            analyse, payload, self.baseline_version, self.baseline, fallback=lambda: {"wallcreeper": 0},
+        )
+        self.assertEqual(names, {"wallcreeper"})
+        analyse.refresh_from_db()
+        self.assertEqual(payload_species_names(analyse.results_json), {"wallcreeper"})
@@ -0,0 +1,59 @@
+"""
+Fiche espèce (``species/``) sur l'index espèce -> pays.
+"""
+
+from django.test import TestCase
+from django.urls import reverse
+
+from ..deltas import build_compact_analysis_payload
+from ..models import Analyse
+from .utils import ActiveBaselineMixin, synthetic_baseline, synthetic_life_list
+from core.baseline_index import blanks_sort_key
+from core.serving import filter_upload_results, species_detail
+
+
+class SpeciesDetailTests(TestCase):
+
+    def test_matches_row_scan_and_blanks_rank(self):
+        baseline = synthetic_baseline()
+        life_list = synthetic_life_list(60, seed=6)
+        remaining = sorted(filter_upload_results(baseline, life_list)["liste_blanks_records"], key=blanks_sort_key)
+        ranks = {row["Species"]: rank for rank, row in enumerate(remaining, start=1)}
+
+        for row in baseline["liste_blanks_records"][:40]:
+            if not row.get("Species"):
+                continue
+            detail = species_detail(baseline, row["Species"].upper(), life_list)
+            expected = sorted(
+                ((country, float(row.get(country) or 0)) for country in baseline["blanks_country_cols"]
+                 if float(row.get(country) or 0) > 0),
+                key=lambda item: -item[1],
+            )
+            self.assertEqual([(c["Country"], c["Value"]) for c in detail["countries"]], expected)
+            self.assertEqual(detail["seen"], row["Species"].strip().lower() in life_list)
+            self.assertEqual(detail["global_rank"], ranks.get(row["Species"]))
+        self.assertIsNone(species_detail(baseline, "Dodo", life_list))
+
+
+class SpeciesDetailViewTests(ActiveBaselineMixin, TestCase):
+
+    def test_analysis_species(self):
+        analyse = Analyse.objects.create(
+            results_json=build_compact_analysis_payload({"black kite"}, self.baseline_version, self.baseline),
+        )
+        url = reverse("analyses:species_detail_json", args=[analyse.pk])
+        kite = self.client.get(url, {"name": "black kite"}).json()
+        self.assertTrue(kite["seen"])
+        self.assertIsNone(kite["global_rank"])
+        self.assertEqual([row["Country"] for row in kite["countries"]], ["Spain", "France", "Ecuador"])
+        self.assertEqual(kite["continents"][0], {"Continent": "Europe", "Countries": 2, "Max_Value": 4.0})
+
+        hoopoe = self.client.get(url, {"name": "Eurasian Hoopoe"}).json()
+        self.assertFalse(hoopoe["seen"])
+        self.assertEqual(hoopoe["global_rank"], 1)
+
+    def test_invalid_requests(self):
+        url = reverse("analyses:baseline_species_detail_json")
+        self.assertEqual(self.client.get(url).status_code, 400)
+        self.assertEqual(self.client.get(url, {"name": "Dodo"}).status_code, 404)
+        self.assertEqual(self.client.get(reverse("analyses:species_detail_json", args=[999]), {"name": "x"}).status_code, 404)
@@ -0,0 +1,88 @@
+"""
+Progression d'un utilisateur : comptages par upload et endpoint
+``my-analyses/timeline/``.
+"""
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from ..deltas import build_compact_analysis_payload
+from ..models import Analyse
+from .utils import ActiveBaselineMixin, synthetic_baseline, synthetic_life_list
+from core.baseline_index import SERVING_THRESHOLD, get_baseline_index
+from core.timeline import blank_counts_by_upload, upload_diffs
+import numpy as np
+
+
+class BlankCountsTests(TestCase):
+
+    def test_counts_match_brute_force(self):
+        baseline = synthetic_baseline()
+        index = get_baseline_index(baseline)
+        records = baseline["liste_blanks_records"]
+        seen_masks = [
+            np.array([key in names for key in index["species_keys"]])
+            for names in (synthetic_life_list(50, seed=1), synthetic_life_list(120, seed=2))
+        ]
+        counts = blank_counts_by_upload(baseline, seen_masks)
+
+        for position, seen in enumerate(seen_masks):
+            blank_rows = [i for i, key in enumerate(index["species_keys"]) if key and not seen[i]]
+            self.assertEqual(counts["total"][position], len(blank_rows))
+            for col, country in enumerate(baseline["blanks_country_cols"]):
+                values = [float(records[i].get(country) or 0) for i in blank_rows]
+                self.assertEqual(counts["countries"][position][col], sum(value > 0 for value in values))
+                self.assertEqual(counts["countries_above"][position][col], sum(value > SERVING_THRESHOLD for value in values))
+
+        added, removed = upload_diffs(index, seen_masks)[1]
+        np.testing.assert_array_equal(added, np.flatnonzero(seen_masks[1] & ~seen_masks[0]))
+        np.testing.assert_array_equal(removed, np.flatnonzero(seen_masks[0] & ~seen_masks[1]))
+
+    def test_no_uploads(self):
+        counts = blank_counts_by_upload(synthetic_baseline(), [])
+        self.assertEqual(counts["countries"].shape, (0, len(synthetic_baseline()["blanks_country_cols"])))
+
+
+class TimelineViewTests(ActiveBaselineMixin, TestCase):
+
+    url = reverse("analyses:user_timeline_json")
+
+    def setUp(self):
+        super().setUp()
+        self.alice = User.objects.create_user("alice", password="pw")
+        self.first = self.create_analysis(self.alice, {"black kite"})
+        self.second = self.create_analysis(self.alice, {"black kite", "wallcreeper", "eurasian hoopoe"})
+
+    def create_analysis(self, user, names):
+        return Analyse.objects.create(
+            user=user,
+            results_json=build_compact_analysis_payload(names, self.baseline_version, self.baseline),
+        )
+
+    def test_login_required(self):
+        self.assertEqual(self.client.get(self.url).status_code, 302)
+
+    def test_uploads_in_chronological_order(self):
+        bob = User.objects.create_user("bob", password="pw")
+        self.create_analysis(bob, {"andean condor"})
+        pending = Analyse.objects.create(user=self.alice, results_json={"result_mode": "pending_job", "job_id": 1})
+
+        self.client.force_login(self.alice)
+        payload = self.client.get(self.url).json()
+        self.assertEqual([upload["id"] for upload in payload["uploads"]], [self.first.pk, self.second.pk])
+        self.assertEqual(payload["pending"], [pending.pk])
+
+        first, second = payload["uploads"]
+        self.assertIsNone(first["added"])
+        self.assertEqual(sorted(second["added"]), ["Eurasian Hoopoe", "Wallcreeper"])
+        self.assertEqual(second["removed"], [])
+        self.assertEqual(first["total_blanks"] - second["total_blanks"], 2)
+        france = payload["countries"].index("France")
+        self.assertEqual(first["blanks_by_country"][france] - second["blanks_by_country"][france], 2)
+
+    @override_settings(USER_TIMELINE_MAX_ANALYSES=1)
+    def test_keeps_most_recent_uploads(self):
+        self.client.force_login(self.alice)
+        payload = self.client.get(self.url).json()
+        self.assertEqual([upload["id"] for upload in payload["uploads"]], [self.second.pk])
@@ -0,0 +1,67 @@
+"""
+Chronométrage des étapes : en-tête Server-Timing et /analyses/metrics/.
+"""
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from .utils import ActiveBaselineMixin
+from core.timing import STAGE_HISTOGRAMS, StageHistograms, server_timing_header, stage, start_collection, stop_collection
+
+
+class StageTimingTests(TestCase):
+
+    def test_stages_are_only_collected_when_sampled(self):
+        with stage("filter"):
+            pass
+        token = start_collection()
+        with stage("filter"):
+            pass
+        with stage("filter"):
+            pass
+        timings = stop_collection(token)
+        self.assertEqual(list(timings), ["filter"])
+        self.assertEqual(server_timing_header({"db": 0.0015}), "db;dur=1.50")
+
+    def test_histograms_render_cumulative_buckets(self):
+        histograms = StageHistograms(buckets=(0.01, 0.1))
+        histograms.observe_all("view", {"filter": 0.005, "db": 0.5})
+        histograms.observe("view", "filter", 0.05)
+        text = histograms.render_prometheus(metric="m")
+        self.assertIn('m_bucket{view="view",stage="filter",le="0.01"} 1', text)
+        self.assertIn('m_bucket{view="view",stage="filter",le="0.1"} 2', text)
+        self.assertIn('m_bucket{view="view",stage="db",le="+Inf"} 1', text)
+        self.assertIn('m_count{view="view",stage="filter"} 2', text)
+
+
+class StageTimingMiddlewareTests(ActiveBaselineMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        STAGE_HISTOGRAMS.reset()
+        self.addCleanup(STAGE_HISTOGRAMS.reset)
+
+    @override_settings(STAGE_TIMING_SAMPLE_RATE=1.0)
+    def test_sampled_request_gets_server_timing(self):
+        response = self.client.get(reverse("analyses:baseline_section_summary_json"))
+        self.assertEqual(response.status_code, 200)
+        stages = {item.split(";")[0] for item in response["Server-Timing"].split(", ")}
+        self.assertIn("total", stages)
+        self.assertIn("serialize", stages)
+
+        staff = User.objects.create_user("staff", is_staff=True)
+        self.client.force_login(staff)
+        metrics = self.client.get(reverse("analyses:metrics"))
+        self.assertEqual(metrics.status_code, 200)
+        self.assertIn('view="analyses:baseline_section_summary_json",stage="total"', metrics.content.decode())
+
+    def test_unsampled_request_has_no_header(self):
+        response = self.client.get(reverse("analyses:baseline_section_summary_json"))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("Server-Timing", response)
+
+    def test_metrics_are_staff_only(self):
+        self.assertEqual(self.client.get(reverse("analyses:metrics")).status_code, 403)
+        self.client.force_login(User.objects.create_user("user"))
+        self.assertEqual(self.client.get(reverse("analyses:metrics")).status_code, 403)
@@ -0,0 +1,78 @@
+"""
+Préchargement du baseline, sonde de disponibilité et index de recherche.
+"""
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from ..baselines import _BASELINE_CACHE
+from ..warmup import WARMUP_STATUS, warm_baseline, warm_up
+from .utils import ActiveBaselineMixin, synthetic_baseline
+from core.baseline_index import get_baseline_index, species_search_mask
+from unittest import mock
+import numpy as np
+import tempfile
+
+
+class SpeciesSearchIndexTests(TestCase):
+
+    def test_search_mask_matches_linear_scan(self):
+        baseline = synthetic_baseline()
+        index = get_baseline_index(baseline)
+        names = [str(row.get("Species", "")).strip().lower() for row in baseline["liste_blanks_records"]]
+        for search in ("", "a", "sp", "species", "pecies 01", "ies 1", "zzz", names[5], names[5][2:9]):
+            expected = np.array([search in name for name in names], dtype=bool)
+            np.testing.assert_array_equal(species_search_mask(index, search), expected, err_msg=search)
+
+    def test_warm_baseline_builds_search_index(self):
+        baseline = synthetic_baseline()
+        steps = warm_baseline(baseline)
+        self.assertEqual(set(steps), {"baseline_index", "search_index", "itinerary_columns", "species_lookup"})
+        self.assertIn("search_postings", get_baseline_index(baseline))
+
+
+class WarmupTests(TestCase):
+
+    def setUp(self):
+        saved = dict(WARMUP_STATUS)
+        self.addCleanup(WARMUP_STATUS.update, saved)
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        settings_override = override_settings(BASE_DIR=tmp_dir.name, BASELINE_ARTIFACT_DIR=tmp_dir.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        _BASELINE_CACHE.clear()
+        self.addCleanup(_BASELINE_CACHE.clear)
+
+    def test_failure_is_recorded_not_raised(self):
+        with mock.patch("analyses.warmup.get_active_baseline_version", side_effect=RuntimeError("no table")):
+            with self.assertLogs("analyses.warmup", "ERROR"):
+                status = warm_up(freeze=False, close_connections=False)
+        self.assertEqual(status["state"], "failed")
+        self.assertIn("no table", status["error"])
+
+    def test_ready_probe_retries_until_baseline_is_available(self):
+        response = self.client.get(reverse("analyses:ready"))
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()["warmup"]["state"], "unavailable")
+
+        with mock.patch("analyses.warmup.get_baseline_results", return_value=synthetic_baseline()):
+            response = self.client.get(reverse("analyses:ready"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["warmup"]["state"], "ready")
+
+    @override_settings(BASELINE_WARMUP=False)
+    def test_ready_without_warmup(self):
+        WARMUP_STATUS["state"] = "pending"
+        self.assertEqual(self.client.get(reverse("analyses:ready")).status_code, 200)
+
+
+class BaselineSearchViewTests(ActiveBaselineMixin, TestCase):
+
+    def test_search_narrows_baseline_blanks(self):
+        url = reverse("analyses:baseline_section_blanks_json")
+        payload = self.client.get(url, {"search": "KITE"}).json()
+        self.assertEqual(payload["total_count"], 1)
+        self.assertEqual([row["Species"] for row in payload["blanks_data"]], ["Black Kite"])
+        self.assertEqual(self.client.get(url, {"search": "owl"}).json()["total_count"], 0)
+        self.assertEqual(self.client.get(url).json()["total_count"], len(self.baseline["liste_blanks_records"]))
@@ -0,0 +1,99 @@
+"""
+Builds de la matrice compilée : complet, incrémental, parallèle et
+sauvegarde.
+"""
+
+from django.test import TestCase
+
+from ..baselines import compute_baseline_hash
+from .utils import small_dv
+from core.world_blanks import compute_results_from_dv
+from core.world_matrix import (
+    compile_world_matrix,
+    compute_results_from_compiled,
+    load_compiled_world_matrix,
+    save_compiled_world_matrix,
+    segmented_median,
+)
+from unittest import mock
+import numpy as np
+import os
+import tempfile
+
+
+def modified_dv():
+    # France : valeur modifiée ; Espagne : une espèce remplacée par une
+    # nouvelle ; Équateur : une espèce retirée.
+    dv = small_dv("0.07")
+    dv.loc[3, 2] = "Bearded Vulture"
+    dv.loc[2, 4] = np.nan
+    dv.loc[2, 5] = np.nan
+    return dv
+
+
+class WorldMatrixBuildTests(TestCase):
+
+    def test_compiled_results_match_pandas_results(self):
+        for dv in (small_dv(), modified_dv()):
+            with self.subTest(dv=dv.iloc[1, 1]):
+                self.assertEqual(compute_results_from_compiled(compile_world_matrix(dv)), compute_results_from_dv(dv))
+
+    def test_incremental_build_matches_full_build(self):
+        dv = modified_dv()
+        incremental = compile_world_matrix(dv, previous=compile_world_matrix(small_dv()))
+        self.assertEqual(sorted(incremental["changed_columns"].tolist()), ["Ecuador", "France", "Spain"])
+        self.assertEqual(
+            compute_baseline_hash(compute_results_from_compiled(incremental)),
+            compute_baseline_hash(compute_results_from_compiled(compile_world_matrix(dv))),
+        )
+
+    def test_unchanged_build_reuses_previous_aggregates(self):
+        previous = compile_world_matrix(small_dv())
+        compiled = compile_world_matrix(small_dv(), previous=previous)
+        self.assertEqual(compiled["changed_columns"].tolist(), [])
+        self.assertEqual(compute_results_from_compiled(compiled), compute_results_from_compiled(previous))
+
+    def test_parallel_build_matches_serial_build(self):
+        previous = compile_world_matrix(small_dv())
+        for kwargs in ({}, {"previous": previous}):
+            with self.subTest(incremental=bool(kwargs)):
+                serial = compile_world_matrix(modified_dv(), **kwargs)
+                parallel = compile_world_matrix(modified_dv(), workers=2, min_parallel_cells=0, **kwargs)
+                self.assertEqual(set(parallel), set(serial))
+                for key in serial:
+                    np.testing.assert_array_equal(parallel[key], serial[key], err_msg=key)
+
+    def test_small_matrix_stays_serial(self):
+        with mock.patch("core.world_matrix._make_executor") as make_executor:
+            compiled = compile_world_matrix(small_dv(), workers=4)
+        make_executor.assert_not_called()
+        self.assertEqual(compute_results_from_compiled(compiled), compute_results_from_dv(small_dv()))
+
+    def test_save_and_load_round_trip(self):
+        compiled = compile_world_matrix(small_dv())
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "compiled.npz")
+            save_compiled_world_matrix(compiled, path)
+            loaded = load_compiled_world_matrix(path)
+        self.assertEqual(set(loaded), set(compiled))
+        self.assertEqual(compute_results_from_compiled(loaded), compute_results_from_compiled(compiled))
+
+
+class SegmentedMedianTests(TestCase):
+
+    def test_matches_numpy_median_per_group(self):
+        rng = np.random.default_rng(0)
+        group_ids = rng.integers(0, 7, size=200)
+        values = rng.random(200)
+        medians = segmented_median(group_ids, values, 9)
+        for group in range(9):
+            with self.subTest(group=group):
+                members = values[group_ids == group]
+                self.assertEqual(medians[group], np.median(members) if len(members) else 0.0)
+
+    def test_even_and_single_groups(self):
+        np.testing.assert_array_equal(
+            segmented_median([1, 1, 0, 1, 1], [4.0, 1.0, 2.5, 3.0, 2.0], 3),
+            [2.5, 2.5, 0.0],
+        )
+        np.testing.assert_array_equal(segmented_median([], [], 2), [0.0, 0.0])
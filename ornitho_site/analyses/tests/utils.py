@@ -0,0 +1,103 @@
+"""
+Données partagées par les tests : petit DV écrit à la main, DV synthétique
+(``core.synthetic``) et baselines compilés correspondants.
+"""
+
+from django.test import override_settings
+
+from ..baselines import _BASELINE_CACHE, promote_baseline_version, publish_baseline_version
+from core.baseline_index import get_baseline_index
+from core.synthetic import make_synthetic_dv
+from core.world_blanks import compute_results_from_dv
+from core.world_matrix import compile_world_matrix, compute_results_from_compiled
+import numpy as np
+import pandas as pd
+import tempfile
+
+
+N_COUNTRIES = 12
+N_SPECIES = 300
+
+_SYNTHETIC = {}
+
+
+def small_dv(hoopoe_france="0.05"):
+    """
+    DV de trois pays sur deux continents (le milan noir est présent sur les
+    deux). ``hoopoe_france`` permet de produire des baselines de contenus
+    différents.
+    """
+    return pd.DataFrame([
+        ["France", "Europe", "Spain", "Europe", "Ecuador", "South America"],
+        ["Eurasian Hoopoe", hoopoe_france, "Eurasian Hoopoe", "0.12", "Andean Condor", "0.01"],
+        ["Black Kite", "0.02", "Black Kite", "0.04", "Sword-billed Hummingbird", "0.002"],
+        ["Wallcreeper", "0.0005", "Iberian Green Woodpecker", "0.03", "Black Kite", "0.001"],
+        [np.nan, np.nan, np.nan, np.nan, "Torrent Duck", "0.0002"],
+    ])
+
+
+def small_baseline(hoopoe_france="0.05"):
+    return compute_results_from_dv(small_dv(hoopoe_france))
+
+
+def synthetic_dv():
+    if "dv" not in _SYNTHETIC:
+        _SYNTHETIC["dv"] = make_synthetic_dv(N_COUNTRIES, N_SPECIES, density=0.2, n_continents=3, seed=1)
+    return _SYNTHETIC["dv"]
+
+
+def synthetic_baseline():
+    """
+    Baseline compilé du DV synthétique, partagé par les tests (comme le
+    cache du process en production : à ne pas modifier).
+    """
+    if "baseline" not in _SYNTHETIC:
+        _SYNTHETIC["baseline"] = compute_results_from_compiled(compile_world_matrix(synthetic_dv()))
+    return _SYNTHETIC["baseline"]
+
+
+def synthetic_life_list(size, seed=0, extra=()):
+    """
+    Noms normalisés d'une life list tirée parmi les espèces du baseline
+    synthétique, plus ``extra`` (noms hors baseline).
+    """
+    rng = np.random.default_rng(seed)
+    species_keys = sorted(key for key in get_baseline_index(synthetic_baseline())["species_keys"] if key)
+    return set(rng.choice(species_keys, size=size, replace=False).tolist()) | set(extra)
+
+
+def life_list_csv(*names):
+    """
+    Export eBird minimal : une ligne comptable par nom.
+    """
+    lines = ["Common Name,Countable"] + [f"{name},1" for name in names]
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+class ActiveBaselineMixin:
+    """
+    Publie et active ``baseline_results()`` (par défaut le petit baseline)
+    ; les fichiers du baseline et les life lists téléversées sont écrits dans
+    un dossier temporaire.
+    """
+
+    def baseline_results(self):
+        return small_baseline()
+
+    def setUp(self):
+        super().setUp()
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        settings_override = override_settings(
+            BASE_DIR=tmp_dir.name,
+            BASELINE_ARTIFACT_DIR=tmp_dir.name,
+            MEDIA_ROOT=tmp_dir.name,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.tmp_dir = tmp_dir.name
+        _BASELINE_CACHE.clear()
+        self.addCleanup(_BASELINE_CACHE.clear)
+        self.baseline_version = publish_baseline_version(self.baseline_results())
+        promote_baseline_version(self.baseline_version)
+        self.baseline = self.baseline_results()
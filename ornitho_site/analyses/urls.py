@@ -8,7 +8,11 @@ urlpatterns = [
     path("", views.home_view, name="home"),
     path("upload/", views.upload_life_list_view, name="upload"),
     path("baseline/refresh/", views.refresh_baseline_view, name="refresh_baseline"),
+    path("jobs/<int:job_id>/", views.job_status_json, name="job_status"),
+    path("metrics/", views.metrics_view, name="metrics"),
+    path("ready/", views.ready_view, name="ready"),
     path("my-analyses/", views.user_analyses_view, name="user_analyses"),
+    path("my-analyses/timeline/", views.user_timeline_json, name="user_timeline_json"),
     path("accounts/login/", auth_views.LoginView.as_view(template_name="analyses/login.html"), name="login"),
     path("accounts/logout/", auth_views.LogoutView.as_view(next_page="analyses:home"), name="logout"),
     path("accounts/register/", views.register_view, name="register"),
@@ -16,7 +20,18 @@ urlpatterns = [
     path("<int:analyse_id>/section/blanks/", views.section_blanks_json, name="section_blanks_json"),
     path("<int:analyse_id>/section/blanks/by-country/", views.section_blanks_by_country_json, name="section_blanks_by_country_json"),
     path("<int:analyse_id>/section/summary/", views.section_summary_json, name="section_summary_json"),
+    path("<int:analyse_id>/section/ranking/", views.section_ranking_json, name="section_ranking_json"),
+    path("<int:analyse_id>/section/regions/", views.section_regions_json, name="section_regions_json"),
     path("baseline/section/blanks/", views.baseline_section_blanks_json, name="baseline_section_blanks_json"),
     path("baseline/section/blanks/by-country/", views.baseline_section_blanks_by_country_json, name="baseline_section_blanks_by_country_json"),
     path("baseline/section/summary/", views.baseline_section_summary_json, name="baseline_section_summary_json"),
+    path("baseline/section/ranking/", views.baseline_section_ranking_json, name="baseline_section_ranking_json"),
+    path("baseline/section/regions/", views.baseline_section_regions_json, name="baseline_section_regions_json"),
+    path("<int:analyse_id>/itinerary/", views.itinerary_json, name="itinerary_json"),
+    path("baseline/itinerary/", views.baseline_itinerary_json, name="baseline_itinerary_json"),
+    path("<int:analyse_id>/species/", views.species_detail_json, name="species_detail_json"),
+    path("baseline/species/", views.baseline_species_detail_json, name="baseline_species_detail_json"),
+    path("group/section/blanks/", views.group_section_blanks_json, name="group_section_blanks_json"),
+    path("group/section/blanks/by-country/", views.group_section_blanks_by_country_json, name="group_section_blanks_by_country_json"),
+    path("group/section/summary/", views.group_section_summary_json, name="group_section_summary_json"),
 ]
\ No newline at end of file
@@ -1,132 +1,61 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.conf import settings
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth import login
 from django.urls import reverse
-from .models import Analyse, BaselineAnalysis
-from core.world_blanks import (
-    compute_baseline_results,
+from .models import Analyse, Job
+from .baselines import (
+    apply_country_aliases,
+    get_active_baseline_version,
+    get_analysis_baseline_results,
+    get_analysis_baseline_version,
+    get_baseline_results,
+    get_region_index,
+    get_target_species_path,
+)
+from .deltas import (
+    COMPACT_RESULT_MODES,
+    analysis_seen_mask,
+    analysis_species_delta,
+    build_compact_analysis_payload,
+    has_first_seen,
+    is_compact_analysis_payload,
+    payload_species_names,
+)
+from .jobs import FAILED_JOB_RESULT_MODE, enqueue_job, job_status_payload
+from .lifelists import (
+    extract_first_seen_from_file,
+    extract_first_seen_from_path,
+    extract_species_to_remove_from_path,
+)
+from .precompute import get_analysis_summary, patch_analysis_summary, touch_analysis
+from .warmup import WARMUP_STATUS, warm_up
+from core.baseline_index import get_baseline_index, surviving_species_mask
+from core.groups import blank_members_by_country, group_blank_members, group_removed_mask
+from core.itinerary import plan_itinerary
+from core.memory import PEAK_ALLOC_HISTOGRAMS
+from core.regions import LEVELS, region_records
+from core.serving import (
+    blanks_by_country_from_offsets,
+    blanks_by_country_rows,
+    compute_summary_from_baseline_delta,
     filter_upload_results,
+    filtered_baseline_rows,
+    paginate_blanks,
+    rank_countries_by_expected_gain,
+    species_detail,
 )
-import csv
-import io
+from core.timeline import blank_counts_by_upload, upload_diffs
+from core.timing import STAGE_HISTOGRAMS, stage
+from datetime import date
 import os
-import gc
-import json
-
-
-COUNTRY_ALIASES = {
-    "United Republic of Tanzania": "Tanzania",
-    "Democratic Republic of the Congo": "Congo, Dem. Rep.",
-    "Republic of the Congo": "DR Congo.",
-    "Russia": "Russian Federation",
-    "The Bahamas": "Bahamas",
-    "Bolivia": "Bolivia",
-    "Venezuela": "Venezuela",
-    "Ivory Coast": "Cote d'Ivoire",
-    "eSwatini": "Eswatini",
-    "Palestine": "Palestinian Territory",
-    "Vietnam": "Viet Nam",
-    "Iran": "Iran (Islamic Republic of)",
-    "Syria": "Syrian Arab Republic",
-    "Czechia": "Czech Republic",
-    "New Caledonia": "New Caledonia",
-    "United States of America": "United States",
-    "Greenland": "Greenland",
-    "French Southern and Antarctic Lands": "French Southern and Antarctic Lands",
-    "Antarctica": "Antarctica",
-    "Republic of Serbia": "Serbia",
-}
-
-_BASELINE_CACHE = {
-    "token": None,
-    "results": None,
-}
-
-BASELINE_JSON_FILENAME = "baseline_world.json"
-
-
-def get_target_species_path():
-    return os.path.join(
-        settings.BASE_DIR,
-        "core",
-        "Especes_cibles_monde_copie.xlsx",
-    )
-
-
-def get_baseline_json_path():
-    return os.path.join(settings.BASE_DIR, "core", BASELINE_JSON_FILENAME)
-
-
-def load_baseline_from_file():
-    baseline_path = get_baseline_json_path()
-    if not os.path.exists(baseline_path):
-        return None
-    with open(baseline_path, "r", encoding="utf-8") as f:
-        return json.load(f)
-
-
-def get_file_baseline_token():
-    baseline_path = get_baseline_json_path()
-    if not os.path.exists(baseline_path):
-        return None
-    return ("file", os.path.getmtime(baseline_path))
-
-
-def save_baseline_to_file(results):
-    baseline_path = get_baseline_json_path()
-    with open(baseline_path, "w", encoding="utf-8") as f:
-        json.dump(results, f, ensure_ascii=False)
-
-
-def apply_country_aliases(results):
-    pays_stats = results.get("pays_stats", {})
-    blancks_par_pays = results.get("blancks_par_pays", {})
-    country_continents = results.get("country_continents", {})
-
-    for admin_name, excel_name in COUNTRY_ALIASES.items():
-        if excel_name in pays_stats:
-            pays_stats[admin_name] = pays_stats[excel_name]
-            blancks_par_pays[admin_name] = blancks_par_pays.get(excel_name, [])
-            country_continents[admin_name] = country_continents.get(excel_name)
-
-    return results
-
 
-def get_baseline_results(target_species_path, allow_recompute=False):
-    baseline, _ = BaselineAnalysis.objects.get_or_create(name="world_baseline")
 
-    db_token = ("db", baseline.date_updated.timestamp()) if baseline.baseline_json else None
-    file_token = get_file_baseline_token()
-
-    if _BASELINE_CACHE["results"] is not None and _BASELINE_CACHE["token"] in {db_token, file_token}:
-        return _BASELINE_CACHE["results"]
-
-    if not baseline.baseline_json:
-        file_baseline = load_baseline_from_file()
-        if file_baseline:
-            _BASELINE_CACHE["token"] = file_token
-            _BASELINE_CACHE["results"] = file_baseline
-            return file_baseline
-        elif allow_recompute:
-            baseline.baseline_json = apply_country_aliases(
-                compute_baseline_results(target_species_path)
-            )
-            baseline.save(update_fields=["baseline_json"])
-            save_baseline_to_file(baseline.baseline_json)
-        else:
-            return None
-
-    _BASELINE_CACHE["token"] = ("db", baseline.date_updated.timestamp())
-    _BASELINE_CACHE["results"] = baseline.baseline_json
-    return _BASELINE_CACHE["results"]
-
-
-def build_results_from_species_to_remove(species_to_remove):
-    target_species_path = get_target_species_path()
-    baseline_results = get_baseline_results(target_species_path)
+def build_results_from_species_to_remove(species_to_remove, baseline_results=None, lifelist_count=None):
+    if baseline_results is None:
+        baseline_results = get_baseline_results(get_target_species_path())
     if baseline_results is None:
         raise RuntimeError(
             "Baseline indisponible. Exécutez `python manage.py rebuild_baseline` avant de servir les pages."
@@ -135,163 +64,116 @@ def build_results_from_species_to_remove(species_to_remove):
     filtered_results = apply_country_aliases(
         filter_upload_results(baseline_results, species_to_remove)
     )
-    filtered_results["lifelist_count"] = len(species_to_remove)
-
-    # Explicitly release large temporaries after each heavy recomputation.
-    gc.collect()
+    filtered_results["lifelist_count"] = len(species_to_remove) if lifelist_count is None else lifelist_count
     return filtered_results
 
 
-def extract_species_to_remove_from_file(file_obj):
-    file_obj.seek(0)
-    text_stream = io.TextIOWrapper(file_obj, encoding="utf-8", newline="")
+def _parse_as_of(request, stored):
+    """
+    ``?as_of=AAAA-MM-JJ`` en jour ordinal : ``(jour ou None, réponse
+    d'erreur ou None)``. Une analyse compacte sans dates de première
+    observation ne peut pas être rejouée.
+    """
+    raw = (request.GET.get("as_of") or "").strip()
+    if not raw:
+        return None, None
     try:
-        reader = csv.DictReader(text_stream)
-        species_to_remove = {
-            row.get("Common Name").strip().lower()
-            for row in reader
-            if row.get("Countable") == "1" and row.get("Common Name")
-        }
-    finally:
-        text_stream.detach()
-    return species_to_remove
+        as_of = date.fromisoformat(raw).toordinal()
+    except ValueError:
+        return None, JsonResponse({"error": "as_of must be a YYYY-MM-DD date."}, status=400)
+    if is_compact_analysis_payload(stored) and not has_first_seen(stored):
+        return None, JsonResponse({"error": "Dates de première observation indisponibles pour cette analyse."}, status=400)
+    return as_of, None
 
 
-def extract_species_to_remove_from_path(life_list_path):
-    species_to_remove = set()
-    with open(life_list_path, newline="", encoding="utf-8") as csvfile:
-        reader = csv.DictReader(csvfile)
-        for row in reader:
-            if row.get("Countable") == "1":
-                species_name = row.get("Common Name")
-                if species_name:
-                    species_to_remove.add(species_name.strip().lower())
-    return species_to_remove
+def _json_response(payload, **kwargs):
+    with stage("serialize"):
+        return JsonResponse(payload, **kwargs)
 
 
-def is_compact_analysis_payload(payload):
-    return isinstance(payload, dict) and payload.get("result_mode") == "species_delta_v1"
+def is_pending_analysis_payload(payload):
+    return isinstance(payload, dict) and payload.get("result_mode") == "pending_job"
+
+
+def is_failed_analysis_payload(payload):
+    return isinstance(payload, dict) and payload.get("result_mode") == FAILED_JOB_RESULT_MODE
+
+
+def _pending_analysis_response(analyse):
+    """
+    Réponse des vues JSON pour une analyse sans résultats : 202 tant que
+    son job de parsing tourne, 422 s'il a échoué ; None sinon.
+    """
+    stored = analyse.results_json or {}
+    if is_failed_analysis_payload(stored):
+        return JsonResponse({
+            "error": "Échec du traitement de la life list.",
+            "detail": stored.get("error", ""),
+            "job_status_url": reverse("analyses:job_status", args=[stored.get("job_id")]),
+        }, status=422)
+    if not is_pending_analysis_payload(stored):
+        return None
+    return JsonResponse({
+        "error": "Analyse en cours de traitement.",
+        "job_status_url": reverse("analyses:job_status", args=[stored.get("job_id")]),
+    }, status=202)
 
 
 def get_analysis_species_to_remove(analyse):
     stored = analyse.results_json or {}
     if is_compact_analysis_payload(stored):
-        return set(stored.get("species_to_remove", []))
+        names = payload_species_names(stored)
+        if names is not None:
+            return names
     return extract_species_to_remove_from_path(analyse.life_list_file.path)
 
 
-def _iter_filtered_baseline_rows(baseline_results, species_to_remove):
-    for row in baseline_results.get("liste_blanks_records", []):
-        species = row.get("Species")
-        if species and species.strip().lower() in species_to_remove:
-            continue
-        yield row
-
-
-def compute_summary_from_baseline_delta(baseline_results, species_to_remove, threshold=0.0000009):
-    country_cols = baseline_results.get("blanks_country_cols", [])
-    country_continents = baseline_results.get("country_continents", {})
-
-    total_species = {c: 0 for c in country_cols}
-    above_threshold = {c: 0 for c in country_cols}
-    max_species_count = {c: 0 for c in country_cols}
-    continent_species = {}
-    species_continents = {}
-    blancks_par_pays = {}
-
-    for row in _iter_filtered_baseline_rows(baseline_results, species_to_remove):
-        species = row.get("Species")
-
-        max_country = row.get("Max_Percentage_Country")
-        if max_country:
-            max_species_count[max_country] = max_species_count.get(max_country, 0) + 1
-            try:
-                max_value = float(row.get(max_country) or 0)
-            except (TypeError, ValueError):
-                max_value = 0.0
-            blancks_par_pays.setdefault(max_country, []).append({
-                "species": species,
-                "value": max_value,
-            })
-
-        row_continents = set()
-        for country in country_cols:
-            raw_val = row.get(country)
-            try:
-                value = float(raw_val)
-            except (TypeError, ValueError):
-                value = 0.0
-
-            if value > 0:
-                total_species[country] = total_species.get(country, 0) + 1
-                continent = country_continents.get(country)
-                if continent and species:
-                    continent_species.setdefault(continent, set()).add(species)
-                    row_continents.add(continent)
-
-            if value > threshold:
-                above_threshold[country] = above_threshold.get(country, 0) + 1
-
-        if species and row_continents:
-            species_continents[species] = row_continents
-
-    for country, rows in blancks_par_pays.items():
-        rows.sort(key=lambda r: (-float(r.get("value", 0)), str(r.get("species") or "").lower()))
-
-    liste_pays_records = []
-    for country in country_cols:
-        liste_pays_records.append({
-            "Country": country,
-            "Continent": country_continents.get(country),
-            "Total_Species": int(total_species.get(country, 0)),
-            "Species_Above_00009": int(above_threshold.get(country, 0)),
-            "Max_Species_Count": int(max_species_count.get(country, 0)),
-        })
-    liste_pays_records.sort(key=lambda r: (-r["Total_Species"], str(r["Country"]).lower()))
-
-    continents_records = []
-    for continent, species_set in continent_species.items():
-        unique_species = 0
-        for species in species_set:
-            if len(species_continents.get(species, set())) == 1:
-                unique_species += 1
-        continents_records.append({
-            "Continent": continent,
-            "Total_Species": len(species_set),
-            "Unique_Species": unique_species,
-        })
-    continents_records.sort(key=lambda r: str(r["Continent"]).lower())
-
-    pays_stats = {
-        row["Country"]: {
-            "Total_Species": row["Total_Species"],
-            "Species_Above_00009": row["Species_Above_00009"],
-            "Max_Species_Count": row["Max_Species_Count"],
-        }
-        for row in liste_pays_records
-    }
+def get_compact_analysis_delta(analyse, stored, version=None, as_of=None):
+    """
+    ``(baseline servi, espèces retirées)`` d'une analyse compacte ; les
+    espèces retirées sont un masque de lignes ou un ensemble de noms
+    (``analyses.deltas.analysis_species_delta``). ``(None, None)`` sans baseline.
+    ``version`` évite de relire la version servie si l'appelant l'a déjà ;
+    ``as_of`` (jour ordinal) ne retire que les espèces vues à cette date.
+    """
+    if version is None:
+        version = get_analysis_baseline_version(analyse)
+    baseline = get_baseline_results(get_target_species_path(), version=version)
+    if baseline is None:
+        return None, None
+    species_to_remove = analysis_species_delta(
+        analyse,
+        stored,
+        version,
+        baseline,
+        fallback=lambda: extract_first_seen_from_path(analyse.life_list_file.path),
+        as_of=as_of,
+    )
+    return baseline, species_to_remove
 
-    species_values = [row["Total_Species"] for row in liste_pays_records]
-    species_min = min(species_values) if species_values else 0
-    species_max = max(species_values) if species_values else 0
 
-    return {
-        "liste_pays_records": liste_pays_records,
-        "continents_records": continents_records,
-        "pays_stats": pays_stats,
-        "country_continents": country_continents,
-        "species_min": species_min,
-        "species_max": species_max,
-        "blancks_par_pays": blancks_par_pays,
-        "pays_list": sorted(blancks_par_pays.keys()),
-        "blanks_country_cols": country_cols,
-    }
+def get_analysis_delta(analyse, as_of=None):
+    """
+    ``(baseline servi, espèces retirées)`` de n'importe quelle analyse non
+    en attente : compacte, ou relue depuis sa life list.
+    """
+    stored = analyse.results_json or {}
+    if is_compact_analysis_payload(stored):
+        return get_compact_analysis_delta(analyse, stored, as_of=as_of)
+    baseline = get_analysis_baseline_results(analyse)
+    if as_of is not None:
+        first_seen = extract_first_seen_from_path(analyse.life_list_file.path)
+        return baseline, {name for name, day in first_seen.items() if day <= as_of}
+    return baseline, extract_species_to_remove_from_path(analyse.life_list_file.path)
 
 
 def compute_analysis_results(analyse):
     life_list_path = analyse.life_list_file.path
     species_to_remove = extract_species_to_remove_from_path(life_list_path)
-    return build_results_from_species_to_remove(species_to_remove)
+    return build_results_from_species_to_remove(
+        species_to_remove,
+        get_analysis_baseline_results(analyse),
+    )
 
 
 def build_detail_context(request, analyse, results, is_baseline):
@@ -302,6 +184,7 @@ def build_detail_context(request, analyse, results, is_baseline):
         blanks_endpoint_url = reverse("analyses:section_blanks_json", args=[analyse.id])
         blanks_by_country_endpoint_url = reverse("analyses:section_blanks_by_country_json", args=[analyse.id])
         summary_endpoint_url = reverse("analyses:section_summary_json", args=[analyse.id])
+        ranking_endpoint_url = reverse("analyses:section_ranking_json", args=[analyse.id])
     else:
         page_title = "Baseline mondiale"
         created_at = None
@@ -309,6 +192,7 @@ def build_detail_context(request, analyse, results, is_baseline):
         blanks_endpoint_url = reverse("analyses:baseline_section_blanks_json")
         blanks_by_country_endpoint_url = reverse("analyses:baseline_section_blanks_by_country_json")
         summary_endpoint_url = reverse("analyses:baseline_section_summary_json")
+        ranking_endpoint_url = reverse("analyses:baseline_section_ranking_json")
 
     return {
         "analyse": analyse,
@@ -321,6 +205,7 @@ def build_detail_context(request, analyse, results, is_baseline):
         "blanks_endpoint_url": blanks_endpoint_url,
         "blanks_by_country_endpoint_url": blanks_by_country_endpoint_url,
         "summary_endpoint_url": summary_endpoint_url,
+        "ranking_endpoint_url": ranking_endpoint_url,
     }
 
 
@@ -329,13 +214,17 @@ def home_view(request):
     results = None
     compact_lifelist_count = None
     analyse_id = request.GET.get("analysis")
+    job_id = request.GET.get("job")
 
     if analyse_id and analyse_id.isdigit():
         analyse = Analyse.objects.filter(pk=int(analyse_id)).first()
         if analyse is not None:
+            touch_analysis(analyse)
             stored = analyse.results_json or {}
-            if is_compact_analysis_payload(stored):
-                baseline = get_baseline_results(get_target_species_path())
+            if is_pending_analysis_payload(stored) or is_failed_analysis_payload(stored):
+                job_id = stored.get("job_id")
+            elif is_compact_analysis_payload(stored):
+                baseline = get_analysis_baseline_results(analyse)
                 if baseline is not None:
                     results = {
                         "pays_list": baseline.get("pays_list", []),
@@ -364,26 +253,36 @@ def home_view(request):
     if compact_lifelist_count is not None:
         context["lifelist_count"] = compact_lifelist_count
     context["baseline_unavailable"] = baseline_unavailable
-    return render(request, "analyses/detail.html", context)
+    if job_id and str(job_id).isdigit():
+        context["job_status_url"] = reverse("analyses:job_status", args=[int(job_id)])
+    with stage("render"):
+        return render(request, "analyses/detail.html", context)
 
 
-def get_cached_analysis_results(analyse):
+def get_cached_analysis_results(analyse, as_of=None):
     stored = analyse.results_json or {}
     result_mode = stored.get("result_mode")
 
-    if result_mode == "species_delta_v1":
-        species_to_remove = set(stored.get("species_to_remove", []))
-        return build_results_from_species_to_remove(species_to_remove)
+    if as_of is not None:
+        baseline, species_to_remove = get_analysis_delta(analyse, as_of=as_of)
+        return build_results_from_species_to_remove(species_to_remove, baseline)
+
+    if result_mode in COMPACT_RESULT_MODES:
+        baseline, species_to_remove = get_compact_analysis_delta(analyse, stored)
+        return build_results_from_species_to_remove(
+            species_to_remove,
+            baseline,
+            lifelist_count=stored.get("lifelist_count"),
+        )
 
     if not stored:
-        species_to_remove = extract_species_to_remove_from_path(analyse.life_list_file.path)
-        analyse.results_json = {
-            "result_mode": "species_delta_v1",
-            "species_to_remove": sorted(species_to_remove),
-            "lifelist_count": len(species_to_remove),
-        }
+        first_seen = extract_first_seen_from_path(analyse.life_list_file.path)
+        species_to_remove = set(first_seen)
+        version = get_analysis_baseline_version(analyse)
+        baseline = get_baseline_results(get_target_species_path(), version=version)
+        analyse.results_json = build_compact_analysis_payload(species_to_remove, version, baseline, first_seen)
         analyse.save(update_fields=["results_json"])
-        return build_results_from_species_to_remove(species_to_remove)
+        return build_results_from_species_to_remove(species_to_remove, baseline)
 
     return stored
 
@@ -394,7 +293,8 @@ def upload_life_list_view(request):
         if not fichier:
             return render(request, "analyses/upload.html", {"error": "Aucun fichier fourni."})
 
-        if get_baseline_results(get_target_species_path()) is None:
+        baseline_version = get_active_baseline_version()
+        if get_baseline_results(get_target_species_path(), version=baseline_version) is None:
             return render(
                 request,
                 "analyses/upload.html",
@@ -406,15 +306,25 @@ def upload_life_list_view(request):
             user=request.user if request.user.is_authenticated else None,
             life_list_file=fichier,
             titre=titre,
+            baseline_version=baseline_version,
+            pin_baseline=bool(getattr(settings, "BASELINE_PIN_ANALYSES", False)) and baseline_version is not None,
         )
 
-        species_to_remove = extract_species_to_remove_from_file(fichier)
-        analyse.results_json = {
-            "result_mode": "species_delta_v1",
-            "species_to_remove": sorted(species_to_remove),
-            "lifelist_count": len(species_to_remove),
-        }
+        if fichier.size > getattr(settings, "JOB_UPLOAD_PARSE_THRESHOLD", 2 * 1024 * 1024):
+            # Gros fichier : le parsing part dans la file de jobs.
+            job = enqueue_job("parse_upload", {"analyse_id": analyse.id}, user=analyse.user)
+            analyse.results_json = {"result_mode": "pending_job", "job_id": job.id}
+        else:
+            first_seen = extract_first_seen_from_file(fichier)
+            analyse.results_json = build_compact_analysis_payload(
+                set(first_seen),
+                baseline_version,
+                get_baseline_results(get_target_species_path(), version=baseline_version),
+                first_seen,
+            )
         analyse.save(update_fields=["results_json"])
+        if getattr(settings, "INCREMENTAL_SUMMARY_ON_UPLOAD", True):
+            patch_analysis_summary(analyse)
 
         return redirect(f"{reverse('analyses:home')}?analysis={analyse.id}")
 
@@ -433,16 +343,56 @@ def refresh_baseline_view(request):
     if request.method != "POST":
         return redirect("analyses:home")
 
-    target_species_path = get_target_species_path()
-    baseline, _ = BaselineAnalysis.objects.get_or_create(name="world_baseline")
-    baseline.baseline_json = apply_country_aliases(
-        compute_baseline_results(target_species_path)
+    job = enqueue_job("rebuild_baseline", user=request.user)
+    return redirect(f"{reverse('analyses:home')}?job={job.id}")
+
+
+def job_status_json(request, job_id):
+    """
+    État d'un job, visible de l'utilisateur qui l'a lancé et du staff (les
+    jobs sans utilisateur, lancés par un upload anonyme, restent publics).
+    """
+    job = get_object_or_404(Job, pk=job_id)
+    if job.user_id is not None and job.user_id != request.user.id and not request.user.is_staff:
+        return JsonResponse({"error": "Forbidden."}, status=403)
+    return JsonResponse(job_status_payload(job))
+
+
+def metrics_view(request):
+    """
+    Histogrammes des étapes et des pics d'allocation (format texte
+    Prometheus), réservé au staff.
+    Les compteurs sont ceux du processus qui répond.
+    """
+    if not (request.user.is_authenticated and request.user.is_staff):
+        return HttpResponse(status=403)
+    return HttpResponse(
+        STAGE_HISTOGRAMS.render_prometheus()
+        + PEAK_ALLOC_HISTOGRAMS.render_prometheus(
+            metric="ornitho_request_peak_alloc_bytes",
+            help_text="Peak Python allocation per request (tracemalloc).",
+        ),
+        content_type="text/plain; version=0.0.4; charset=utf-8",
     )
-    baseline.save(update_fields=["baseline_json"])
-    save_baseline_to_file(baseline.baseline_json)
-    _BASELINE_CACHE["token"] = ("db", baseline.date_updated.timestamp())
-    _BASELINE_CACHE["results"] = baseline.baseline_json
-    return redirect("analyses:home")
+
+
+def ready_view(request):
+    """
+    Sonde de disponibilité : 200 une fois le baseline préchargé (ou si le
+    préchargement est désactivé), 503 sinon, avec l'état du préchargement.
+    Un préchargement échoué ou sans baseline est relancé à chaque sonde.
+    """
+    warmup_enabled = getattr(settings, "BASELINE_WARMUP", True)
+    if warmup_enabled and WARMUP_STATUS["state"] in ("pending", "failed", "unavailable"):
+        warm_up(freeze=False, close_connections=False)
+    ready = WARMUP_STATUS["state"] == "ready" or not warmup_enabled
+    payload = {
+        "ready": ready,
+        "warmup_enabled": warmup_enabled,
+        "worker_pid": os.getpid(),
+        "warmup": WARMUP_STATUS,
+    }
+    return JsonResponse(payload, status=200 if ready else 503)
 
 
 @login_required
@@ -453,6 +403,65 @@ def user_analyses_view(request):
     })
 
 
+@login_required
+def user_timeline_json(request):
+    """
+    Progression de l'utilisateur : blancs restants par pays et par
+    continent de chacun de ses uploads (les ``USER_TIMELINE_MAX_ANALYSES``
+    plus récents, du plus ancien au plus récent) sur le baseline actif, et
+    espèces ajoutées / retirées depuis l'upload précédent.
+    """
+    max_analyses = getattr(settings, "USER_TIMELINE_MAX_ANALYSES", 100)
+    analyses = list(
+        Analyse.objects
+        .filter(user=request.user)
+        .order_by("-date_creation", "-id")[:max_analyses]
+    )[::-1]
+    pending_ids = [analyse.pk for analyse in analyses if _pending_analysis_response(analyse) is not None]
+    analyses = [analyse for analyse in analyses if analyse.pk not in pending_ids]
+
+    version = get_active_baseline_version()
+    baseline = get_baseline_results(get_target_species_path(), version=version)
+    if baseline is None:
+        return JsonResponse({"error": "Baseline indisponible."}, status=503)
+    index = get_baseline_index(baseline)
+    records = baseline.get("liste_blanks_records", [])
+
+    with stage("filter"):
+        seen_masks = [_analysis_seen_mask(analyse, version, baseline) for analyse in analyses]
+    with stage("aggregate"):
+        counts = blank_counts_by_upload(baseline, seen_masks)
+        diffs = upload_diffs(index, seen_masks)
+
+    uploads = []
+    for position, analyse in enumerate(analyses):
+        upload = {
+            "id": analyse.pk,
+            "titre": analyse.titre,
+            "date_creation": analyse.date_creation.isoformat(),
+            "seen_count": int(counts["seen"][position]),
+            "total_blanks": int(counts["total"][position]),
+            "blanks_by_country": counts["countries"][position].tolist(),
+            "blanks_above_by_country": counts["countries_above"][position].tolist(),
+            "blanks_by_continent": counts["continents"][position].tolist(),
+            "added": None,
+            "removed": None,
+        }
+        if diffs[position] is not None:
+            added, removed = diffs[position]
+            upload["added"] = [records[row_idx].get("Species") for row_idx in added.tolist()]
+            upload["removed"] = [records[row_idx].get("Species") for row_idx in removed.tolist()]
+        uploads.append(upload)
+
+    return _json_response({
+        "countries": baseline.get("blanks_country_cols", []),
+        "country_continents": baseline.get("country_continents", {}),
+        "continents": index["continents"],
+        "uploads": uploads,
+        "pending": pending_ids,
+    })
+
+
 def register_view(request):
     if request.method == "POST":
         form = UserCreationForm(request.POST)
@@ -466,41 +475,23 @@ def register_view(request):
     return render(request, "analyses/register.html", {"form": form})
 
 
-def _section_blanks_json_from_results(results, request):
+def _blanks_search(request):
+    return (request.GET.get("search") or "").strip().lower()
 
-    search = (request.GET.get("search") or "").strip().lower()
+
+def _section_blanks_payload(results, request):
+    search = _blanks_search(request)
     country = (request.GET.get("country") or "").strip()
     page = max(int(request.GET.get("page", 1)), 1)
     page_size = min(max(int(request.GET.get("page_size", 50)), 10), 200)
-    threshold = 0.0000009
-
-    filtered = []
-    for row in results["liste_blanks_records"]:
-        if search and search not in str(row.get("Species", "")).lower():
-            continue
-        if country:
-            value = row.get(country)
-            try:
-                value = float(value)
-            except (TypeError, ValueError):
-                continue
-            if value <= threshold:
-                continue
-        filtered.append(row)
-
-    filtered.sort(key=lambda row: (
-        -int(row.get("Above_Threshold_Count", 0)),
-        -int(row.get("Country_Count", 0)),
-        -float(row.get("Max_Percentage", 0)),
-        str(row.get("Species", "")).lower(),
-    ))
 
-    for idx, row in enumerate(filtered, start=1):
-        row["_global_rank"] = idx
-
-    total_count = len(filtered)
-    start = (page - 1) * page_size
-    page_data = filtered[start:start + page_size]
+    total_count, page_data = paginate_blanks(
+        results["liste_blanks_records"],
+        search=search,
+        country=country,
+        page=page,
+        page_size=page_size,
+    )
 
     payload = {
         "page": page,
@@ -509,30 +500,44 @@ def _section_blanks_json_from_results(results, request):
         "blanks_data": page_data,
         "blanks_country_cols": results["blanks_country_cols"],
     }
-    return JsonResponse(payload)
+    return payload
+
+
+def _section_blanks_json_from_results(results, request):
+    return _json_response(_section_blanks_payload(results, request))
 
 
 def section_blanks_json(request, analyse_id):
     analyse = get_object_or_404(Analyse, pk=analyse_id)
+    pending = _pending_analysis_response(analyse)
+    if pending is not None:
+        return pending
+    touch_analysis(analyse)
     stored = analyse.results_json or {}
+    as_of, error = _parse_as_of(request, stored)
+    if error is not None:
+        return error
     if is_compact_analysis_payload(stored):
-        baseline = get_baseline_results(get_target_species_path())
+        baseline, species_to_remove = get_compact_analysis_delta(analyse, stored, as_of=as_of)
         if baseline is None:
             return JsonResponse({"error": "Baseline indisponible."}, status=503)
-        species_to_remove = set(stored.get("species_to_remove", []))
         results = {
-            "liste_blanks_records": list(_iter_filtered_baseline_rows(baseline, species_to_remove)),
+            "liste_blanks_records": filtered_baseline_rows(baseline, species_to_remove, _blanks_search(request)),
             "blanks_country_cols": baseline.get("blanks_country_cols", []),
         }
     else:
-        results = get_cached_analysis_results(analyse)
+        results = get_cached_analysis_results(analyse, as_of)
     return _section_blanks_json_from_results(results, request)
 
 
 def baseline_section_blanks_json(request):
-    results = get_baseline_results(get_target_species_path())
-    if results is None:
+    baseline = get_baseline_results(get_target_species_path())
+    if baseline is None:
         return JsonResponse({"error": "Baseline indisponible."}, status=503)
+    results = {
+        "liste_blanks_records": filtered_baseline_rows(baseline, set(), _blanks_search(request)),
+        "blanks_country_cols": baseline.get("blanks_country_cols", []),
+    }
     return _section_blanks_json_from_results(results, request)
 
 
@@ -542,36 +547,12 @@ def _section_blanks_by_country_json_from_results(results, request):
     if not country:
         return JsonResponse({"error": "Country parameter is required."}, status=400)
 
-    blancks_par_pays = results.get("blancks_par_pays", {})
-    country_rows = blancks_par_pays.get(country, [])
-
-    blanks_data = results["liste_blanks_records"]
-    sorted_by_rank = sorted(
-        blanks_data,
-        key=lambda row: (
-            -int(row.get("Above_Threshold_Count", 0)),
-            -int(row.get("Country_Count", 0)),
-            -float(row.get("Max_Percentage", 0)),
-            str(row.get("Species", "")).lower(),
-        )
+    result_rows = blanks_by_country_rows(
+        results["liste_blanks_records"],
+        results.get("blancks_par_pays", {}),
+        country,
     )
-    rank_by_species = {
-        row.get("Species"): idx + 1
-        for idx, row in enumerate(sorted_by_rank)
-    }
-
-    result_rows = [
-        {
-            "species": row.get("species"),
-            "value": row.get("value"),
-            "global_rank": rank_by_species.get(row.get("species")),
-        }
-        for row in country_rows
-    ]
-
-    result_rows.sort(key=lambda row: ((row["global_rank"] or 999999), str(row["species"] or "").lower()))
-
-    return JsonResponse({
+    return _json_response({
         "country": country,
         "rows": result_rows,
         "total_count": len(result_rows),
@@ -580,19 +561,39 @@ def _section_blanks_by_country_json_from_results(results, request):
 
 def section_blanks_by_country_json(request, analyse_id):
     analyse = get_object_or_404(Analyse, pk=analyse_id)
+    pending = _pending_analysis_response(analyse)
+    if pending is not None:
+        return pending
+    touch_analysis(analyse)
     stored = analyse.results_json or {}
+    as_of, error = _parse_as_of(request, stored)
+    if error is not None:
+        return error
     if is_compact_analysis_payload(stored):
-        baseline = get_baseline_results(get_target_species_path())
+        version = get_analysis_baseline_version(analyse)
+        # Les rangs précalculés valent pour la life list complète.
+        rank_offsets = None if as_of is not None else get_analysis_summary(analyse, version, "rank_offsets_json")
+        if rank_offsets is not None:
+            baseline = get_baseline_results(get_target_species_path(), version=version)
+            country = (request.GET.get("country") or "").strip()
+            if baseline is not None and country:
+                result_rows = blanks_by_country_from_offsets(baseline, rank_offsets, country)
+                return _json_response({
+                    "country": country,
+                    "rows": result_rows,
+                    "total_count": len(result_rows),
+                })
+
+        baseline, species_to_remove = get_compact_analysis_delta(analyse, stored, version, as_of)
         if baseline is None:
             return JsonResponse({"error": "Baseline indisponible."}, status=503)
-        species_to_remove = set(stored.get("species_to_remove", []))
         summary = compute_summary_from_baseline_delta(baseline, species_to_remove)
         results = {
-            "liste_blanks_records": list(_iter_filtered_baseline_rows(baseline, species_to_remove)),
+            "liste_blanks_records": filtered_baseline_rows(baseline, species_to_remove),
             "blancks_par_pays": summary.get("blancks_par_pays", {}),
         }
     else:
-        results = get_cached_analysis_results(analyse)
+        results = get_cached_analysis_results(analyse, as_of)
     return _section_blanks_by_country_json_from_results(results, request)
 
 
@@ -603,8 +604,8 @@ def baseline_section_blanks_by_country_json(request):
     return _section_blanks_by_country_json_from_results(results, request)
 
 
-def _section_summary_json_from_results(results):
-    payload = {
+def _section_summary_payload(results):
+    return {
         "liste_pays_records": results["liste_pays_records"],
         "continents_records": results["continents_records"],
         "pays_stats": results["pays_stats"],
@@ -612,21 +613,35 @@ def _section_summary_json_from_results(results):
         "species_min": results["species_min"],
         "species_max": results["species_max"],
     }
-    return JsonResponse(payload)
+
+
+def _section_summary_json_from_results(results):
+    return _json_response(_section_summary_payload(results))
 
 
 def section_summary_json(request, analyse_id):
     analyse = get_object_or_404(Analyse, pk=analyse_id)
+    pending = _pending_analysis_response(analyse)
+    if pending is not None:
+        return pending
+    touch_analysis(analyse)
     stored = analyse.results_json or {}
+    as_of, error = _parse_as_of(request, stored)
+    if error is not None:
+        return error
     if is_compact_analysis_payload(stored):
-        baseline = get_baseline_results(get_target_species_path())
+        version = get_analysis_baseline_version(analyse)
+        summary = get_analysis_summary(analyse, version) if as_of is None else None
+        if summary is not None:
+            return _section_summary_json_from_results(summary)
+
+        baseline, species_to_remove = get_compact_analysis_delta(analyse, stored, version, as_of)
         if baseline is None:
             return JsonResponse({"error": "Baseline indisponible."}, status=503)
-        species_to_remove = set(stored.get("species_to_remove", []))
         summary = compute_summary_from_baseline_delta(baseline, species_to_remove)
         return _section_summary_json_from_results(summary)
 
-    results = get_cached_analysis_results(analyse)
+    results = get_cached_analysis_results(analyse, as_of)
     return _section_summary_json_from_results(results)
 
 
@@ -634,4 +649,322 @@ def baseline_section_summary_json(request):
     results = get_baseline_results(get_target_species_path())
     if results is None:
         return JsonResponse({"error": "Baseline indisponible."}, status=503)
-    return _section_summary_json_from_results(results)
\ No newline at end of file
+    return _section_summary_json_from_results(results)
+
+
+def _analysis_seen_mask(analyse, version, baseline):
+    # Lignes de ``baseline`` déjà vues par une analyse, sans la réencoder.
+    stored = analyse.results_json or {}
+    if is_compact_analysis_payload(stored):
+        return analysis_seen_mask(
+            stored,
+            version,
+            baseline,
+            fallback=lambda: extract_first_seen_from_path(analyse.life_list_file.path),
+        )
+    names = extract_species_to_remove_from_path(analyse.life_list_file.path)
+    return ~surviving_species_mask(get_baseline_index(baseline), names)
+
+
+def _resolve_group(request):
+    """
+    Groupe décrit par ``?analyses=1,2,3`` (et ``min_members``) : retourne
+    ``(groupe, None)`` ou ``(None, réponse d'erreur)``.
+
+    Les membres sont résolus sur le baseline actif ; ``blank_members``
+    donne, par ligne du baseline, le nombre de membres pour qui l'espèce est
+    un blanc, et ``removed`` écarte les lignes blanches pour moins de
+    ``min_members`` membres (par défaut : tous). Seuls le staff et les
+    propriétaires d'au moins une analyse du groupe y ont accès.
+    """
+    analyse_ids = []
+    for part in (request.GET.get("analyses") or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if not part.isdigit():
+            return None, JsonResponse({"error": f"Invalid analysis id: {part!r}."}, status=400)
+        if int(part) not in analyse_ids:
+            analyse_ids.append(int(part))
+    if not analyse_ids:
+        return None, JsonResponse({"error": "analyses parameter is required."}, status=400)
+    max_members = getattr(settings, "GROUP_ANALYSIS_MAX_MEMBERS", 20)
+    if len(analyse_ids) > max_members:
+        return None, JsonResponse({"error": f"At most {max_members} analyses per group."}, status=400)
+
+    analyses = Analyse.objects.in_bulk(analyse_ids)
+    missing = [analyse_id for analyse_id in analyse_ids if analyse_id not in analyses]
+    if missing:
+        return None, JsonResponse({"error": f"Unknown analyses: {missing}."}, status=404)
+    is_member = request.user.is_authenticated and any(
+        analyse.user_id == request.user.id for analyse in analyses.values()
+    )
+    if not (is_member or request.user.is_staff):
+        return None, JsonResponse({"error": "Forbidden."}, status=403)
+    for analyse_id in analyse_ids:
+        pending = _pending_analysis_response(analyses[analyse_id])
+        if pending is not None:
+            return None, pending
+
+    n_members = len(analyse_ids)
+    try:
+        min_members = int(request.GET.get("min_members", n_members))
+    except ValueError:
+        return None, JsonResponse({"error": "min_members must be an integer."}, status=400)
+    min_members = min(max(min_members, 1), n_members)
+
+    version = get_active_baseline_version()
+    baseline = get_baseline_results(get_target_species_path(), version=version)
+    if baseline is None:
+        return None, JsonResponse({"error": "Baseline indisponible."}, status=503)
+
+    with stage("filter"):
+        seen_masks = [
+            _analysis_seen_mask(analyses[analyse_id], version, baseline)
+            for analyse_id in analyse_ids
+        ]
+        blank_members = group_blank_members(get_baseline_index(baseline), seen_masks)
+
+    return {
+        "analyses": analyse_ids,
+        "baseline": baseline,
+        "blank_members": blank_members,
+        "removed": group_removed_mask(blank_members, min_members),
+        "info": {"analyses": analyse_ids, "members": n_members, "min_members": min_members},
+    }, None
+
+
+def group_section_summary_json(request):
+    """
+    Résumé (forme de ``section_summary_json``) des espèces qui sont un blanc
+    pour au moins ``min_members`` membres du groupe, plus, par pays, le
+    nombre d'espèces blanches pour exactement k membres (k = 0 … n).
+    """
+    group, error = _resolve_group(request)
+    if error is not None:
+        return error
+    baseline = group["baseline"]
+    summary = compute_summary_from_baseline_delta(baseline, group["removed"])
+    payload = _section_summary_payload(summary)
+    payload["group"] = group["info"]
+    with stage("aggregate"):
+        payload["blank_members_by_country"] = blank_members_by_country(
+            baseline, group["blank_members"], group["info"]["members"],
+        )
+    return _json_response(payload)
+
+
+def group_section_blanks_json(request):
+    """
+    Blancs paginés du groupe (forme de ``section_blanks_json``) ; chaque
+    ligne porte ``_blank_members``, le nombre de membres qui ne l'ont pas vue.
+    """
+    group, error = _resolve_group(request)
+    if error is not None:
+        return error
+    baseline = group["baseline"]
+    rows = filtered_baseline_rows(baseline, group["removed"])
+    payload = _section_blanks_payload(
+        {"liste_blanks_records": rows, "blanks_country_cols": baseline.get("blanks_country_cols", [])},
+        request,
+    )
+    kept = ~group["removed"]
+    members_by_species = dict(zip(
+        (row.get("Species") for row in rows),
+        group["blank_members"][kept].tolist(),
+    ))
+    for row in payload["blanks_data"]:
+        row["_blank_members"] = members_by_species.get(row.get("Species"))
+    payload["group"] = group["info"]
+    return _json_response(payload)
+
+
+def group_section_blanks_by_country_json(request):
+    group, error = _resolve_group(request)
+    if error is not None:
+        return error
+    baseline = group["baseline"]
+    summary = compute_summary_from_baseline_delta(baseline, group["removed"])
+    results = {
+        "liste_blanks_records": filtered_baseline_rows(baseline, group["removed"]),
+        "blancks_par_pays": summary.get("blancks_par_pays", {}),
+    }
+    return _section_blanks_by_country_json_from_results(results, request)
+
+
+def _itinerary_json(request, baseline, species_to_remove):
+    max_countries = getattr(settings, "ITINERARY_MAX_COUNTRIES", 20)
+    try:
+        k = int(request.GET.get("k", 5))
+    except ValueError:
+        return JsonResponse({"error": "k must be an integer."}, status=400)
+    k = min(max(k, 1), max_countries)
+    weighted = (request.GET.get("weighted") or "").lower() in {"1", "true", "yes"}
+
+    payload = plan_itinerary(baseline, species_to_remove, k, weighted=weighted)
+    payload["k"] = k
+    return _json_response(payload)
+
+
+def itinerary_json(request, analyse_id):
+    """
+    Les ``k`` pays (glouton paresseux) qui couvrent le plus de blancs
+    restants de l'analyse ; ``weighted=1`` pondère par les pourcentages.
+    """
+    analyse = get_object_or_404(Analyse, pk=analyse_id)
+    pending = _pending_analysis_response(analyse)
+    if pending is not None:
+        return pending
+    touch_analysis(analyse)
+    as_of, error = _parse_as_of(request, analyse.results_json)
+    if error is not None:
+        return error
+    baseline, species_to_remove = get_analysis_delta(analyse, as_of)
+    if baseline is None:
+        return JsonResponse({"error": "Baseline indisponible."}, status=503)
+    return _itinerary_json(request, baseline, species_to_remove)
+
+
+def baseline_itinerary_json(request):
+    results = get_baseline_results(get_target_species_path())
+    if results is None:
+        return JsonResponse({"error": "Baseline indisponible."}, status=503)
+    return _itinerary_json(request, results, set())
+
+
+def _section_ranking_json(request, baseline, species_to_remove):
+    """
+    ``?k=`` (0 = tous les pays, pour la carte) et ``?continent=``.
+    """
+    try:
+        k = int(request.GET.get("k", 10))
+    except ValueError:
+        return JsonResponse({"error": "k must be an integer."}, status=400)
+    continent = (request.GET.get("continent") or "").strip()
+
+    ranking, n_candidates = rank_countries_by_expected_gain(
+        baseline,
+        species_to_remove,
+        k=k if k > 0 else None,
+        continent=continent or None,
+    )
+    gains = [row["Expected_Gain"] for row in ranking]
+    return _json_response({
+        "k": k,
+        "continent": continent,
+        "total_count": n_candidates,
+        "ranking": ranking,
+        "gain_min": min(gains, default=0),
+        "gain_max": max(gains, default=0),
+    })
+
+
+def section_ranking_json(request, analyse_id):
+    """
+    Pays classés par gain attendu : somme des pourcentages des blancs
+    restants de l'analyse.
+    """
+    analyse = get_object_or_404(Analyse, pk=analyse_id)
+    pending = _pending_analysis_response(analyse)
+    if pending is not None:
+        return pending
+    touch_analysis(analyse)
+    as_of, error = _parse_as_of(request, analyse.results_json)
+    if error is not None:
+        return error
+    baseline, species_to_remove = get_analysis_delta(analyse, as_of)
+    if baseline is None:
+        return JsonResponse({"error": "Baseline indisponible."}, status=503)
+    return _section_ranking_json(request, baseline, species_to_remove)
+
+
+def baseline_section_ranking_json(request):
+    results = get_baseline_results(get_target_species_path())
+    if results is None:
+        return JsonResponse({"error": "Baseline indisponible."}, status=503)
+    return _section_ranking_json(request, results, set())
+
+
+def _section_regions_json(request, baseline, species_to_remove):
+    """
+    ``?level=`` (region, country ou continent) et ``?parent=`` (pays des
+    régions, continent des pays).
+    """
+    level = (request.GET.get("level") or "region").strip()
+    if level not in LEVELS:
+        return JsonResponse({"error": f"level must be one of {', '.join(LEVELS)}."}, status=400)
+    region_index = get_region_index(baseline)
+    if region_index is None:
+        return JsonResponse({"error": "Données régionales indisponibles."}, status=503)
+    parent = (request.GET.get("parent") or "").strip()
+
+    records = region_records(baseline, region_index, species_to_remove, level, parent=parent or None)
+    return _json_response({
+        "level": level,
+        "parent": parent,
+        "total_count": len(records),
+        "records": records,
+    })
+
+
+def section_regions_json(request, analyse_id):
+    """
+    Blancs restants de l'analyse par région, pays ou continent, à partir
+    des espèces cibles régionales (``core.regions``).
+    """
+    analyse = get_object_or_404(Analyse, pk=analyse_id)
+    pending = _pending_analysis_response(analyse)
+    if pending is not None:
+        return pending
+    touch_analysis(analyse)
+    as_of, error = _parse_as_of(request, analyse.results_json)
+    if error is not None:
+        return error
+    baseline, species_to_remove = get_analysis_delta(analyse, as_of)
+    if baseline is None:
+        return JsonResponse({"error": "Baseline indisponible."}, status=503)
+    return _section_regions_json(request, baseline, species_to_remove)
+
+
+def baseline_section_regions_json(request):
+    results = get_baseline_results(get_target_species_path())
+    if results is None:
+        return JsonResponse({"error": "Baseline indisponible."}, status=503)
+    return _section_regions_json(request, results, set())
+
+
+def _species_detail_json(request, baseline, species_to_remove):
+    name = (request.GET.get("name") or "").strip()
+    if not name:
+        return JsonResponse({"error": "name parameter is required."}, status=400)
+    with stage("aggregate"):
+        detail = species_detail(baseline, name, species_to_remove)
+    if detail is None:
+        return JsonResponse({"error": f"Unknown species: {name!r}."}, status=404)
+    return _json_response(detail)
+
+
+def species_detail_json(request, analyse_id):
+    """
+    Fiche d'une espèce (``?name=``) : où aller la voir, et son rang global
+    parmi les blancs restants de l'analyse.
+    """
+    analyse = get_object_or_404(Analyse, pk=analyse_id)
+    pending = _pending_analysis_response(analyse)
+    if pending is not None:
+        return pending
+    touch_analysis(analyse)
+    as_of, error = _parse_as_of(request, analyse.results_json)
+    if error is not None:
+        return error
+    baseline, species_to_remove = get_analysis_delta(analyse, as_of)
+    if baseline is None:
+        return JsonResponse({"error": "Baseline indisponible."}, status=503)
+    return _species_detail_json(request, baseline, species_to_remove)
+
+
+def baseline_species_detail_json(request):
+    results = get_baseline_results(get_target_species_path())
+    if results is None:
+        return JsonResponse({"error": "Baseline indisponible."}, status=503)
+    return _species_detail_json(request, results, set())
@@ -0,0 +1,122 @@
+"""
+Préchargement du baseline au démarrage du serveur.
+
+``warm_up()`` est appelé par ``ornitho_site/wsgi.py``. Avec
+``gunicorn --preload``, le module WSGI est importé une seule fois dans le
+master avant le fork : le baseline et ses index dérivés sont alors
+construits une fois et partagés en copy-on-write par tous les workers, et la
+première requête après un déploiement est aussi rapide que les suivantes.
+Sans ``--preload``, chaque worker se préchauffe à son import.
+
+L'état du préchargement est exposé par ``ready_view`` (sonde de disponibilité),
+qui relance ``warm_up`` tant que l'état n'est pas "ready" : un baseline
+publié après le démarrage, ou une base migrée entre-temps, rend le worker
+disponible sans redémarrage.
+"""
+
+from django.db import connections
+from django.utils import timezone
+
+from .baselines import get_active_baseline_version, get_baseline_results, get_region_index, get_target_species_path
+from core.baseline_index import (
+    country_bitsets,
+    country_value_columns,
+    get_baseline_index,
+    get_species_search_index,
+    species_lookup_index,
+)
+import gc
+import logging
+import os
+import time
+
+
+logger = logging.getLogger(__name__)
+
+# État du préchargement du processus (hérité par les workers après un fork).
+WARMUP_STATUS = {
+    "state": "pending",
+    "pid": None,
+    "started_at": None,
+    "seconds": None,
+    "baseline_version": None,
+    "steps": {},
+    "error": None,
+}
+
+
+def warm_baseline(results):
+    """
+    Construit les index dérivés du baseline servis par les vues ; retourne
+    ``{étape: secondes}``.
+    """
+    steps = {}
+    started = time.perf_counter()
+    index = get_baseline_index(results)
+    steps["baseline_index"] = time.perf_counter() - started
+    started = time.perf_counter()
+    get_species_search_index(index)
+    steps["search_index"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    country_bitsets(index)
+    country_value_columns(index, results)
+    steps["itinerary_columns"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    species_lookup_index(index, results)
+    steps["species_lookup"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    if get_region_index(results) is not None:
+        steps["region_index"] = time.perf_counter() - started
+    return steps
+
+
+def warm_up(freeze=True, close_connections=True):
+    """
+    Charge le baseline actif et ses index. Ne lève jamais : en cas d'échec
+    (base non migrée, baseline absent ou corrompu...), les vues retombent sur le
+    chargement à la première requête et l'état passe à "failed" ou
+    "unavailable".
+
+    Les connexions ouvertes sont refermées (``close_connections``) pour ne
+    pas être partagées par les workers après le fork ; ``freeze``
+    (``gc.freeze()``) sort les objets chargés du suivi du ramasse-miettes,
+    qui sinon réécrirait leurs pages et casserait le partage copy-on-write.
+    Relancé depuis une requête, les deux sont désactivés.
+    """
+    WARMUP_STATUS.update({
+        "state": "running",
+        "pid": os.getpid(),
+        "started_at": timezone.now().isoformat(),
+        "error": None,
+    })
+    started = time.perf_counter()
+    try:
+        load_started = time.perf_counter()
+        version = get_active_baseline_version()
+        results = get_baseline_results(get_target_species_path(), version=version)
+        if results is None:
+            WARMUP_STATUS["state"] = "unavailable"
+            return WARMUP_STATUS
+        steps = {"baseline_load": time.perf_counter() - load_started}
+        steps.update(warm_baseline(results))
+        WARMUP_STATUS.update({
+            "state": "ready",
+            "baseline_version": version.content_hash if version is not None else None,
+            "steps": {name: round(seconds, 3) for name, seconds in steps.items()},
+        })
+    except Exception as exc:
+        # Base non migrée, JSON du baseline corrompu, fichier cible illisible... :
+        # le démarrage ne doit jamais échouer à cause du préchargement.
+        logger.exception("Baseline warmup failed")
+        WARMUP_STATUS.update({"state": "failed", "error": f"{type(exc).__name__}: {exc}"})
+    finally:
+        WARMUP_STATUS["seconds"] = round(time.perf_counter() - started, 3)
+        if close_connections:
+            connections.close_all()
+    if freeze and WARMUP_STATUS["state"] == "ready":
+        gc.collect()
+        gc.freeze()
+    return WARMUP_STATUS
@@ -0,0 +1,371 @@
+# -*- coding: utf-8 -*-
+"""
+Index dérivés d'un baseline (dictionnaire de résultats), calculés une seule
+fois par baseline puis réutilisés à chaque requête.
+
+Appartenance aux continents : avec une dizaine de continents, l'ensemble des
+continents où une espèce est présente tient dans un petit entier (bit k =
+continent k). Les totaux et le nombre d'espèces propres à un continent pour
+une life list se réduisent alors à des comptages de bits sur les masques des
+espèces restantes, sans construire d'ensembles à chaque requête.
+
+Recherche par nom : chaque trigramme des noms normalisés pointe vers la liste
+triée des lignes qui le contiennent. Une recherche de sous-chaîne
+n'examine que l'intersection des listes de ses trigrammes.
+"""
+
+from functools import reduce
+
+import numpy as np
+
+
+# {id(results): (results, index)} ; les résultats sont gardés en référence
+# pour que l'id ne puisse pas être réattribué tant que l'entrée existe.
+_INDEX_CACHE = {}
+_INDEX_CACHE_MAX_ENTRIES = 8
+
+# Seuil des comptages "au-dessus du seuil" côté service.
+SERVING_THRESHOLD = 0.0000009
+
+# Longueur des n-grammes de l'index de recherche par nom.
+SEARCH_NGRAM = 3
+
+
+def continent_mask_dtype(n_continents):
+    """
+    Plus petit entier non signé pouvant contenir ``n_continents`` bits.
+    """
+    for dtype in (np.uint8, np.uint16, np.uint32, np.uint64):
+        if n_continents <= np.iinfo(dtype).bits:
+            return dtype
+    raise ValueError(f"Too many continents for a bitmask: {n_continents}")
+
+
+def continent_mask_counts(masks, n_continents):
+    """
+    Nombre d'espèces par continent et nombre d'espèces présentes uniquement
+    sur ce continent, à partir des masques d'appartenance.
+
+    Parameters
+    ----------
+    masks : np.ndarray
+        Un masque (bit k = continent k) par espèce.
+    n_continents : int
+        Nombre de continents (bits utilisés).
+
+    Returns
+    -------
+    totals, unique : np.ndarray
+        Tableaux int64 de taille ``n_continents``.
+    """
+    masks = np.asarray(masks).astype(np.uint64)
+    bits = np.uint64(1) << np.arange(n_continents, dtype=np.uint64)
+    totals = np.array([np.count_nonzero(masks & bit) for bit in bits], dtype=np.int64)
+    # Un seul continent <=> masque égal à une puissance de deux.
+    unique = np.array([np.count_nonzero(masks == bit) for bit in bits], dtype=np.int64)
+    return totals, unique
+
+
+def _as_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def blanks_sort_key(row):
+    """
+    Clé du classement global des lignes de ``liste_blanks_records``.
+    """
+    return (
+        -int(row.get("Above_Threshold_Count", 0)),
+        -int(row.get("Country_Count", 0)),
+        -float(row.get("Max_Percentage", 0)),
+        str(row.get("Species", "")).lower(),
+    )
+
+
+def _country_values(records, country_cols):
+    """
+    Matrice float64 (lignes x pays) des valeurs, non numériques et NaN à 0.
+    """
+    try:
+        values = np.array([[row.get(country, 0) for country in country_cols] for row in records], dtype=float)
+    except (TypeError, ValueError):
+        values = np.array([[_as_float(row.get(country)) for country in country_cols] for row in records], dtype=float)
+    return np.nan_to_num(values.reshape(len(records), len(country_cols)), nan=0.0)
+
+
+def build_baseline_index(results, threshold=SERVING_THRESHOLD):
+    """
+    Construit l'index d'un baseline.
+
+    Returns
+    -------
+    index : dict
+        - ``species_keys`` : nom normalisé (``normalize_species_name``) de
+          chaque ligne de ``liste_blanks_records`` ;
+        - ``has_species`` : la ligne a un nom d'espèce ;
+        - ``continents`` : continents des colonnes pays, dans l'ordre des
+          colonnes ;
+        - ``continent_masks`` : masque des continents où la ligne a une
+          valeur > 0 ;
+        - ``present`` / ``above_threshold`` : matrices booléennes
+          (lignes x ``blanks_country_cols``) valeur > 0 / valeur > ``threshold`` ;
+        - ``max_country_idx`` : colonne de ``Max_Percentage_Country`` (-1 si
+          absente des colonnes) et ``max_values`` la valeur correspondante ;
+        - ``rank_order`` : lignes dans l'ordre de ``blanks_sort_key`` ;
+        - ``max_country_order`` : lignes ayant une colonne max, triées par
+          (pays, valeur décroissante, espèce).
+    """
+    records = results.get("liste_blanks_records", [])
+    country_cols = results.get("blanks_country_cols", [])
+    country_continents = results.get("country_continents", {})
+    n_rows = len(records)
+
+    values = _country_values(records, country_cols)
+    present = values > 0
+
+    continents = []
+    column_bits = []
+    for col_idx, country in enumerate(country_cols):
+        continent = country_continents.get(country)
+        if not continent:
+            continue
+        if continent not in continents:
+            continents.append(continent)
+        column_bits.append((col_idx, 1 << continents.index(continent)))
+
+    dtype = continent_mask_dtype(len(continents))
+    masks = np.zeros(n_rows, dtype=dtype)
+    if column_bits:
+        columns = [col_idx for col_idx, _ in column_bits]
+        bit_values = np.array([bit for _, bit in column_bits], dtype=np.uint64)
+        # OU des bits de chaque continent où la valeur est > 0.
+        masks[:] = np.bitwise_or.reduce(np.where(present[:, columns], bit_values, np.uint64(0)), axis=1)
+
+    country_to_idx = {country: idx for idx, country in enumerate(country_cols)}
+    max_country_idx = np.array(
+        [country_to_idx.get(row.get("Max_Percentage_Country"), -1) for row in records],
+        dtype=np.int32,
+    )
+    has_max = max_country_idx >= 0
+    max_values = np.zeros(n_rows, dtype=float)
+    max_values[has_max] = values[np.flatnonzero(has_max), max_country_idx[has_max]]
+
+    species_names = ["" if row.get("Species") is None else str(row.get("Species")) for row in records]
+    max_country_order = sorted(
+        np.flatnonzero(has_max).tolist(),
+        key=lambda idx: (country_cols[max_country_idx[idx]], -max_values[idx], species_names[idx]),
+    )
+
+    return {
+        "species_keys": [name.strip().lower() for name in species_names],
+        "has_species": np.array([bool(row.get("Species")) for row in records], dtype=bool),
+        "continents": continents,
+        "continent_masks": masks,
+        "threshold": threshold,
+        "present": present,
+        "above_threshold": values > threshold,
+        "max_country_idx": max_country_idx,
+        "max_values": max_values,
+        "rank_order": np.array(
+            sorted(range(n_rows), key=lambda idx: blanks_sort_key(records[idx])),
+            dtype=np.int64,
+        ),
+        "max_country_order": np.array(max_country_order, dtype=np.int64),
+    }
+
+
+def above_threshold_matrix(index, results, threshold):
+    """
+    Matrice booléenne valeur > ``threshold`` : celle de l'index pour le seuil
+    de service, sinon recalculée depuis les lignes du baseline.
+    """
+    if float(threshold) == index["threshold"]:
+        return index["above_threshold"]
+    return _country_values(
+        results.get("liste_blanks_records", []),
+        results.get("blanks_country_cols", []),
+    ) > float(threshold)
+
+
+def country_bitsets(index):
+    """
+    Bitsets par pays (pays x octets, ``np.packbits`` des lignes) des
+    valeurs au-dessus du seuil de service, calculés au premier appel puis
+    gardés dans l'index.
+    """
+    bitsets = index.get("country_bitsets")
+    if bitsets is None:
+        bitsets = np.packbits(index["above_threshold"].T, axis=1)
+        index["country_bitsets"] = bitsets
+    return bitsets
+
+
+def country_value_columns(index, results):
+    """
+    Valeurs par pays (pays x lignes, float32, contiguës par pays), mises à
+    zéro sous le seuil de service ; calculées au premier appel puis gardées
+    dans l'index.
+    """
+    columns = index.get("country_value_columns")
+    if columns is None:
+        values = _country_values(
+            results.get("liste_blanks_records", []),
+            results.get("blanks_country_cols", []),
+        )
+        columns = np.ascontiguousarray(np.where(index["above_threshold"], values, 0.0).T, dtype=np.float32)
+        index["country_value_columns"] = columns
+    return columns
+
+
+def species_lookup_index(index, results):
+    """
+    Index espèce -> pays, calculé au premier appel puis gardé dans l'index.
+
+    Returns
+    -------
+    dict
+        - ``row_by_key`` : ligne de chaque nom normalisé ;
+        - ``indptr``, ``countries``, ``values`` : liste d'adjacence au
+          format CSR ; les pays où la ligne i a une valeur > 0 sont
+          ``countries[indptr[i]:indptr[i + 1]]`` (colonnes de
+          ``blanks_country_cols``), par valeur décroissante, avec leurs
+          valeurs dans ``values`` ;
+        - ``rank_position`` : position de chaque ligne dans ``rank_order``.
+    """
+    lookup = index.get("species_lookup")
+    if lookup is None:
+        values = _country_values(
+            results.get("liste_blanks_records", []),
+            results.get("blanks_country_cols", []),
+        )
+        n_rows = values.shape[0]
+        rows, cols = np.nonzero(values > 0)
+        cell_values = values[rows, cols]
+        order = np.lexsort((cols, -cell_values, rows))
+        indptr = np.zeros(n_rows + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=n_rows), out=indptr[1:])
+        rank_position = np.empty(n_rows, dtype=np.int64)
+        rank_position[index["rank_order"]] = np.arange(n_rows)
+
+        row_by_key = {}
+        for row_idx, key in enumerate(index["species_keys"]):
+            if key:
+                row_by_key.setdefault(key, row_idx)
+
+        lookup = {
+            "row_by_key": row_by_key,
+            "indptr": indptr,
+            "countries": cols[order].astype(np.int32),
+            "values": cell_values[order],
+            "rank_position": rank_position,
+        }
+        index["species_lookup"] = lookup
+    return lookup
+
+
+def get_baseline_index(results):
+    """
+    Index de ``results``, calculé au premier appel pour ce baseline.
+    """
+    entry = _INDEX_CACHE.get(id(results))
+    if entry is not None and entry[0] is results:
+        return entry[1]
+    index = build_baseline_index(results)
+    _INDEX_CACHE[id(results)] = (results, index)
+    while len(_INDEX_CACHE) > _INDEX_CACHE_MAX_ENTRIES:
+        _INDEX_CACHE.pop(next(iter(_INDEX_CACHE)))
+    return index
+
+
+def forget_baseline_index(results):
+    _INDEX_CACHE.pop(id(results), None)
+
+
+def surviving_species_mask(index, species_to_remove):
+    """
+    Lignes du baseline qui restent après retrait de la life list.
+    ``species_to_remove`` est un ensemble de noms normalisés, ou directement
+    le masque booléen des lignes retirées (``core.species_delta``).
+    """
+    if isinstance(species_to_remove, np.ndarray):
+        return ~species_to_remove
+    return np.fromiter(
+        (key not in species_to_remove for key in index["species_keys"]),
+        dtype=bool,
+        count=len(index["species_keys"]),
+    )
+
+
+def _ngrams(text):
+    return {text[start:start + SEARCH_NGRAM] for start in range(len(text) - SEARCH_NGRAM + 1)}
+
+
+def build_species_search_index(species_keys):
+    """
+    Listes de lignes par trigramme des noms normalisés.
+
+    Returns
+    -------
+    postings : dict
+        ``{trigramme: np.ndarray}`` des positions (croissantes) des lignes
+        dont le nom contient le trigramme.
+    """
+    postings = {}
+    for row_idx, key in enumerate(species_keys):
+        for gram in _ngrams(key):
+            postings.setdefault(gram, []).append(row_idx)
+    return {gram: np.array(rows, dtype=np.int32) for gram, rows in postings.items()}
+
+
+def get_species_search_index(index):
+    """
+    Index de recherche de l'index ``index``, construit au premier appel
+    (ou au préchargement du serveur).
+    """
+    postings = index.get("search_postings")
+    if postings is None:
+        postings = index["search_postings"] = build_species_search_index(index["species_keys"])
+    return postings
+
+
+def species_search_mask(index, search):
+    """
+    Lignes dont le nom normalisé contient ``search`` (déjà en minuscules).
+    Les recherches plus courtes qu'un trigramme parcourent tous les noms.
+    """
+    species_keys = index["species_keys"]
+    if len(search) < SEARCH_NGRAM:
+        return np.fromiter((search in key for key in species_keys), dtype=bool, count=len(species_keys))
+
+    mask = np.zeros(len(species_keys), dtype=bool)
+    postings = get_species_search_index(index)
+    rows = [postings.get(gram) for gram in _ngrams(search)]
+    if any(row_ids is None for row_ids in rows):
+        return mask
+    candidates = reduce(np.intersect1d, sorted(rows, key=len))
+    # Les trigrammes communs ne garantissent pas la sous-chaîne : vérification.
+    mask[[row_idx for row_idx in candidates.tolist() if search in species_keys[row_idx]]] = True
+    return mask
+
+
+def continents_records_from_masks(index, row_mask, include_empty=False):
+    """
+    ``continents_records`` (triés par nom) pour les lignes ``row_mask``.
+    Sans ``include_empty``, les continents sans espèce sont omis.
+    """
+    continents = index["continents"]
+    totals, unique = continent_mask_counts(index["continent_masks"][row_mask], len(continents))
+    records = [
+        {
+            "Continent": continent,
+            "Total_Species": int(total),
+            "Unique_Species": int(unique_count),
+        }
+        for continent, total, unique_count in zip(continents, totals, unique)
+        if include_empty or total
+    ]
+    records.sort(key=lambda r: str(r["Continent"]).lower())
+    return records
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""
+Analyse de groupe : quelles espèces du baseline restent à voir pour k des n
+membres d'un groupe, par pays.
+
+Chaque membre est décrit par le masque des lignes du baseline qu'il a déjà
+vues (masque « retiré » d'une analyse compacte). Les masques empilés forment
+la matrice d'appartenance membres × espèces ; sa somme par colonne donne,
+pour chaque espèce, le nombre de membres pour qui elle est un blanc. Les
+comptages « blanc pour k membres » par pays sont ensuite obtenus par un seul
+produit matriciel entre l'encodage one-hot de ce nombre (espèces × (n + 1))
+et la matrice de présence espèces × pays de l'index du baseline.
+"""
+
+import numpy as np
+
+from core.baseline_index import SERVING_THRESHOLD, above_threshold_matrix, get_baseline_index
+
+
+def group_blank_members(index, seen_masks):
+    """
+    Nombre de membres pour qui chaque ligne du baseline est un blanc.
+
+    Parameters
+    ----------
+    seen_masks : list of numpy.ndarray
+        Un masque booléen par membre (lignes déjà vues).
+    """
+    n_rows = len(index["species_keys"])
+    membership = np.vstack(seen_masks) if seen_masks else np.zeros((0, n_rows), dtype=bool)
+    return len(seen_masks) - np.count_nonzero(membership, axis=0)
+
+
+def group_removed_mask(blank_members, min_members):
+    """
+    Lignes écartées pour le groupe : celles qui sont un blanc pour moins de
+    ``min_members`` membres. Utilisable comme ``species_to_remove`` dans
+    ``core.serving``.
+    """
+    return blank_members < min_members
+
+
+def blank_members_by_country(baseline_results, blank_members, n_members, threshold=SERVING_THRESHOLD):
+    """
+    Par pays, nombre d'espèces présentes (et au-dessus de ``threshold``) qui
+    sont un blanc pour exactement k membres, k = 0 … ``n_members``.
+
+    Returns
+    -------
+    dict
+        ``{pays: {"total": [c_0, …, c_n], "above_threshold": [c_0, …, c_n]}}``.
+    """
+    index = get_baseline_index(baseline_results)
+    country_cols = baseline_results.get("blanks_country_cols", [])
+    n_rows = len(blank_members)
+
+    one_hot = np.zeros((n_rows, n_members + 1), dtype=np.float32)
+    one_hot[np.arange(n_rows), blank_members] = 1.0
+    presence = np.hstack([
+        index["present"],
+        above_threshold_matrix(index, baseline_results, threshold),
+    ]).astype(np.float32)
+    counts = np.rint(one_hot.T @ presence).astype(np.int64)
+
+    n_countries = len(country_cols)
+    return {
+        country: {
+            "total": counts[:, col_idx].tolist(),
+            "above_threshold": counts[:, n_countries + col_idx].tolist(),
+        }
+        for col_idx, country in enumerate(country_cols)
+    }
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""
+Itinéraire multi-pays : quels K pays couvrent le plus de blancs restants
+d'une life list (problème de couverture maximale).
+
+Résolu par l'algorithme glouton paresseux (« lazy greedy ») : les gains
+marginaux de chaque pays sont gardés dans un tas ; comme l'objectif est
+sous-modulaire, un gain ne peut que baisser quand la sélection grandit, et
+il suffit de réévaluer le pays en tête du tas jusqu'à ce qu'il y reste.
+Garantie habituelle du glouton : au moins (1 - 1/e) de l'optimum.
+
+  - Non pondéré : un blanc compte 1 s'il est présent (au-dessus du seuil)
+    dans un pays choisi. Chaque pays est un bitset des lignes du baseline
+    (``core.baseline_index.country_bitsets``) et un gain est un comptage de
+    bits sur ``bitset & restants``.
+  - Pondéré : un blanc rapporte sa meilleure valeur (pourcentage) parmi les
+    pays choisis ; le gain d'un pays est la somme des améliorations qu'il
+    apporte (``core.baseline_index.country_value_columns``).
+"""
+
+import heapq
+
+import numpy as np
+
+from core.baseline_index import country_bitsets, country_value_columns, get_baseline_index
+from core.serving import delta_kept_mask
+from core.timing import stage
+
+
+def plan_itinerary(baseline_results, species_to_remove, k, weighted=False):
+    """
+    Sélectionne au plus ``k`` pays par glouton paresseux.
+
+    Returns
+    -------
+    dict
+        ``steps`` (pays dans l'ordre de sélection, avec ``gain`` marginal,
+        ``new_species`` nouvellement couvertes et cumuls), ``total_blanks``
+        (blancs restants de la life list) et ``evaluations`` (nombre de
+        gains recalculés).
+    """
+    country_cols = baseline_results.get("blanks_country_cols", [])
+    country_continents = baseline_results.get("country_continents", {})
+
+    with stage("filter"):
+        index = get_baseline_index(baseline_results)
+        kept = delta_kept_mask(baseline_results, species_to_remove) & index["has_species"]
+        remaining = np.packbits(kept)
+        bitsets = country_bitsets(index)
+
+    with stage("aggregate"):
+        if weighted:
+            columns = country_value_columns(index, baseline_results)[:, kept]
+            best = np.zeros(columns.shape[1], dtype=np.float32)
+            initial_gains = columns.sum(axis=1, dtype=np.float64)
+
+            def gain(col_idx):
+                return float(np.maximum(columns[col_idx] - best, 0).sum(dtype=np.float64))
+
+            def take(col_idx):
+                np.maximum(best, columns[col_idx], out=best)
+        else:
+            initial_gains = np.bitwise_count(bitsets & remaining).sum(axis=1)
+
+            def gain(col_idx):
+                return int(np.bitwise_count(bitsets[col_idx] & remaining).sum())
+
+            def take(col_idx):
+                pass
+
+        # (-gain, colonne, taille de la sélection au moment du calcul)
+        heap = [(-float(g), col_idx, 0) for col_idx, g in enumerate(initial_gains.tolist()) if g > 0]
+        heapq.heapify(heap)
+
+        steps = []
+        evaluations = len(country_cols)
+        cumulative_gain = 0.0
+        cumulative_species = 0
+        while heap and len(steps) < k:
+            neg_gain, col_idx, computed_at = heapq.heappop(heap)
+            if computed_at != len(steps):
+                # Gain périmé : réévalué puis remis dans le tas.
+                evaluations += 1
+                current = gain(col_idx)
+                if current > 0:
+                    heapq.heappush(heap, (-float(current), col_idx, len(steps)))
+                continue
+
+            new_species = int(np.bitwise_count(bitsets[col_idx] & remaining).sum())
+            take(col_idx)
+            remaining &= ~bitsets[col_idx]
+            step_gain = -neg_gain if weighted else new_species
+            cumulative_gain += step_gain
+            cumulative_species += new_species
+            country = country_cols[col_idx]
+            steps.append({
+                "country": country,
+                "continent": country_continents.get(country),
+                "gain": step_gain,
+                "new_species": new_species,
+                "cumulative_gain": cumulative_gain if weighted else cumulative_species,
+                "cumulative_species": cumulative_species,
+            })
+
+    return {
+        "steps": steps,
+        "total_blanks": int(np.count_nonzero(kept)),
+        "weighted": bool(weighted),
+        "evaluations": evaluations,
+    }
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""
+Comptabilité mémoire : taille profonde des structures résidentes (baseline,
+index dérivés) et histogrammes des pics d'allocation par requête
+(tracemalloc, sur les requêtes échantillonnées).
+"""
+
+import sys
+
+import numpy as np
+
+from core.timing import StageHistograms
+
+
+# Bornes (octets) des histogrammes de pic d'allocation.
+PEAK_ALLOC_BUCKETS = tuple(mb * 1024 * 1024 for mb in (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000))
+
+PEAK_ALLOC_HISTOGRAMS = StageHistograms(buckets=PEAK_ALLOC_BUCKETS)
+
+
+def deep_sizeof(obj, seen=None):
+    """
+    Taille (octets) de ``obj`` et de tout ce qu'il référence via dict,
+    list/tuple/set et tableaux NumPy. Les objets déjà présents dans ``seen``
+    (ids) ne sont pas recomptés : partager ``seen`` entre plusieurs appels
+    attribue chaque objet partagé à la première structure qui le contient.
+    """
+    if seen is None:
+        seen = set()
+    total = 0
+    stack = [obj]
+    while stack:
+        current = stack.pop()
+        if id(current) in seen:
+            continue
+        seen.add(id(current))
+        if isinstance(current, np.ndarray):
+            # nbytes est déjà inclus pour un tableau qui possède ses données.
+            total += sys.getsizeof(current) + (0 if current.flags.owndata else current.nbytes)
+            if current.dtype == object:
+                stack.extend(current.ravel().tolist())
+            continue
+        total += sys.getsizeof(current)
+        if isinstance(current, dict):
+            stack.extend(current.keys())
+            stack.extend(current.values())
+        elif isinstance(current, (list, tuple, set, frozenset)):
+            stack.extend(current)
+    return total
+
+
+def structure_breakdown(structures):
+    """
+    Taille profonde de chaque entrée de ``structures`` (``{nom: objet}``),
+    dans l'ordre donné, les objets partagés étant comptés une seule fois.
+
+    Returns
+    -------
+    rows : list of (str, int)
+        (nom, octets), triés par taille décroissante.
+    """
+    seen = set()
+    rows = [(name, deep_sizeof(obj, seen)) for name, obj in structures.items()]
+    rows.sort(key=lambda row: -row[1])
+    return rows
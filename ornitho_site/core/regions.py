@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+"""
+Espèces cibles à la résolution subnationale (États, provinces : codes
+``S/P`` eBird comme ``EC-P``), hiérarchie région → pays → continent.
+
+La matrice espèces × régions compte environ dix fois plus de colonnes que
+la matrice par pays et reste très creuse : elle est gardée sous forme de
+triplets (ligne du baseline, région, valeur) triés par ligne puis par
+région, les régions étant numérotées pays par pays. Les niveaux pays et
+continent ne sont pas des matrices séparées : ils sont dérivés des
+triplets régionaux par réduction de segments (``np.maximum.reduceat``) sur
+les groupes (ligne, parent) consécutifs ; la valeur d'une espèce dans un
+pays est sa meilleure valeur parmi les régions du pays.
+
+Une requête utilisateur à n'importe quel niveau est un ``np.bincount`` des
+triplets du niveau dont la ligne est un blanc restant : coût proportionnel
+au nombre de triplets, sans matrice dense.
+
+Source : CSV long (une ligne par espèce et par région) avec les colonnes
+``Species``, ``Region``, ``Country`` et ``Value`` ; ``Country`` reprend les
+noms de ``blanks_country_cols``.
+"""
+
+import csv
+
+import numpy as np
+
+from core.baseline_index import SERVING_THRESHOLD, get_baseline_index, species_lookup_index
+from core.serving import delta_kept_mask
+from core.timing import stage
+
+
+REGION_COLUMNS = ("Species", "Region", "Country", "Value")
+
+LEVELS = ("region", "country", "continent")
+
+
+def read_region_targets(path):
+    """
+    Lit le CSV régional : liste de ``(espèce, région, pays, valeur)``, les
+    lignes sans espèce, sans région ou de valeur non numérique étant ignorées.
+    """
+    rows = []
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        missing = [column for column in REGION_COLUMNS if column not in (reader.fieldnames or [])]
+        if missing:
+            raise ValueError(f"Missing columns in {path}: {', '.join(missing)}")
+        for row in reader:
+            species = (row["Species"] or "").strip()
+            region = (row["Region"] or "").strip()
+            if not species or not region:
+                continue
+            try:
+                value = float(row["Value"])
+            except (TypeError, ValueError):
+                continue
+            rows.append((species, region, (row["Country"] or "").strip(), value))
+    return rows
+
+
+def _segment_max(rows, units, values, parents):
+    """
+    Réduit des triplets triés par (ligne, unité) au niveau parent : un
+    triplet par (ligne, parent), de valeur maximale. ``parents`` donne le
+    parent de chaque unité.
+    """
+    parent_units = parents[units]
+    if not len(rows):
+        return rows, parent_units, values
+    order = np.lexsort((parent_units, rows))
+    rows, parent_units, values = rows[order], parent_units[order], values[order]
+    starts = np.flatnonzero(np.r_[True, (rows[1:] != rows[:-1]) | (parent_units[1:] != parent_units[:-1])])
+    return rows[starts], parent_units[starts], np.maximum.reduceat(values, starts)
+
+
+def build_region_index(baseline_results, region_rows, country_aliases=None, threshold=SERVING_THRESHOLD):
+    """
+    Index régional aligné sur les lignes et les colonnes d'un baseline.
+
+    Parameters
+    ----------
+    region_rows : iterable
+        ``(espèce, région, pays, valeur)`` (``read_region_targets``).
+    country_aliases : dict, optional
+        Noms de pays alternatifs -> noms de ``blanks_country_cols``.
+
+    Returns
+    -------
+    dict
+        ``levels`` : pour chaque niveau de ``LEVELS``, ``names`` (unités),
+        ``parents`` (indice de l'unité parente au niveau suivant, -1 pour
+        les continents), ``has_targets`` (unités ayant au moins une espèce)
+        et les triplets ``rows`` / ``units`` / ``values`` (plus ``above``,
+        valeur > ``threshold``) ; ``unmatched`` compte les
+        lignes du CSV dont l'espèce ou le pays est inconnu du baseline, ou
+        dont la région est déjà rattachée à un autre pays (la première
+        ligne de la région fixe son pays).
+    """
+    index = get_baseline_index(baseline_results)
+    row_by_key = species_lookup_index(index, baseline_results)["row_by_key"]
+    country_cols = baseline_results.get("blanks_country_cols", [])
+    country_continents = baseline_results.get("country_continents", {})
+    country_idx = {country: col_idx for col_idx, country in enumerate(country_cols)}
+    country_aliases = country_aliases or {}
+
+    region_country = {}
+    cells = {}
+    unmatched = 0
+    for species, region, country, value in region_rows:
+        col_idx = country_idx.get(country)
+        if col_idx is None:
+            col_idx = country_idx.get(country_aliases.get(country))
+        row_idx = row_by_key.get(species.lower())
+        if col_idx is None or row_idx is None:
+            unmatched += 1
+            continue
+        if region_country.setdefault(region, col_idx) != col_idx:
+            # Même code de région sous un second pays : ligne ignorée.
+            unmatched += 1
+            continue
+        key = (row_idx, region)
+        if value > cells.get(key, 0.0):
+            cells[key] = value
+
+    # Régions numérotées pays par pays : les triplets triés par (ligne,
+    # région) sont alors déjà groupés par (ligne, pays).
+    regions = sorted(region_country, key=lambda region: (region_country[region], region))
+    region_idx = {region: idx for idx, region in enumerate(regions)}
+
+    continents = list(index["continents"])
+    continent_idx = {continent: idx for idx, continent in enumerate(continents)}
+    country_parents = np.array(
+        [continent_idx.get(country_continents.get(country), -1) for country in country_cols],
+        dtype=np.int32,
+    )
+
+    n_cells = len(cells)
+    rows = np.fromiter((row_idx for row_idx, _ in cells), dtype=np.int32, count=n_cells)
+    units = np.fromiter((region_idx[region] for _, region in cells), dtype=np.int32, count=n_cells)
+    values = np.fromiter(cells.values(), dtype=np.float32, count=n_cells)
+    order = np.lexsort((units, rows))
+    rows, units, values = rows[order], units[order], values[order]
+
+    region_parents = np.array([region_country[region] for region in regions], dtype=np.int32)
+    country_rows, country_units, country_values = _segment_max(rows, units, values, region_parents)
+    # Pays sans continent : absents du niveau continent, comme dans les agrégats par pays.
+    with_continent = country_parents[country_units] >= 0
+    continent_rows, continent_units, continent_values = _segment_max(
+        country_rows[with_continent],
+        country_units[with_continent],
+        country_values[with_continent],
+        country_parents,
+    )
+
+    def level(names, parents, level_rows, level_units, level_values):
+        return {
+            "names": names,
+            "parents": parents,
+            "rows": level_rows,
+            "units": level_units,
+            "values": level_values,
+            "above": level_values > threshold,
+            "has_targets": np.bincount(level_units, minlength=len(names)) > 0,
+        }
+
+    return {
+        "levels": {
+            "region": level(regions, region_parents, rows, units, values),
+            "country": level(list(country_cols), country_parents, country_rows, country_units, country_values),
+            "continent": level(
+                continents,
+                np.full(len(continents), -1, dtype=np.int32),
+                continent_rows,
+                continent_units,
+                continent_values,
+            ),
+        },
+        "unmatched": unmatched,
+    }
+
+
+def region_blank_counts(region_index, kept, level):
+    """
+    Blancs restants par unité de ``level`` pour le masque ``kept`` des
+    lignes du baseline : ``(total, au-dessus du seuil)`` en int64.
+    """
+    data = region_index["levels"][level]
+    n_units = len(data["names"])
+    kept_cells = kept[data["rows"]]
+    total = np.bincount(data["units"][kept_cells], minlength=n_units)
+    above = np.bincount(data["units"][kept_cells & data["above"]], minlength=n_units)
+    return total, above
+
+
+def region_records(baseline_results, region_index, species_to_remove, level, parent=None):
+    """
+    Blancs restants d'une life list par unité de ``level`` (région, pays ou
+    continent), triés comme ``liste_pays_records``. ``parent`` restreint aux
+    unités d'un pays (niveau région) ou d'un continent (niveau pays).
+
+    Returns
+    -------
+    list of dict
+        ``{"Name", "Parent", "Total_Species", "Species_Above_00009"}`` ;
+        les unités sans aucune espèce cible sont omises.
+    """
+    levels = region_index["levels"]
+    data = levels[level]
+    parent_names = levels[LEVELS[LEVELS.index(level) + 1]]["names"] if level != "continent" else []
+
+    with stage("filter"):
+        index = get_baseline_index(baseline_results)
+        kept = delta_kept_mask(baseline_results, species_to_remove) & index["has_species"]
+
+    with stage("aggregate"):
+        total, above = region_blank_counts(region_index, kept, level)
+        records = []
+        for unit_idx in np.flatnonzero(data["has_targets"]).tolist():
+            parent_idx = int(data["parents"][unit_idx])
+            parent_name = parent_names[parent_idx] if parent_idx >= 0 else None
+            if parent and parent_name != parent:
+                continue
+            records.append({
+                "Name": data["names"][unit_idx],
+                "Parent": parent_name,
+                "Total_Species": int(total[unit_idx]),
+                "Species_Above_00009": int(above[unit_idx]),
+            })
+        records.sort(key=lambda r: (-r["Total_Species"], str(r["Name"]).lower()))
+    return records
@@ -0,0 +1,618 @@
+# -*- coding: utf-8 -*-
+"""
+Calculs côté service : retrait d'une life list du baseline, agrégats par
+pays et par continent, pagination des blancs.
+
+Ce module ne dépend que de NumPy, du baseline compilé (dictionnaire de
+résultats) et de son index (``core.baseline_index``) : les workers web ne
+chargent ni pandas ni openpyxl, réservés à la reconstruction du baseline
+(``core.world_blanks``, ``core.world_matrix``).
+
+Partout, ``species_to_remove`` est soit un ensemble de noms normalisés, soit
+le masque booléen des lignes retirées décodé d'une analyse compacte
+(``core.species_delta``).
+"""
+
+from bisect import bisect_left, insort
+from itertools import compress
+from operator import itemgetter
+import heapq
+
+import numpy as np
+
+from core.baseline_index import (
+    SERVING_THRESHOLD,
+    above_threshold_matrix,
+    blanks_sort_key,
+    continent_mask_counts,
+    continents_records_from_masks,
+    country_value_columns,
+    get_baseline_index,
+    species_lookup_index,
+    species_search_mask,
+    surviving_species_mask,
+)
+from core.timing import stage
+
+
+def filter_upload_results(baseline_results, species_to_remove, threshold=SERVING_THRESHOLD):
+    """
+    Recalcule les résultats à partir d'un baseline en enlevant les espèces uploadées.
+
+    Les comptages reposent sur les matrices de l'index du baseline : aucune
+    ligne n'est copiée ni convertie en DataFrame. ``liste_blanks_records``
+    contient les lignes du baseline elles-mêmes (partagées, à ne pas
+    modifier), dans l'ordre du classement global : le rang d'une ligne est
+    sa position (à partir de 1).
+    """
+    blanks_country_cols = baseline_results.get("blanks_country_cols", [])
+    country_continents = baseline_results.get("country_continents", {})
+    records = baseline_results["liste_blanks_records"]
+
+    with stage("filter"):
+        index = get_baseline_index(baseline_results)
+        kept = surviving_species_mask(index, species_to_remove)
+        rank_order = index["rank_order"]
+        filtered_blanks = [records[idx] for idx in rank_order[kept[rank_order]].tolist()]
+
+    if not filtered_blanks:
+        return {
+            "liste_blanks_records": [],
+            "liste_pays_records": [],
+            "continents_records": [],
+            "pays_list": [],
+            "blanks_country_cols": blanks_country_cols,
+            "blancks_par_pays": {},
+            "pays_stats": {},
+            "country_continents": country_continents,
+            "species_min": 0,
+            "species_max": 0,
+        }
+
+    with stage("aggregate"):
+        total_species_by_country = np.count_nonzero(index["present"][kept], axis=0)
+        above_threshold_by_country = np.count_nonzero(
+            above_threshold_matrix(index, baseline_results, threshold)[kept], axis=0,
+        )
+        max_country_idx = index["max_country_idx"]
+        max_country_counts = np.bincount(
+            max_country_idx[kept & (max_country_idx >= 0)],
+            minlength=len(blanks_country_cols),
+        )
+
+        liste_pays_records = []
+        pays_stats = {}
+        for col_idx, country in enumerate(blanks_country_cols):
+            total_species = int(total_species_by_country[col_idx])
+            species_above_threshold = int(above_threshold_by_country[col_idx])
+            max_species_count = int(max_country_counts[col_idx])
+
+            pays_stats[country] = {
+                "Total_Species": total_species,
+                "Species_Above_00009": species_above_threshold,
+                "Max_Species_Count": max_species_count,
+            }
+            liste_pays_records.append({
+                "Country": country,
+                "Continent": country_continents.get(country),
+                "Total_Species": total_species,
+                "Species_Above_00009": species_above_threshold,
+                "Max_Species_Count": max_species_count,
+            })
+
+        liste_pays_records.sort(key=lambda r: (-r["Total_Species"], str(r.get("Country", "")).lower()))
+
+        # Appartenance aux continents : masques précalculés une fois par baseline
+        continents_records = continents_records_from_masks(index, kept, include_empty=True)
+
+        # Lignes déjà triées par (pays, valeur décroissante, espèce) dans l'index.
+        max_country_order = index["max_country_order"]
+        max_values = index["max_values"]
+        blancks_par_pays = {}
+        for idx in max_country_order[kept[max_country_order]].tolist():
+            country = blanks_country_cols[max_country_idx[idx]]
+            species = records[idx].get("Species")
+            blancks_par_pays.setdefault(country, []).append({
+                "species": "" if species is None else species,
+                "value": float(max_values[idx]),
+            })
+
+        species_min = min((row["Total_Species"] for row in liste_pays_records), default=0)
+        species_max = max((row["Total_Species"] for row in liste_pays_records), default=0)
+
+    return {
+        "liste_blanks_records": filtered_blanks,
+        "liste_pays_records": liste_pays_records,
+        "continents_records": continents_records,
+        "pays_list": sorted(blancks_par_pays.keys()),
+        "blanks_country_cols": blanks_country_cols,
+        "blancks_par_pays": blancks_par_pays,
+        "pays_stats": pays_stats,
+        "country_continents": country_continents,
+        "species_min": species_min,
+        "species_max": species_max,
+    }
+
+
+def delta_kept_mask(baseline_results, species_to_remove):
+    """
+    Lignes du baseline conservées après retrait de la life list ; les
+    lignes sans nom d'espèce ne sont jamais retirées.
+    """
+    index = get_baseline_index(baseline_results)
+    return surviving_species_mask(index, species_to_remove) | ~index["has_species"]
+
+
+def filtered_baseline_rows(baseline_results, species_to_remove, search=""):
+    """
+    Lignes du baseline (partagées, ordre du baseline) restant après retrait
+    de la life list et, avec ``search``, dont le nom contient ``search``
+    (index de recherche du baseline).
+    """
+    with stage("filter"):
+        kept = delta_kept_mask(baseline_results, species_to_remove)
+        if search:
+            kept &= species_search_mask(get_baseline_index(baseline_results), search)
+        return list(compress(baseline_results.get("liste_blanks_records", []), kept.tolist()))
+
+
+def compute_summary_from_baseline_delta(baseline_results, species_to_remove, threshold=SERVING_THRESHOLD):
+    """
+    Agrégats par pays et par continent d'une life list, sans recalculer
+    ``liste_blanks_records``.
+    """
+    records = baseline_results.get("liste_blanks_records", [])
+    country_cols = baseline_results.get("blanks_country_cols", [])
+    country_continents = baseline_results.get("country_continents", {})
+
+    max_species_count = {c: 0 for c in country_cols}
+    blancks_par_pays = {}
+
+    with stage("filter"):
+        index = get_baseline_index(baseline_results)
+        kept = delta_kept_mask(baseline_results, species_to_remove)
+
+    with stage("aggregate"):
+        total_species = np.count_nonzero(index["present"][kept], axis=0)
+        above_threshold = np.count_nonzero(
+            above_threshold_matrix(index, baseline_results, threshold)[kept], axis=0,
+        )
+
+        for row in compress(records, kept.tolist()):
+            max_country = row.get("Max_Percentage_Country")
+            if not max_country:
+                continue
+            max_species_count[max_country] = max_species_count.get(max_country, 0) + 1
+            try:
+                max_value = float(row.get(max_country) or 0)
+            except (TypeError, ValueError):
+                max_value = 0.0
+            blancks_par_pays.setdefault(max_country, []).append({
+                "species": row.get("Species"),
+                "value": max_value,
+            })
+
+        for country, rows in blancks_par_pays.items():
+            rows.sort(key=lambda r: (-float(r.get("value", 0)), str(r.get("species") or "").lower()))
+
+        liste_pays_records = []
+        for col_idx, country in enumerate(country_cols):
+            liste_pays_records.append({
+                "Country": country,
+                "Continent": country_continents.get(country),
+                "Total_Species": int(total_species[col_idx]),
+                "Species_Above_00009": int(above_threshold[col_idx]),
+                "Max_Species_Count": int(max_species_count.get(country, 0)),
+            })
+        liste_pays_records.sort(key=lambda r: (-r["Total_Species"], str(r["Country"]).lower()))
+
+        continents_records = continents_records_from_masks(index, kept & index["has_species"])
+
+        pays_stats = {
+            row["Country"]: {
+                "Total_Species": row["Total_Species"],
+                "Species_Above_00009": row["Species_Above_00009"],
+                "Max_Species_Count": row["Max_Species_Count"],
+            }
+            for row in liste_pays_records
+        }
+
+        species_values = [row["Total_Species"] for row in liste_pays_records]
+        species_min = min(species_values) if species_values else 0
+        species_max = max(species_values) if species_values else 0
+
+    return {
+        "liste_pays_records": liste_pays_records,
+        "continents_records": continents_records,
+        "pays_stats": pays_stats,
+        "country_continents": country_continents,
+        "species_min": species_min,
+        "species_max": species_max,
+        "blancks_par_pays": blancks_par_pays,
+        "pays_list": sorted(blancks_par_pays.keys()),
+        "blanks_country_cols": country_cols,
+    }
+
+
+def country_rank_offsets(baseline_results, species_to_remove):
+    """
+    Rangs globaux des blancs importants de chaque pays, pour servir
+    ``blanks_by_country_from_offsets`` sans retrier toutes les lignes.
+
+    Returns
+    -------
+    dict
+        ``{pays: [[indice de ligne du baseline, rang global], ...]}``, par
+        rang croissant ; le pays est ``Max_Percentage_Country`` de la ligne.
+    """
+    records = baseline_results.get("liste_blanks_records", [])
+    with stage("aggregate"):
+        index = get_baseline_index(baseline_results)
+        kept = delta_kept_mask(baseline_results, species_to_remove)
+        rank_order = index["rank_order"]
+        offsets = {}
+        for rank, idx in enumerate(rank_order[kept[rank_order]].tolist(), start=1):
+            country = records[idx].get("Max_Percentage_Country")
+            if country:
+                offsets.setdefault(country, []).append([idx, rank])
+    return offsets
+
+
+def _patch_rank_offsets(baseline_results, index, rank_offsets, previous_removed, newly_seen, unseen):
+    # Rangs de ``country_rank_offsets`` décalés des lignes ``newly_seen``
+    # (retirées) et ``unseen`` (ajoutées), voir ``patch_summary_from_delta``.
+    records = baseline_results.get("liste_blanks_records", [])
+    rank_order = index["rank_order"]
+    rank_position = species_lookup_index(index, baseline_results)["rank_position"]
+
+    def kept_before(position):
+        # Lignes conservées par l'ancienne life list avant ``position`` dans
+        # ``rank_order`` : on remonte jusqu'à une ligne conservée rangée dans
+        # un pays, dont le rang est stocké.
+        skipped = 0
+        for before in range(position - 1, -1, -1):
+            row_idx = int(rank_order[before])
+            if previous_removed[row_idx]:
+                continue
+            entries = rank_offsets.get(records[row_idx].get("Max_Percentage_Country") or "")
+            if not entries:
+                skipped += 1
+                continue
+            entry = entries[bisect_left(entries, before, key=lambda e: rank_position[e[0]])]
+            return entry[1] + skipped
+        return skipped
+
+    unseen = unseen[np.argsort(rank_position[unseen], kind="stable")]
+    # Anciens rangs des lignes retirées ; nombre d'anciennes lignes
+    # conservées avant chaque ligne ajoutée (croissant).
+    seen_ranks = np.sort(np.array(
+        [kept_before(int(rank_position[row_idx]) + 1) for row_idx in newly_seen.tolist()],
+        dtype=np.int64,
+    ))
+    unseen_before = np.array([kept_before(int(rank_position[row_idx])) for row_idx in unseen.tolist()], dtype=np.int64)
+    unseen_ranks = unseen_before - np.searchsorted(seen_ranks, unseen_before, side="right") + np.arange(1, len(unseen) + 1)
+
+    dropped = {}
+    for row_idx in newly_seen.tolist():
+        country = records[row_idx].get("Max_Percentage_Country")
+        if country:
+            dropped.setdefault(country, []).append(row_idx)
+    inserted = {}
+    for row_idx, rank in zip(unseen.tolist(), unseen_ranks.tolist()):
+        country = records[row_idx].get("Max_Percentage_Country")
+        if country:
+            inserted.setdefault(country, []).append([row_idx, rank])
+
+    # Les rangs inférieurs au premier rang modifié restent valables.
+    first_changed = min(
+        int(seen_ranks[0]) if len(seen_ranks) else np.iinfo(np.int64).max,
+        int(unseen_before[0]) + 1 if len(unseen_before) else np.iinfo(np.int64).max,
+    )
+    offsets = {}
+    for country in set(rank_offsets) | set(inserted):
+        entries = rank_offsets.get(country, [])
+        start = bisect_left(entries, first_changed, key=itemgetter(1))
+        if start == len(entries) and country not in inserted:
+            offsets[country] = entries
+            continue
+        tail = np.array(entries[start:], dtype=np.int64).reshape(-1, 2)
+        if country in dropped:
+            tail = tail[~np.isin(tail[:, 0], dropped[country])]
+        tail[:, 1] += np.searchsorted(unseen_before, tail[:, 1]) - np.searchsorted(seen_ranks, tail[:, 1])
+        if country in inserted:
+            new_entries = np.array(inserted[country], dtype=np.int64)
+            tail = np.insert(tail, np.searchsorted(tail[:, 1], new_entries[:, 1]), new_entries, axis=0)
+        patched = entries[:start] + tail.tolist()
+        if patched:
+            offsets[country] = patched
+    return offsets
+
+
+def patch_summary_from_delta(
+    baseline_results,
+    summary,
+    rank_offsets,
+    previous_removed,
+    newly_seen,
+    unseen,
+    threshold=SERVING_THRESHOLD,
+):
+    """
+    Met à jour un résumé (champs de ``compute_summary_from_baseline_delta``
+    hors ``blancks_par_pays``) et les rangs de ``country_rank_offsets``
+    calculés pour la life list ``previous_removed`` (masque des lignes
+    retirées), pour qu'ils valent une fois les lignes ``newly_seen``
+    retirées et les lignes ``unseen`` remises (indices de lignes, même
+    baseline).
+
+    Seules les lignes modifiées sont agrégées : leurs contributions
+    (présence et seuil par pays, pays max, continents) sont retranchées ou
+    ajoutées aux comptages, et seuls les pays dont les comptages changent
+    sont replacés dans ``liste_pays_records``. Les rangs globaux stockés
+    sont décalés par une recherche dichotomique parmi les rangs modifiés,
+    à partir du premier rang modifié de chaque pays.
+
+    Returns
+    -------
+    summary, rank_offsets : dict
+        Nouveaux objets ; les entrées ne sont pas modifiées.
+    """
+    country_cols = baseline_results.get("blanks_country_cols", [])
+
+    with stage("filter"):
+        index = get_baseline_index(baseline_results)
+        has_species = index["has_species"]
+        newly_seen = np.asarray(newly_seen, dtype=np.int64)
+        unseen = np.asarray(unseen, dtype=np.int64)
+        newly_seen = newly_seen[has_species[newly_seen]]
+        unseen = unseen[has_species[unseen]]
+
+    with stage("aggregate"):
+        above = above_threshold_matrix(index, baseline_results, threshold)
+        n_countries = len(country_cols)
+
+        def max_counts(rows):
+            cols = index["max_country_idx"][rows]
+            return np.bincount(cols[cols >= 0], minlength=n_countries)
+
+        delta_total = (
+            np.count_nonzero(index["present"][unseen], axis=0)
+            - np.count_nonzero(index["present"][newly_seen], axis=0)
+        )
+        delta_above = np.count_nonzero(above[unseen], axis=0) - np.count_nonzero(above[newly_seen], axis=0)
+        delta_max = max_counts(unseen) - max_counts(newly_seen)
+
+        def sort_key(row):
+            return (-row["Total_Species"], str(row["Country"]).lower())
+
+        liste_pays_records = list(summary["liste_pays_records"])
+        pays_stats = dict(summary["pays_stats"])
+        for col_idx in np.flatnonzero(delta_total | delta_above | delta_max).tolist():
+            country = country_cols[col_idx]
+            position = bisect_left(
+                liste_pays_records,
+                (-pays_stats[country]["Total_Species"], str(country).lower()),
+                key=sort_key,
+            )
+            row = dict(liste_pays_records.pop(position))
+            row["Total_Species"] += int(delta_total[col_idx])
+            row["Species_Above_00009"] += int(delta_above[col_idx])
+            row["Max_Species_Count"] += int(delta_max[col_idx])
+            insort(liste_pays_records, row, key=sort_key)
+            pays_stats[country] = {
+                "Total_Species": row["Total_Species"],
+                "Species_Above_00009": row["Species_Above_00009"],
+                "Max_Species_Count": row["Max_Species_Count"],
+            }
+
+        continents = index["continents"]
+        added_totals, added_unique = continent_mask_counts(index["continent_masks"][unseen], len(continents))
+        seen_totals, seen_unique = continent_mask_counts(index["continent_masks"][newly_seen], len(continents))
+        continent_counts = {
+            row["Continent"]: (row["Total_Species"], row["Unique_Species"])
+            for row in summary["continents_records"]
+        }
+        continents_records = []
+        for cont_idx, continent in enumerate(continents):
+            total, unique_count = continent_counts.get(continent, (0, 0))
+            total += int(added_totals[cont_idx] - seen_totals[cont_idx])
+            unique_count += int(added_unique[cont_idx] - seen_unique[cont_idx])
+            if total:
+                continents_records.append({
+                    "Continent": continent,
+                    "Total_Species": total,
+                    "Unique_Species": unique_count,
+                })
+        continents_records.sort(key=lambda r: str(r["Continent"]).lower())
+
+        offsets = _patch_rank_offsets(baseline_results, index, rank_offsets, previous_removed, newly_seen, unseen)
+
+    patched = dict(summary)
+    patched.update({
+        "liste_pays_records": liste_pays_records,
+        "continents_records": continents_records,
+        "pays_stats": pays_stats,
+        # ``liste_pays_records`` est trié par nombre d'espèces décroissant.
+        "species_min": liste_pays_records[-1]["Total_Species"] if liste_pays_records else 0,
+        "species_max": liste_pays_records[0]["Total_Species"] if liste_pays_records else 0,
+    })
+    return patched, offsets
+
+
+def blanks_by_country_from_offsets(baseline_results, offsets, country):
+    """
+    Équivalent de ``blanks_by_country_rows`` à partir des rangs précalculés
+    par ``country_rank_offsets`` sur le même baseline.
+    """
+    records = baseline_results.get("liste_blanks_records", [])
+    rows = []
+    for idx, rank in offsets.get(country, []):
+        row = records[idx]
+        try:
+            value = float(row.get(country) or 0)
+        except (TypeError, ValueError):
+            value = 0.0
+        rows.append({"species": row.get("Species"), "value": value, "global_rank": rank})
+    return rows
+
+
+def rank_countries_by_expected_gain(baseline_results, species_to_remove, k=None, continent=None):
+    """
+    Classe les pays par somme pondérée des valeurs (pourcentages) des
+    espèces restantes : un seul produit matrice-vecteur entre les colonnes
+    de valeurs par pays et le masque des blancs restants, puis les ``k``
+    meilleurs par un tas borné (tous les pays, triés, si ``k`` est None).
+
+    Returns
+    -------
+    ranking : list of dict
+        ``{"Country", "Continent", "Expected_Gain"}`` par score décroissant.
+    n_candidates : int
+        Nombre de pays classables (après filtre ``continent``).
+    """
+    country_cols = baseline_results.get("blanks_country_cols", [])
+    country_continents = baseline_results.get("country_continents", {})
+
+    with stage("filter"):
+        index = get_baseline_index(baseline_results)
+        kept = delta_kept_mask(baseline_results, species_to_remove) & index["has_species"]
+
+    with stage("aggregate"):
+        scores = country_value_columns(index, baseline_results) @ kept.astype(np.float32)
+        candidates = [
+            col_idx
+            for col_idx, country in enumerate(country_cols)
+            if not continent or country_continents.get(country) == continent
+        ]
+        # Ex aequo : ordre des colonnes, dans les deux cas.
+        if k is None:
+            top = sorted(candidates, key=lambda col_idx: scores[col_idx], reverse=True)
+        else:
+            top = heapq.nlargest(k, candidates, key=lambda col_idx: scores[col_idx])
+
+    ranking = [
+        {
+            "Country": country_cols[col_idx],
+            "Continent": country_continents.get(country_cols[col_idx]),
+            "Expected_Gain": round(float(scores[col_idx]), 4),
+        }
+        for col_idx in top
+    ]
+    return ranking, len(candidates)
+
+
+def species_detail(baseline_results, species_name, species_to_remove):
+    """
+    Fiche d'une espèce : pays où elle est présente par valeur décroissante,
+    répartition par continent, rang dans le baseline et rang global parmi
+    les blancs restants d'une life list (None si l'espèce a été vue).
+    Retourne None si l'espèce n'est pas dans le baseline.
+
+    Coût indépendant du nombre d'espèces, hormis le rang global (un
+    comptage vectorisé sur le masque des blancs restants).
+    """
+    index = get_baseline_index(baseline_results)
+    lookup = species_lookup_index(index, baseline_results)
+    row_idx = lookup["row_by_key"].get(str(species_name).strip().lower())
+    if row_idx is None:
+        return None
+
+    country_cols = baseline_results.get("blanks_country_cols", [])
+    country_continents = baseline_results.get("country_continents", {})
+    row = baseline_results["liste_blanks_records"][row_idx]
+    start, end = lookup["indptr"][row_idx], lookup["indptr"][row_idx + 1]
+
+    countries = []
+    continents = {}
+    for col_idx, value in zip(lookup["countries"][start:end].tolist(), lookup["values"][start:end].tolist()):
+        country = country_cols[col_idx]
+        continent = country_continents.get(country)
+        countries.append({
+            "Country": country,
+            "Continent": continent,
+            "Value": value,
+            "Above_Threshold": value > index["threshold"],
+        })
+        if continent:
+            spread = continents.setdefault(continent, {"Continent": continent, "Countries": 0, "Max_Value": 0.0})
+            spread["Countries"] += 1
+            spread["Max_Value"] = max(spread["Max_Value"], value)
+
+    position = int(lookup["rank_position"][row_idx])
+    kept = delta_kept_mask(baseline_results, species_to_remove)
+    seen = not bool(kept[row_idx])
+    global_rank = None if seen else int(np.count_nonzero(kept[index["rank_order"][:position]])) + 1
+
+    return {
+        "species": row.get("Species"),
+        "seen": seen,
+        "baseline_rank": position + 1,
+        "global_rank": global_rank,
+        "max_country": row.get("Max_Percentage_Country"),
+        "max_percentage": float(index["max_values"][row_idx]) if index["max_country_idx"][row_idx] >= 0 else None,
+        "countries": countries,
+        "continents": sorted(continents.values(), key=lambda r: (-r["Countries"], str(r["Continent"]).lower())),
+    }
+
+
+def paginate_blanks(rows, search="", country="", page=1, page_size=50, threshold=SERVING_THRESHOLD):
+    """
+    Filtre (nom d'espèce, présence dans ``country``), classe et pagine des
+    lignes de blancs.
+
+    Returns
+    -------
+    total_count : int
+        Nombre de lignes après filtre.
+    page_data : list of dict
+        Copies des lignes de la page, avec leur rang ``_global_rank`` ; les
+        lignes d'origine (souvent celles du baseline en cache) ne sont pas
+        modifiées.
+    """
+    with stage("filter"):
+        filtered = []
+        for row in rows:
+            if search and search not in str(row.get("Species", "")).lower():
+                continue
+            if country:
+                value = row.get(country)
+                try:
+                    value = float(value)
+                except (TypeError, ValueError):
+                    continue
+                if value <= threshold:
+                    continue
+            filtered.append(row)
+
+        filtered.sort(key=blanks_sort_key)
+
+    start = (page - 1) * page_size
+    page_data = [
+        {**row, "_global_rank": rank}
+        for rank, row in enumerate(filtered[start:start + page_size], start=start + 1)
+    ]
+    return len(filtered), page_data
+
+
+def blanks_by_country_rows(liste_blanks_records, blancks_par_pays, country):
+    """
+    Blancs importants de ``country`` avec leur rang global, triés par rang.
+    """
+    with stage("aggregate"):
+        sorted_by_rank = sorted(liste_blanks_records, key=blanks_sort_key)
+        rank_by_species = {
+            row.get("Species"): idx + 1
+            for idx, row in enumerate(sorted_by_rank)
+        }
+
+        result_rows = [
+            {
+                "species": row.get("species"),
+                "value": row.get("value"),
+                "global_rank": rank_by_species.get(row.get("species")),
+            }
+            for row in blancks_par_pays.get(country, [])
+        ]
+
+        result_rows.sort(key=lambda row: ((row["global_rank"] or 999999), str(row["species"] or "").lower()))
+    return result_rows
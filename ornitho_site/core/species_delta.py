@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""
+Encodage compact d'une life list relativement à un baseline.
+
+Plutôt qu'une liste de noms, on stocke un bitmap sur les lignes de
+``liste_blanks_records`` du baseline (bit i = la ligne i est retirée),
+compressé (zlib) et encodé en base64, plus la liste des noms absents du
+baseline ("overflow"), nécessaire pour réencoder la life list sur une autre
+version. Le décodage donne directement le masque NumPy utilisé par
+``core.serving``, sans hacher de chaînes.
+
+Les dates de première observation sont stockées à part, triées par date
+(``encode_first_seen``) : le masque de la life list à une date passée
+(``as_of``) s'obtient par une recherche dichotomique.
+"""
+
+import base64
+import zlib
+
+import numpy as np
+
+
+def encode_species_bitmap(index, species_to_remove):
+    """
+    Encode ``species_to_remove`` (noms normalisés) sur l'index d'un baseline.
+
+    Returns
+    -------
+    bitmap : str
+        Masque des lignes retirées, bits empaquetés puis zlib + base64.
+    overflow : list of str
+        Noms (triés) sans ligne dans le baseline.
+    """
+    species_keys = index["species_keys"]
+    mask = np.fromiter(
+        (key in species_to_remove for key in species_keys),
+        dtype=bool,
+        count=len(species_keys),
+    )
+    overflow = sorted(set(species_to_remove).difference(species_keys))
+    packed = zlib.compress(np.packbits(mask).tobytes(), 9)
+    return base64.b64encode(packed).decode("ascii"), overflow
+
+
+def _packed_bitmap(bitmap, n_rows):
+    packed = np.frombuffer(zlib.decompress(base64.b64decode(bitmap)), dtype=np.uint8)
+    # ``unpackbits`` complète de zéros : la taille se vérifie sur les octets.
+    if len(packed) != (n_rows + 7) // 8:
+        raise ValueError(f"Bitmap covers {8 * len(packed)} bits, expected {n_rows} rows")
+    return packed
+
+
+def decode_species_bitmap(bitmap, n_rows):
+    """
+    Masque booléen (``n_rows`` lignes) des lignes retirées.
+    """
+    return np.unpackbits(_packed_bitmap(bitmap, n_rows), count=n_rows).astype(bool)
+
+
+def changed_bitmap_rows(bitmap, other_bitmap, n_rows):
+    """
+    Lignes qui diffèrent entre deux bitmaps encodés sur le même baseline :
+    ``(ajoutées, retirées)``, marquées seulement dans ``other_bitmap`` /
+    seulement dans ``bitmap``, par indice croissant. Seuls les octets qui
+    diffèrent sont dépaquetés.
+    """
+    packed = _packed_bitmap(bitmap, n_rows)
+    other = _packed_bitmap(other_bitmap, n_rows)
+    changed = np.flatnonzero(packed != other)
+    bits = np.unpackbits(packed[changed]).reshape(-1, 8).astype(bool)
+    other_bits = np.unpackbits(other[changed]).reshape(-1, 8).astype(bool)
+    rows = changed[:, None] * 8 + np.arange(8)
+    return rows[other_bits & ~bits], rows[bits & ~other_bits]
+
+
+def species_names_from_bitmap(index, bitmap, overflow=()):
+    """
+    Noms normalisés encodés par ``bitmap`` (sur ``index``) et ``overflow``.
+    """
+    species_keys = index["species_keys"]
+    mask = decode_species_bitmap(bitmap, len(species_keys))
+    names = {species_keys[idx] for idx in np.flatnonzero(mask).tolist()}
+    names.update(overflow)
+    names.discard("")
+    return names
+
+
+def _encode_int32(values):
+    return base64.b64encode(zlib.compress(np.asarray(values, dtype="<i4").tobytes(), 9)).decode("ascii")
+
+
+def _decode_int32(encoded):
+    return np.frombuffer(zlib.decompress(base64.b64decode(encoded)), dtype="<i4")
+
+
+def encode_first_seen(index, first_seen, overflow=()):
+    """
+    Encode les dates de première observation d'une life list sur l'index
+    d'un baseline : lignes du baseline triées par date, et leurs dates
+    (jours ordinaux, 0 = date inconnue), en int32 zlib + base64 ; les dates
+    des noms hors baseline suivent l'ordre de ``overflow``.
+
+    Parameters
+    ----------
+    first_seen : dict
+        ``{nom normalisé: jour ordinal}``.
+    """
+    species_keys = index["species_keys"]
+    rows = np.array(
+        [row_idx for row_idx, key in enumerate(species_keys) if key and key in first_seen],
+        dtype=np.int64,
+    )
+    days = np.array([first_seen[species_keys[row_idx]] for row_idx in rows.tolist()], dtype=np.int64)
+    order = np.argsort(days, kind="stable")
+    return {
+        "rows": _encode_int32(rows[order]),
+        # Dates croissantes : stockées en écarts, qui se compressent bien.
+        "days": _encode_int32(np.diff(days[order], prepend=0)),
+        "overflow_days": [int(first_seen[name]) for name in overflow],
+    }
+
+
+def first_seen_mask(encoded, n_rows, as_of_day):
+    """
+    Masque (``n_rows`` lignes) des lignes vues au plus tard le jour
+    ordinal ``as_of_day`` : une recherche dichotomique dans les dates
+    triées, sans relire la life list.
+    """
+    rows = _decode_int32(encoded["rows"])
+    days = np.cumsum(_decode_int32(encoded["days"]), dtype=np.int64)
+    mask = np.zeros(n_rows, dtype=bool)
+    mask[rows[:np.searchsorted(days, as_of_day, side="right")]] = True
+    return mask
+
+
+def first_seen_by_name(index, encoded, overflow=()):
+    """
+    ``{nom normalisé: jour ordinal}`` encodé par ``encode_first_seen``.
+    """
+    species_keys = index["species_keys"]
+    first_seen = {
+        species_keys[row_idx]: day
+        for row_idx, day in zip(
+            _decode_int32(encoded["rows"]).tolist(),
+            np.cumsum(_decode_int32(encoded["days"]), dtype=np.int64).tolist(),
+        )
+    }
+    first_seen.update(zip(overflow, encoded.get("overflow_days", [])))
+    return first_seen
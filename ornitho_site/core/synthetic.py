@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""
+Générateurs de données synthétiques pour les benchmarks :
+
+  - matrice d'espèces cibles au format DV (même disposition que
+    Especes_cibles_monde_copie.xlsx lue avec ``dtype=str, header=None``) ;
+  - life list eBird "world" au format CSV ;
+  - espèces cibles par région (``core.regions``) dérivées d'un baseline.
+
+Les tirages sont déterministes pour une graine donnée.
+"""
+
+import csv
+import io
+
+import numpy as np
+import pandas as pd
+
+from core.baseline_index import get_baseline_index
+
+
+EBIRD_LIFE_LIST_COLUMNS = [
+    "Row #", "Taxon Order", "Category", "Common Name", "Scientific Name", "Count",
+    "Location", "S/P", "Date", "LocID", "SubID", "Exotic", "Countable",
+]
+
+
+def synthetic_species_names(n_species):
+    return [f"Synthetic Bird {idx:05d}" for idx in range(n_species)]
+
+
+def make_synthetic_dv(n_countries, n_species, density=0.1, n_continents=8, seed=0):
+    """
+    Construit un DataFrame DV synthétique.
+
+    Parameters
+    ----------
+    n_countries : int
+        Nombre de paires de colonnes (pays).
+    n_species : int
+        Taille du vocabulaire d'espèces.
+    density : float
+        Part moyenne des espèces présentes dans chaque pays (0-1).
+    n_continents : int
+        Nombre de continents distincts.
+    seed : int
+        Graine du générateur.
+
+    Returns
+    -------
+    dv_df : pd.DataFrame
+        Ligne 0 : [pays, continent, pays, continent, ...] ; lignes suivantes :
+        espèce / valeur (chaînes, triées par valeur décroissante comme dans le
+        fichier réel), NaN sous la dernière espèce de chaque pays.
+    """
+    rng = np.random.default_rng(seed)
+    names = np.array(synthetic_species_names(n_species), dtype=object)
+    # Quelques espèces très répandues, beaucoup de rares (loi de puissance).
+    popularity = rng.pareto(1.5, n_species) + 1
+    popularity /= popularity.sum()
+
+    sizes = np.clip(rng.normal(density * n_species, density * n_species * 0.3, n_countries), 1, n_species)
+    sizes = sizes.astype(int)
+    n_rows = int(sizes.max()) + 1
+
+    data = np.full((n_rows, 2 * n_countries), np.nan, dtype=object)
+    for j in range(n_countries):
+        species = rng.choice(n_species, size=sizes[j], replace=False, p=popularity)
+        values = np.sort(rng.beta(0.3, 8, sizes[j]))[::-1]
+        data[0, 2 * j] = f"Country {j:03d}"
+        data[0, 2 * j + 1] = f"Continent {j % max(n_continents, 1):02d}"
+        data[1:sizes[j] + 1, 2 * j] = names[species]
+        data[1:sizes[j] + 1, 2 * j + 1] = [repr(float(v)) for v in values]
+    return pd.DataFrame(data)
+
+
+def make_synthetic_life_list_csv(n_rows, species_names, countable_share=0.95, seed=0):
+    """
+    Construit une life list eBird synthétique (contenu CSV, en octets UTF-8).
+
+    Les espèces sont tirées dans ``species_names`` (sans remise tant que
+    possible) ; une part ``1 - countable_share`` des lignes a Countable = 0.
+    """
+    rng = np.random.default_rng(seed)
+    picked = rng.choice(len(species_names), size=n_rows, replace=n_rows > len(species_names))
+    countable = rng.random(n_rows) < countable_share
+
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(EBIRD_LIFE_LIST_COLUMNS)
+    for row_number, (species_idx, is_countable) in enumerate(zip(picked, countable), start=1):
+        name = species_names[species_idx]
+        writer.writerow([
+            row_number, 1000 + int(species_idx), "species", name, f"Avis synthetica {species_idx}", 1,
+            "Synthetic location", "XX-YY", "01 Jan 2024", f"L{row_number}", f"S{row_number}", "",
+            1 if is_countable else 0,
+        ])
+    return output.getvalue().encode("utf-8")
+
+
+def make_synthetic_region_targets(baseline_results, regions_per_country=10, region_share=0.4, seed=0):
+    """
+    Découpe chaque pays d'un baseline en ``regions_per_country`` régions.
+
+    Chaque espèce présente dans un pays l'est dans une part ``region_share``
+    de ses régions (au moins une), avec une valeur au plus égale à sa
+    valeur nationale, atteinte dans l'une d'elles : le cumul par pays
+    redonne les valeurs du baseline.
+
+    Returns
+    -------
+    list of tuple
+        ``(espèce, région, pays, valeur)``, comme ``read_region_targets``.
+    """
+    rng = np.random.default_rng(seed)
+    records = baseline_results.get("liste_blanks_records", [])
+    country_cols = baseline_results.get("blanks_country_cols", [])
+    index = get_baseline_index(baseline_results)
+
+    rows = []
+    for row_idx, col_idx in zip(*np.nonzero(index["present"] & index["has_species"][:, None])):
+        record = records[row_idx]
+        country = country_cols[col_idx]
+        value = float(record[country])
+        in_region = rng.random(regions_per_country) < region_share
+        in_region[rng.integers(regions_per_country)] = True
+        region_values = value * rng.uniform(0.2, 1.0, regions_per_country)
+        region_values[np.flatnonzero(in_region)[0]] = value
+        for region_idx in np.flatnonzero(in_region).tolist():
+            rows.append((
+                record["Species"],
+                f"R{col_idx:03d}-{region_idx:02d}",
+                country,
+                float(region_values[region_idx]),
+            ))
+    return rows
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+Progression d'un utilisateur au fil de ses uploads successifs.
+
+Chaque upload est décrit par le masque des lignes du baseline déjà vues
+(comme pour ``core.groups``). Les masques empilés (uploads × espèces)
+donnent, après inversion, la matrice des blancs restants ; un seul produit
+matriciel avec la matrice espèces × [présence par pays | au-dessus du seuil
+par pays | présence par continent] donne les comptages de blancs de tous
+les uploads à la fois. Les différences entre deux uploads consécutifs sont
+des opérations booléennes sur les lignes de la même matrice.
+"""
+
+import numpy as np
+
+from core.baseline_index import SERVING_THRESHOLD, above_threshold_matrix, get_baseline_index
+
+
+def continent_presence_matrix(index):
+    """
+    Matrice booléenne lignes x ``index["continents"]`` : l'espèce a une
+    valeur > 0 dans au moins un pays du continent.
+    """
+    n_continents = len(index["continents"])
+    bits = np.uint64(1) << np.arange(n_continents, dtype=np.uint64)
+    return (index["continent_masks"].astype(np.uint64)[:, None] & bits) != 0
+
+
+def blank_counts_by_upload(baseline_results, seen_masks, threshold=SERVING_THRESHOLD):
+    """
+    Comptages de blancs restants de chaque upload.
+
+    Parameters
+    ----------
+    seen_masks : list of numpy.ndarray
+        Un masque booléen par upload (lignes déjà vues), dans l'ordre
+        chronologique.
+
+    Returns
+    -------
+    dict
+        ``seen`` (espèces du baseline vues par upload), ``total`` (blancs
+        par upload), ``countries`` / ``countries_above``
+        (uploads x ``blanks_country_cols``) et ``continents`` (uploads x
+        ``index["continents"]``), en tableaux int64.
+    """
+    index = get_baseline_index(baseline_results)
+    n_countries = len(baseline_results.get("blanks_country_cols", []))
+    if not seen_masks:
+        n_continents = len(index["continents"])
+        empty = np.zeros((0, n_countries), dtype=np.int64)
+        return {
+            "seen": np.zeros(0, dtype=np.int64),
+            "total": np.zeros(0, dtype=np.int64),
+            "countries": empty,
+            "countries_above": empty,
+            "continents": np.zeros((0, n_continents), dtype=np.int64),
+        }
+
+    seen = np.vstack(seen_masks) & index["has_species"]
+    blanks = (~seen & index["has_species"]).astype(np.float32)
+    presence = np.hstack([
+        index["present"],
+        above_threshold_matrix(index, baseline_results, threshold),
+        continent_presence_matrix(index),
+    ]).astype(np.float32)
+    counts = np.rint(blanks @ presence).astype(np.int64)
+
+    return {
+        "seen": np.count_nonzero(seen, axis=1).astype(np.int64),
+        "total": np.count_nonzero(blanks, axis=1).astype(np.int64),
+        "countries": counts[:, :n_countries],
+        "countries_above": counts[:, n_countries:2 * n_countries],
+        "continents": counts[:, 2 * n_countries:],
+    }
+
+
+def upload_diffs(index, seen_masks):
+    """
+    Lignes ajoutées et retirées d'un upload au suivant.
+
+    Returns
+    -------
+    list of tuple
+        ``(ajoutées, retirées)`` (indices de lignes) pour chaque upload ;
+        ``None`` pour le premier, qui n'a pas de précédent.
+    """
+    diffs = []
+    for position, seen in enumerate(seen_masks):
+        if position == 0:
+            diffs.append(None)
+            continue
+        previous = seen_masks[position - 1]
+        has_species = index["has_species"]
+        diffs.append((
+            np.flatnonzero(seen & ~previous & has_species),
+            np.flatnonzero(previous & ~seen & has_species),
+        ))
+    return diffs
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""
+Mesure du temps passé dans les étapes nommées d'une requête (chargement du
+baseline, extraction des espèces, filtrage, agrégation, sérialisation...).
+
+Une collecte n'est active que pour les requêtes échantillonnées : ailleurs,
+``stage()`` se contente de lire une ContextVar et renvoie un contexte vide
+partagé, ce qui rend l'instrumentation quasi gratuite quand elle est coupée.
+
+Les durées collectées alimentent des histogrammes cumulés par processus,
+exportables au format texte Prometheus.
+"""
+
+from contextlib import nullcontext
+from contextvars import ContextVar
+import threading
+import time
+
+
+_NO_STAGE = nullcontext()
+
+# {étape: secondes cumulées} de la requête en cours, ou None hors échantillon.
+_current_timings = ContextVar("stage_timings", default=None)
+
+# Bornes (secondes) des histogrammes.
+HISTOGRAM_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _Stage:
+    __slots__ = ("timings", "name", "started")
+
+    def __init__(self, timings, name):
+        self.timings = timings
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.started
+        self.timings[self.name] = self.timings.get(self.name, 0.0) + elapsed
+        return False
+
+
+def stage(name):
+    """
+    Contexte mesurant l'étape ``name`` si la requête est échantillonnée.
+    Les appels répétés d'une même étape sont cumulés.
+    """
+    timings = _current_timings.get()
+    if timings is None:
+        return _NO_STAGE
+    return _Stage(timings, name)
+
+
+def add_stage_time(name, seconds):
+    timings = _current_timings.get()
+    if timings is not None:
+        timings[name] = timings.get(name, 0.0) + seconds
+
+
+def start_collection():
+    """
+    Active la collecte pour le contexte courant ; retourne le jeton à passer
+    à ``stop_collection``.
+    """
+    return _current_timings.set({})
+
+
+def stop_collection(token):
+    """
+    Termine la collecte et retourne ``{étape: secondes}``.
+    """
+    timings = _current_timings.get() or {}
+    _current_timings.reset(token)
+    return timings
+
+
+def is_collecting():
+    return _current_timings.get() is not None
+
+
+def server_timing_header(timings):
+    """
+    Valeur d'en-tête ``Server-Timing`` (durées en millisecondes).
+    """
+    return ", ".join(
+        f"{name};dur={seconds * 1000:.2f}"
+        for name, seconds in timings.items()
+    )
+
+
+class StageHistograms:
+    """
+    Histogrammes cumulés des durées par (vue, étape), propres au processus.
+    """
+
+    def __init__(self, buckets=HISTOGRAM_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        # {(vue, étape): [compteurs par borne..., +Inf], somme}
+        self._series = {}
+
+    def observe(self, view, name, seconds):
+        with self._lock:
+            series = self._series.get((view, name))
+            if series is None:
+                series = self._series[(view, name)] = [[0] * (len(self.buckets) + 1), 0.0]
+            counts = series[0]
+            for idx, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    counts[idx] += 1
+                    break
+            else:
+                counts[-1] += 1
+            series[1] += seconds
+
+    def observe_all(self, view, timings):
+        for name, seconds in timings.items():
+            self.observe(view, name, seconds)
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+    def render_prometheus(self, metric="ornitho_stage_duration_seconds", help_text="Time spent in named request stages."):
+        """
+        Export au format texte Prometheus (buckets cumulés, ``_sum``, ``_count``).
+        """
+        lines = [
+            f"# HELP {metric} {help_text}",
+            f"# TYPE {metric} histogram",
+        ]
+        with self._lock:
+            series = sorted((key, (list(counts), total)) for key, (counts, total) in self._series.items())
+        for (view, name), (counts, total) in series:
+            labels = f'view="{_escape_label(view)}",stage="{_escape_label(name)}"'
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                lines.append(f'{metric}_bucket{{{labels},le="{bound:.12g}"}} {cumulative}')
+            cumulative += counts[-1]
+            lines.append(f'{metric}_bucket{{{labels},le="+Inf"}} {cumulative}')
+            lines.append(f"{metric}_sum{{{labels}}} {total:.6f}")
+            lines.append(f"{metric}_count{{{labels}}} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+STAGE_HISTOGRAMS = StageHistograms()
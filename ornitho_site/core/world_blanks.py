@@ -10,6 +10,12 @@ Premiere fonction: build_user_target_species(life_list_file, target_species_file
 # core/world_blanks.py
 import pandas as pd
 import numpy as np
+from itertools import chain
+
+from core.baseline_index import continent_mask_counts, continent_mask_dtype
+# Réexporté pour les appelants historiques ; le calcul vit côté service.
+from core.serving import filter_upload_results  # noqa: F401
+from core.world_matrix import compile_world_matrix, compute_results_from_compiled, segmented_median
 
 
 def normalize_species_name(name):
@@ -195,167 +201,28 @@ def compute_results_from_dv(dv_df: pd.DataFrame):
     }
 
 
-def compute_baseline_results(target_species_file):
-    _, dv_df = build_baseline_target_species(target_species_file)
-    return compute_results_from_dv(dv_df)
-
-
-def filter_upload_results(baseline_results, species_to_remove, threshold=0.0000009):
-    """
-    Recalcule les résultats à partir d'un baseline en enlevant les espèces uploadées.
+def compile_baseline_results(target_species_file, previous_compiled=None, workers=1):
     """
-    filtered_blanks = [
-        row.copy() for row in baseline_results["liste_blanks_records"]
-        if normalize_species_name(row.get("Species")) not in species_to_remove
-    ]
-
-    def sort_key(row):
-        return (
-            -int(row.get("Above_Threshold_Count", 0)),
-            -int(row.get("Country_Count", 0)),
-            -float(row.get("Max_Percentage", 0)),
-            str(row.get("Species", "")).lower(),
-        )
-
-    filtered_blanks.sort(key=sort_key)
-    for idx, row in enumerate(filtered_blanks, start=1):
-        row["_global_rank"] = idx
-
-    blanks_country_cols = baseline_results.get("blanks_country_cols", [])
-    country_continents = baseline_results.get("country_continents", {})
-
-    if not filtered_blanks:
-        return {
-            "liste_blanks_records": [],
-            "liste_pays_records": [],
-            "continents_records": [],
-            "pays_list": [],
-            "blanks_country_cols": blanks_country_cols,
-            "blancks_par_pays": {},
-            "pays_stats": {},
-            "country_continents": country_continents,
-            "species_min": 0,
-            "species_max": 0,
-        }
-
-    df = pd.DataFrame(filtered_blanks)
-    for col in blanks_country_cols:
-        if col not in df.columns:
-            df[col] = 0.0
-
-    numeric_values = (
-        df[blanks_country_cols]
-        .apply(pd.to_numeric, errors="coerce")
-        .fillna(0.0)
-    )
-
-    present_mask = numeric_values.gt(0.0)
-    above_mask = numeric_values.gt(float(threshold))
-
-    total_species_by_country = present_mask.sum(axis=0)
-    above_threshold_by_country = above_mask.sum(axis=0)
-    max_country_counts = (
-        df["Max_Percentage_Country"]
-        .fillna("")
-        .value_counts()
-    )
-
-    liste_pays_records = []
-    pays_stats = {}
-    for country in blanks_country_cols:
-        total_species = int(total_species_by_country.get(country, 0))
-        species_above_threshold = int(above_threshold_by_country.get(country, 0))
-        max_species_count = int(max_country_counts.get(country, 0))
-
-        pays_stats[country] = {
-            "Total_Species": total_species,
-            "Species_Above_00009": species_above_threshold,
-            "Max_Species_Count": max_species_count,
-        }
-        liste_pays_records.append({
-            "Country": country,
-            "Continent": country_continents.get(country),
-            "Total_Species": total_species,
-            "Species_Above_00009": species_above_threshold,
-            "Max_Species_Count": max_species_count,
-        })
-
-    liste_pays_records.sort(key=lambda r: (-r["Total_Species"], str(r.get("Country", "")).lower()))
-
-    continent_to_countries = {}
-    for country in blanks_country_cols:
-        continent = country_continents.get(country)
-        if continent:
-            continent_to_countries.setdefault(continent, []).append(country)
-
-    continent_presence = {}
-    for continent, countries in continent_to_countries.items():
-        if not countries:
-            continue
-        continent_presence[continent] = present_mask[countries].any(axis=1)
-
-    continents_records = []
-    if continent_presence:
-        continent_presence_df = pd.DataFrame(continent_presence)
-        species_continent_counts = continent_presence_df.sum(axis=1)
-        for continent in sorted(continent_presence_df.columns, key=lambda c: str(c).lower()):
-            mask = continent_presence_df[continent]
-            total_species = int(mask.sum())
-            unique_species = int((mask & species_continent_counts.eq(1)).sum())
-            continents_records.append({
-                "Continent": continent,
-                "Total_Species": total_species,
-                "Unique_Species": unique_species,
-            })
-    continents_records.sort(key=lambda r: str(r["Continent"]).lower())
-
-    country_to_idx = {country: idx for idx, country in enumerate(blanks_country_cols)}
-    max_country_series = df["Max_Percentage_Country"].fillna("")
-    valid_country_mask = max_country_series.isin(country_to_idx)
-
-    row_indices = np.flatnonzero(valid_country_mask.to_numpy())
-    col_indices = (
-        max_country_series[valid_country_mask]
-        .map(country_to_idx)
-        .astype(int)
-        .to_numpy()
-    )
-    values_matrix = numeric_values.to_numpy()
-    selected_values = values_matrix[row_indices, col_indices] if len(row_indices) else np.array([])
-
-    important_df = pd.DataFrame({
-        "country": max_country_series[valid_country_mask].to_numpy(),
-        "species": df.loc[valid_country_mask, "Species"].fillna("").to_numpy(),
-        "value": selected_values,
-    })
-    important_df = important_df.sort_values(
-        by=["country", "value", "species"],
-        ascending=[True, False, True],
-    )
+    Calcule le baseline via la matrice compilée (``core.world_matrix``).
+    Avec ``previous_compiled``, seules les paires de colonnes pays modifiées
+    depuis la compilation précédente sont recalculées. ``workers`` > 1 répartit
+    le calcul sur un pool de processus.
 
-    blancks_par_pays = {
-        country: [
-            {"species": row.species, "value": float(row.value)}
-            for row in group.itertuples(index=False)
-        ]
-        for country, group in important_df.groupby("country", sort=True)
-    }
+    Returns
+    -------
+    results : dict
+        Même structure que ``compute_results_from_dv``.
+    compiled : dict
+        Tableaux NumPy à conserver pour la prochaine reconstruction.
+    """
+    _, dv_df = build_baseline_target_species(target_species_file)
+    compiled = compile_world_matrix(dv_df, previous=previous_compiled, workers=workers)
+    return compute_results_from_compiled(compiled), compiled
 
-    species_min = min((row["Total_Species"] for row in liste_pays_records), default=0)
-    species_max = max((row["Total_Species"] for row in liste_pays_records), default=0)
 
-    return {
-        "liste_blanks_records": filtered_blanks,
-        "liste_pays_records": liste_pays_records,
-        "continents_records": continents_records,
-        "pays_list": sorted(blancks_par_pays.keys()),
-        "blanks_country_cols": blanks_country_cols,
-        "blancks_par_pays": blancks_par_pays,
-        "pays_stats": pays_stats,
-        "country_continents": country_continents,
-        "species_min": species_min,
-        "species_max": species_max,
-    }
+def compute_baseline_results(target_species_file):
+    results, _ = compile_baseline_results(target_species_file)
+    return results
 
 
 def compute_liste_blanks_world_classified(dv_df: pd.DataFrame, threshold: float = 0.0009) -> pd.DataFrame:
@@ -454,9 +321,17 @@ def compute_liste_blanks_world_classified(dv_df: pd.DataFrame, threshold: float
 
     rows = []
 
-    for species, info in species_dict.items():
+    # Médianes des pourcentages > seuil de toutes les espèces, en un seul tri
+    above_lists = [info["above_threshold_percentages"] for info in species_dict.values()]
+    medians = segmented_median(
+        np.repeat(np.arange(len(above_lists)), [len(values) for values in above_lists]),
+        np.fromiter(chain.from_iterable(above_lists), dtype=float),
+        len(above_lists),
+    )
+
+    for species_idx, (species, info) in enumerate(species_dict.items()):
         median_above_threshold = (
-            pd.Series(info["above_threshold_percentages"]).median()
+            medians[species_idx]
             if info["above_threshold_percentages"] else 0
         )
 
@@ -731,8 +606,8 @@ def compute_continents_species_numbers(dv_df: pd.DataFrame) -> pd.DataFrame:
 
     data = dv_df.copy()
 
-    continent_species = {}  # {continent: set(species)}
-    global_species = {}     # {species: set(continents)}
+    continent_bits = {}   # {continent: bit}
+    species_masks = {}    # {species: masque des continents où elle est présente}
 
     # Parcourir les colonnes deux par deux
     for i in range(0, data.shape[1], 2):
@@ -742,28 +617,20 @@ def compute_continents_species_numbers(dv_df: pd.DataFrame) -> pd.DataFrame:
         if pd.isna(country) or pd.isna(continent):
             continue
 
-        species_column = data.iloc[1:, i]
-
-        # Initialiser l'entrée pour ce continent si nécessaire
-        if continent not in continent_species:
-            continent_species[continent] = set()
-
-        # Ajouter les espèces à ce continent et au suivi global
-        for species in species_column.dropna():
-            continent_species[continent].add(species)
+        if continent not in continent_bits:
+            continent_bits[continent] = 1 << len(continent_bits)
+        bit = continent_bits[continent]
 
-            if species not in global_species:
-                global_species[species] = set()
-            global_species[species].add(continent)
+        for species in data.iloc[1:, i].dropna():
+            species_masks[species] = species_masks.get(species, 0) | bit
 
-    # Calcul des métriques finales
-    results = []
-    for continent, species_set in continent_species.items():
-        total_species = len(species_set)
-        unique_species = sum(
-            1 for species in species_set if len(global_species[species]) == 1
-        )
-        results.append([continent, total_species, unique_species])
+    # Totaux et espèces uniques : comptages de bits sur les masques
+    masks = np.fromiter(species_masks.values(), dtype=continent_mask_dtype(len(continent_bits)))
+    totals, unique = continent_mask_counts(masks, len(continent_bits))
+    results = [
+        [continent, int(totals[k]), int(unique[k])]
+        for k, continent in enumerate(continent_bits)
+    ]
 
     results_df = pd.DataFrame(
         results, columns=["Continent", "Total Species", "Unique Species"]
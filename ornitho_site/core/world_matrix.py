@@ -0,0 +1,858 @@
+# -*- coding: utf-8 -*-
+"""
+Baseline "compilé" : la matrice espèces × pays sous forme de tableaux NumPy.
+
+Le fichier DV est d'abord normalisé en cellules (une entrée par case non vide
+de chaque paire de colonnes pays), puis les agrégats par espèce, par pays et
+par continent sont calculés de façon vectorisée. Le résultat est identique à
+``compute_results_from_dv`` (mêmes valeurs, mêmes ordres de tri), mais l'état
+compilé peut être sauvegardé avec la version du baseline : à la reconstruction
+suivante, seules les paires de colonnes dont le hash a changé sont relues et
+seules les espèces qu'elles touchent sont recalculées.
+
+Avec ``workers > 1``, la lecture des paires de colonnes et les agrégats par
+espèce sont répartis sur un ``ProcessPoolExecutor`` : chaque tâche renvoie ses
+tableaux dans des blocs ``SharedMemory`` et la fusion se fait dans l'ordre des
+colonnes / des espèces, ce qui donne exactement le même résultat qu'en série.
+
+Sémantique reprise des fonctions pandas de ``world_blanks`` :
+
+  - "blanks" (``compute_liste_blanks_world_classified``) : toutes les paires
+    ayant un nom de pays, cellules avec espèce ET valeur numérique ;
+  - "stats" (``compute_liste_pays_with_nb_coches``,
+    ``compute_blancks_important_by_countries``,
+    ``compute_continents_species_numbers``) : seulement les paires ayant aussi
+    un continent.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import hashlib
+import multiprocessing
+import os
+
+import numpy as np
+import pandas as pd
+
+
+COMPILED_FORMAT_VERSION = 1
+
+# Cellule vide (NaN) dans la colonne espèce.
+NO_SPECIES = -1
+
+_ROW_BITS = 32
+
+
+def _cell_keys(cell_columns, cell_rows):
+    """
+    Clé d'ordre d'une cellule : (colonne, ligne) dans le fichier DV.
+    Stable quand d'autres colonnes changent de longueur.
+    """
+    return (cell_columns.astype(np.int64) << _ROW_BITS) | cell_rows.astype(np.int64)
+
+
+def _hash_column_pair(country, continent, species_raw, values_raw):
+    digest = hashlib.sha1()
+    for chunk in (country, continent, species_raw, values_raw):
+        digest.update(chunk.encode("utf-8"))
+        digest.update(b"\x1e")
+    return digest.hexdigest()
+
+
+def _raw_cells(column):
+    return "\x1f".join("\x00" if pd.isna(v) else str(v) for v in column)
+
+
+def extract_country_columns(dv_df: pd.DataFrame):
+    """
+    Découpe le DataFrame DV en paires de colonnes (espèce, valeur) par pays.
+
+    Returns
+    -------
+    columns : list[dict]
+        Une entrée par paire ayant un nom de pays, dans l'ordre du fichier :
+        ``country``, ``continent`` (None si vide), ``hash``, ``species``
+        (noms, None si vide), ``rows`` et ``values`` (float, NaN si vide ou
+        non numérique). Seules les lignes dont l'espèce ou la valeur est
+        renseignée sont gardées.
+    """
+    columns = []
+    n_cols = dv_df.shape[1]
+
+    for i in range(0, n_cols, 2):
+        country = dv_df.iloc[0, i]
+        if pd.isna(country):
+            continue
+        continent = dv_df.iloc[0, i + 1] if i + 1 < n_cols else None
+        continent = None if pd.isna(continent) else continent
+
+        species_column = dv_df.iloc[1:, i]
+        raw_values = dv_df.iloc[1:, i + 1] if i + 1 < n_cols else pd.Series(np.nan, index=species_column.index)
+        values_column = pd.to_numeric(raw_values, errors="coerce")
+
+        species_present = species_column.notna().to_numpy()
+        values = values_column.to_numpy(dtype=float)
+        keep = species_present | ~np.isnan(values)
+        rows = np.flatnonzero(keep).astype(np.int32)
+
+        species = species_column.to_numpy(dtype=object)[keep]
+        columns.append({
+            "country": country,
+            "continent": continent,
+            "hash": _hash_column_pair(
+                str(country),
+                "" if continent is None else str(continent),
+                _raw_cells(species_column),
+                _raw_cells(raw_values),
+            ),
+            "species": [None if pd.isna(s) else s for s in species],
+            "rows": rows,
+            "values": values[keep],
+        })
+
+    return columns
+
+
+def _encode_species(columns, species_names):
+    """
+    Convertit les noms d'espèces en identifiants. Le vocabulaire existant est
+    conservé (identifiants stables d'une version à l'autre) et étendu.
+    """
+    vocabulary = {name: idx for idx, name in enumerate(species_names)}
+    names = list(species_names)
+    encoded = []
+    for column in columns:
+        ids = np.empty(len(column["species"]), dtype=np.int32)
+        for j, name in enumerate(column["species"]):
+            if name is None:
+                ids[j] = NO_SPECIES
+                continue
+            idx = vocabulary.get(name)
+            if idx is None:
+                idx = len(names)
+                vocabulary[name] = idx
+                names.append(name)
+            ids[j] = idx
+        encoded.append(ids)
+    return encoded, names
+
+
+def _pack_cells(columns, encoded_species):
+    offsets = np.zeros(len(columns) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(ids) for ids in encoded_species])
+    if columns:
+        cell_species = np.concatenate(encoded_species).astype(np.int32)
+        cell_rows = np.concatenate([c["rows"] for c in columns]).astype(np.int32)
+        cell_values = np.concatenate([c["values"] for c in columns]).astype(np.float64)
+    else:
+        cell_species = np.empty(0, dtype=np.int32)
+        cell_rows = np.empty(0, dtype=np.int32)
+        cell_values = np.empty(0, dtype=np.float64)
+    cell_columns = np.repeat(np.arange(len(columns), dtype=np.int32), np.diff(offsets))
+    return offsets, cell_columns, cell_species, cell_rows, cell_values
+
+
+def _group_starts(sorted_ids):
+    if len(sorted_ids) == 0:
+        return np.empty(0, dtype=np.int64)
+    return np.flatnonzero(np.r_[True, sorted_ids[1:] != sorted_ids[:-1]])
+
+
+def _first_max_per_species(species, values, keys):
+    """
+    Pour chaque espèce : valeur max et clé de la première cellule (dans l'ordre
+    du fichier) qui l'atteint. Équivaut au parcours séquentiel avec ``>``.
+    """
+    order = np.lexsort((keys, -values, species))
+    sorted_species = species[order]
+    starts = _group_starts(sorted_species)
+    picked = order[starts]
+    return sorted_species[starts], values[picked], picked
+
+
+def segmented_median(group_ids, values, n_groups):
+    """
+    Médiane des ``values`` de chaque groupe, en un seul tri.
+
+    Les valeurs sont triées par (groupe, valeur) ; la médiane d'un groupe de
+    taille n est la moyenne de ses éléments n°(n-1)//2 et n//2, comme
+    ``np.median`` / ``pd.Series.median``.
+
+    Parameters
+    ----------
+    group_ids : np.ndarray
+        Identifiant de groupe (0 <= id < n_groups) de chaque valeur.
+    values : np.ndarray
+        Valeurs (sans NaN).
+    n_groups : int
+        Nombre de groupes.
+
+    Returns
+    -------
+    medians : np.ndarray
+        Tableau float64 de taille ``n_groups`` ; 0 pour les groupes vides.
+    """
+    group_ids = np.asarray(group_ids, dtype=np.int64)
+    values = np.asarray(values, dtype=np.float64)
+    medians = np.zeros(n_groups, dtype=np.float64)
+    if len(values) == 0:
+        return medians
+
+    order = np.lexsort((values, group_ids))
+    sorted_groups = group_ids[order]
+    sorted_values = values[order]
+    starts = _group_starts(sorted_groups)
+    sizes = np.diff(np.r_[starts, len(sorted_groups)])
+    lower = sorted_values[starts + (sizes - 1) // 2]
+    upper = sorted_values[starts + sizes // 2]
+    medians[sorted_groups[starts]] = (lower + upper) / 2
+    return medians
+
+
+def _empty_aggregates(n_species, n_continents):
+    return {
+        "first_key": np.full(n_species, -1, dtype=np.int64),
+        "country_count": np.zeros(n_species, dtype=np.int32),
+        "above_count": np.zeros(n_species, dtype=np.int32),
+        "max_value": np.zeros(n_species, dtype=np.float64),
+        "max_country": np.full(n_species, -1, dtype=np.int32),
+        "median_value": np.zeros(n_species, dtype=np.float64),
+        "winner_key": np.full(n_species, -1, dtype=np.int64),
+        "winner_country": np.full(n_species, -1, dtype=np.int32),
+        "winner_value": np.zeros(n_species, dtype=np.float64),
+        "continent_presence": np.zeros((n_species, n_continents), dtype=bool),
+    }
+
+
+def _aggregate_species(compiled, cell_mask, n_species):
+    """
+    Agrégats par espèce calculés sur les cellules sélectionnées par
+    ``cell_mask`` (toutes, ou celles des espèces touchées par un changement).
+    Retourne des tableaux de taille ``n_species`` ; les espèces sans cellule
+    sélectionnée gardent les valeurs "absente".
+    """
+    threshold = float(compiled["threshold"])
+    n_columns = len(compiled["countries"])
+
+    species = compiled["cell_species"][cell_mask]
+    columns = compiled["cell_columns"][cell_mask]
+    values = compiled["cell_values"][cell_mask]
+    keys = _cell_keys(columns, compiled["cell_rows"][cell_mask])
+
+    aggregates = _empty_aggregates(n_species, len(compiled["continent_names"]))
+
+    # --- Sémantique "blanks" : espèce + valeur renseignées ---
+    entry = (species != NO_SPECIES) & ~np.isnan(values)
+    e_species, e_columns, e_values, e_keys = species[entry], columns[entry], values[entry], keys[entry]
+
+    if len(e_species):
+        order = np.argsort(e_species, kind="stable")
+        starts = _group_starts(e_species[order])
+        aggregates["first_key"][e_species[order][starts]] = e_keys[order][starts]
+
+        pairs = np.unique(e_species.astype(np.int64) * n_columns + e_columns)
+        aggregates["country_count"][:] = np.bincount(pairs // n_columns, minlength=n_species)
+
+        above = e_values > threshold
+        aggregates["above_count"][:] = np.bincount(e_species[above], minlength=n_species)
+
+        positive = e_values > 0
+        if positive.any():
+            ids, max_values, picked = _first_max_per_species(
+                e_species[positive], e_values[positive], e_keys[positive]
+            )
+            aggregates["max_value"][ids] = max_values
+            aggregates["max_country"][ids] = e_columns[positive][picked]
+
+        aggregates["median_value"][:] = segmented_median(e_species[above], e_values[above], n_species)
+
+    # --- Sémantique "stats" : paires avec continent ---
+    stats_column = compiled["has_continent"][columns]
+    stats_entry = entry & stats_column
+    if stats_entry.any():
+        s_species, s_values, s_keys = species[stats_entry], values[stats_entry], keys[stats_entry]
+        order = np.argsort(s_species, kind="stable")
+        starts = _group_starts(s_species[order])
+        aggregates["winner_key"][s_species[order][starts]] = s_keys[order][starts]
+
+        ids, winner_values, picked = _first_max_per_species(s_species, s_values, s_keys)
+        aggregates["winner_value"][ids] = winner_values
+        aggregates["winner_country"][ids] = columns[stats_entry][picked]
+
+    present = (species != NO_SPECIES) & stats_column
+    aggregates["continent_presence"][
+        species[present], compiled["column_continent_idx"][columns[present]]
+    ] = True
+
+    return aggregates
+
+
+def _column_totals(compiled, column_ids):
+    """
+    Totaux par colonne (``compute_liste_pays_with_nb_coches``) :
+    espèces renseignées et valeurs au-dessus du seuil.
+    """
+    threshold = float(compiled["threshold"])
+    offsets = compiled["cell_offsets"]
+    species_total = np.zeros(len(column_ids), dtype=np.int32)
+    above_total = np.zeros(len(column_ids), dtype=np.int32)
+    for j, col in enumerate(column_ids):
+        start, end = offsets[col], offsets[col + 1]
+        species_total[j] = int(np.count_nonzero(compiled["cell_species"][start:end] != NO_SPECIES))
+        above_total[j] = int(np.count_nonzero(compiled["cell_values"][start:end] > threshold))
+    return species_total, above_total
+
+
+def _continent_totals(presence):
+    continent_count = presence.sum(axis=1)
+    return (
+        presence.sum(axis=0).astype(np.int32),
+        presence[continent_count == 1].sum(axis=0).astype(np.int32),
+    )
+
+
+# ---------------------------------------------------------------------------
+# Calcul parallèle
+# ---------------------------------------------------------------------------
+
+# En dessous de ce nombre de cellules (estimé : lignes × paires de colonnes
+# du DV), le démarrage des processus coûte plus que le calcul : la
+# compilation reste en série quel que soit ``workers``.
+PARALLEL_MIN_CELLS = 2_000_000
+
+# Paramètres du baseline compilé passés tels quels aux tâches d'agrégation.
+_AGGREGATE_PARAM_FIELDS = (
+    "threshold", "countries", "continent_names", "has_continent", "column_continent_idx",
+)
+
+
+def _to_shared(arrays):
+    """
+    Copie des tableaux dans des blocs ``SharedMemory``. Retourne, par clé, le
+    descripteur ``(nom du bloc, dtype, shape)`` à passer à ``_from_shared``.
+    """
+    descriptors = {}
+    for key, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+        descriptors[key] = (block.name, array.dtype.str, array.shape)
+        block.close()
+    return descriptors
+
+
+def _from_shared(descriptors, unlink=False):
+    """
+    Relit des blocs ``SharedMemory`` (copie locale). Avec ``unlink``, les blocs
+    sont libérés : c'est au processus qui fusionne de le faire.
+    """
+    arrays = {}
+    for key, (name, dtype, shape) in descriptors.items():
+        block = shared_memory.SharedMemory(name=name)
+        try:
+            arrays[key] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf).copy()
+        finally:
+            block.close()
+            if unlink:
+                block.unlink()
+    return arrays
+
+
+def _attach_shared(descriptors):
+    """
+    Vues (sans copie) sur des blocs ``SharedMemory``. Retourne ``(tableaux,
+    blocs)`` ; les blocs sont à fermer une fois les vues abandonnées.
+    """
+    arrays, blocks = {}, []
+    for key, (name, dtype, shape) in descriptors.items():
+        block = shared_memory.SharedMemory(name=name)
+        blocks.append(block)
+        arrays[key] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+    return arrays, blocks
+
+
+def _release_shared(descriptors):
+    for name, _, _ in descriptors.values():
+        try:
+            block = shared_memory.SharedMemory(name=name)
+        except FileNotFoundError:
+            continue
+        block.close()
+        block.unlink()
+
+
+def _extract_chunk(chunk_df):
+    """
+    Tâche de lecture d'un bloc de paires de colonnes (exécutée dans un worker).
+    Les noms d'espèces sont encodés sur un vocabulaire local au bloc.
+    """
+    columns = extract_country_columns(chunk_df)
+    encoded, names = _encode_species(columns, [])
+    offsets, _, cell_species, cell_rows, cell_values = _pack_cells(columns, encoded)
+    meta = [
+        {"country": c["country"], "continent": c["continent"], "hash": c["hash"]}
+        for c in columns
+    ]
+    blocks = _to_shared({
+        "offsets": offsets,
+        "species": cell_species,
+        "rows": cell_rows,
+        "values": cell_values,
+    })
+    return meta, names, blocks
+
+
+def _extract_country_columns_parallel(dv_df, executor, n_chunks):
+    """
+    Équivalent de ``extract_country_columns`` réparti par blocs de paires de
+    colonnes ; les blocs sont fusionnés dans l'ordre du fichier.
+    """
+    n_pairs = (dv_df.shape[1] + 1) // 2
+    bounds = np.linspace(0, n_pairs, min(n_chunks, max(n_pairs, 1)) + 1).astype(int)
+    futures = [
+        executor.submit(_extract_chunk, dv_df.iloc[:, 2 * start:2 * end])
+        for start, end in zip(bounds[:-1], bounds[1:])
+        if end > start
+    ]
+
+    columns = []
+    try:
+        for future in futures:
+            meta, names, blocks = future.result()
+            arrays = _from_shared(blocks, unlink=True)
+            lookup = np.array(names + [None], dtype=object)
+            offsets = arrays["offsets"]
+            for j, column in enumerate(meta):
+                start, end = offsets[j], offsets[j + 1]
+                column["species"] = lookup[arrays["species"][start:end]].tolist()
+                column["rows"] = arrays["rows"][start:end]
+                column["values"] = arrays["values"][start:end]
+                columns.append(column)
+    finally:
+        # Une tâche en erreur ne doit pas laisser de blocs orphelins.
+        for future in futures:
+            if future.exception() is None:
+                _release_shared(future.result()[2])
+    return columns
+
+
+def _aggregate_chunk(shared, params, species_start, species_end, cell_start, cell_end):
+    """
+    Tâche d'agrégation des espèces ``[species_start, species_end)``
+    (exécutée dans un worker). Les cellules partagées sont triées par espèce :
+    la tâche ne lit que sa plage ``[cell_start, cell_end)``, sans copie, et ne
+    renvoie que sa tranche.
+    """
+    arrays, blocks = _attach_shared(shared)
+    try:
+        compiled = {
+            field: values[cell_start:cell_end]
+            for field, values in arrays.items()
+        }
+        compiled["cell_species"] = compiled["cell_species"] - species_start
+        compiled.update(params)
+        aggregates = _aggregate_species(
+            compiled, np.ones(cell_end - cell_start, dtype=bool), species_end - species_start
+        )
+    finally:
+        # Les vues doivent disparaître avant la fermeture des blocs.
+        arrays = compiled = None
+        for block in blocks:
+            block.close()
+    return _to_shared(aggregates)
+
+
+def _aggregate_species_parallel(compiled, cell_mask, n_species, executor, n_chunks):
+    """
+    Équivalent de ``_aggregate_species`` réparti par tranches d'espèces. Les
+    agrégats d'une espèce ne dépendent que de ses cellules : les cellules
+    sélectionnées sont regroupées par espèce (tri stable, l'ordre du fichier
+    est conservé au sein d'une espèce) et partagées une seule fois ; chaque
+    tranche est indépendante et recopiée à sa place.
+    """
+    cell_ids = np.flatnonzero(cell_mask & (compiled["cell_species"] != NO_SPECIES))
+    cell_ids = cell_ids[np.argsort(compiled["cell_species"][cell_ids], kind="stable")]
+    species = compiled["cell_species"][cell_ids]
+    # Tranches d'espèces contiguës, équilibrées en nombre de cellules.
+    targets = np.linspace(0, len(species), n_chunks + 1)[1:-1].astype(np.int64)
+    cuts = species[targets] if len(species) else np.empty(0, dtype=species.dtype)
+    species_bounds = np.unique(np.r_[0, cuts, n_species])
+    cell_bounds = np.searchsorted(species, species_bounds)
+
+    params = {field: compiled[field] for field in _AGGREGATE_PARAM_FIELDS}
+    aggregates = _empty_aggregates(n_species, len(compiled["continent_names"]))
+    shared = _to_shared({
+        "cell_species": species,
+        "cell_columns": compiled["cell_columns"][cell_ids],
+        "cell_rows": compiled["cell_rows"][cell_ids],
+        "cell_values": compiled["cell_values"][cell_ids],
+    })
+    futures = []
+    try:
+        for k in range(len(species_bounds) - 1):
+            start, end = int(species_bounds[k]), int(species_bounds[k + 1])
+            futures.append((
+                start, end,
+                executor.submit(
+                    _aggregate_chunk, shared, params, start, end,
+                    int(cell_bounds[k]), int(cell_bounds[k + 1]),
+                ),
+            ))
+        for start, end, future in futures:
+            for field, values in _from_shared(future.result(), unlink=True).items():
+                aggregates[field][start:end] = values
+    finally:
+        for _, _, future in futures:
+            if future.exception() is None:
+                _release_shared(future.result())
+        _release_shared(shared)
+    return aggregates
+
+
+def _make_executor(workers):
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+
+
+def _same_layout(previous, columns, threshold):
+    if previous is None:
+        return False
+    if int(previous.get("format_version", 0)) != COMPILED_FORMAT_VERSION:
+        return False
+    if float(previous["threshold"]) != float(threshold):
+        return False
+    if len(previous["countries"]) != len(columns):
+        return False
+    for j, column in enumerate(columns):
+        continent = "" if column["continent"] is None else str(column["continent"])
+        if str(previous["countries"][j]) != str(column["country"]):
+            return False
+        if bool(previous["has_continent"][j]) != (column["continent"] is not None):
+            return False
+        if str(previous["continents"][j]) != continent:
+            return False
+    return True
+
+
+def _new_compiled(columns, species_names, threshold):
+    encoded, names = _encode_species(columns, species_names)
+    offsets, cell_columns, cell_species, cell_rows, cell_values = _pack_cells(columns, encoded)
+
+    continents = ["" if c["continent"] is None else str(c["continent"]) for c in columns]
+    continent_names = []
+    for column, continent in zip(columns, continents):
+        if column["continent"] is not None and continent not in continent_names:
+            continent_names.append(continent)
+    continent_idx = {name: idx for idx, name in enumerate(continent_names)}
+
+    return {
+        "format_version": np.int64(COMPILED_FORMAT_VERSION),
+        "threshold": np.float64(threshold),
+        "countries": np.array([str(c["country"]) for c in columns], dtype=str),
+        "continents": np.array(continents, dtype=str),
+        "has_continent": np.array([c["continent"] is not None for c in columns], dtype=bool),
+        "column_continent_idx": np.array(
+            [continent_idx.get(continent, -1) for continent in continents], dtype=np.int32
+        ),
+        "continent_names": np.array(continent_names, dtype=str),
+        "column_hashes": np.array([c["hash"] for c in columns], dtype=str),
+        "species_names": np.array(names, dtype=str),
+        "cell_offsets": offsets,
+        "cell_columns": cell_columns,
+        "cell_species": cell_species,
+        "cell_rows": cell_rows,
+        "cell_values": cell_values,
+    }
+
+
+def compile_world_matrix(
+    dv_df: pd.DataFrame,
+    previous=None,
+    threshold: float = 0.0009,
+    workers: int = 1,
+    min_parallel_cells: int = PARALLEL_MIN_CELLS,
+):
+    """
+    Compile le DataFrame DV en tableaux NumPy et calcule tous les agrégats.
+
+    Si ``previous`` (baseline compilé précédent) a la même structure de
+    colonnes (mêmes pays, mêmes continents, même seuil), seules les paires de
+    colonnes dont le hash diffère sont prises en compte : les agrégats des
+    espèces qu'elles contiennent (avant ou après) sont recalculés et les
+    totaux par pays / continent sont mis à jour par différence. Sinon, tout
+    est recalculé.
+
+    Avec ``workers > 1``, la lecture des colonnes et les agrégats par espèce
+    sont calculés dans un pool de ``workers`` processus (résultat identique),
+    à partir de ``min_parallel_cells`` cellules estimées (lignes × paires de
+    colonnes) ; en dessous, le calcul reste en série.
+
+    Returns
+    -------
+    compiled : dict
+        Tableaux NumPy (sauvegardables avec ``save_compiled_world_matrix``).
+        ``compiled["changed_columns"]`` liste les pays recalculés.
+    """
+    estimated_cells = dv_df.shape[0] * ((dv_df.shape[1] + 1) // 2)
+    if workers <= 1 or estimated_cells < min_parallel_cells:
+        return _compile_world_matrix(dv_df, previous, threshold, None, 1)
+    with _make_executor(workers) as executor:
+        return _compile_world_matrix(dv_df, previous, threshold, executor, workers)
+
+
+def _compile_world_matrix(dv_df, previous, threshold, executor, workers):
+    if executor is None:
+        columns = extract_country_columns(dv_df)
+    else:
+        columns = _extract_country_columns_parallel(dv_df, executor, workers)
+
+    def aggregate(compiled, cell_mask, n_species):
+        if executor is None:
+            return _aggregate_species(compiled, cell_mask, n_species)
+        return _aggregate_species_parallel(compiled, cell_mask, n_species, executor, workers)
+
+    if not _same_layout(previous, columns, threshold):
+        compiled = _new_compiled(columns, [], threshold)
+        n_species = len(compiled["species_names"])
+        compiled.update(aggregate(compiled, np.ones(len(compiled["cell_species"]), dtype=bool), n_species))
+        all_columns = np.arange(len(columns))
+        compiled["column_species_total"], compiled["column_above_total"] = _column_totals(compiled, all_columns)
+        compiled["max_species_count"] = np.bincount(
+            compiled["winner_country"][compiled["winner_country"] >= 0], minlength=len(columns)
+        ).astype(np.int32)
+        compiled["continent_totals"], compiled["continent_unique"] = _continent_totals(
+            compiled["continent_presence"]
+        )
+        compiled["changed_columns"] = np.array([str(c["country"]) for c in columns], dtype=str)
+        return compiled
+
+    previous_hashes = [str(h) for h in previous["column_hashes"]]
+    changed = [j for j, column in enumerate(columns) if column["hash"] != previous_hashes[j]]
+
+    # Les colonnes inchangées sont reprises telles quelles de l'état précédent.
+    previous_species = previous["cell_species"]
+    for j, column in enumerate(columns):
+        if j in changed:
+            continue
+        start, end = previous["cell_offsets"][j], previous["cell_offsets"][j + 1]
+        column["rows"] = previous["cell_rows"][start:end]
+        column["values"] = previous["cell_values"][start:end]
+        column["species_ids"] = previous_species[start:end]
+
+    changed_set = set(changed)
+    species_names = [str(s) for s in previous["species_names"]]
+    encoded, names = _encode_species([columns[j] for j in changed], species_names)
+    encoded_by_column = dict(zip(changed, encoded))
+    all_encoded = [
+        encoded_by_column[j] if j in changed_set else column.pop("species_ids")
+        for j, column in enumerate(columns)
+    ]
+
+    compiled = {key: previous[key] for key in (
+        "format_version", "threshold", "countries", "continents", "has_continent",
+        "column_continent_idx", "continent_names",
+    )}
+    compiled["column_hashes"] = np.array([c["hash"] for c in columns], dtype=str)
+    compiled["species_names"] = np.array(names, dtype=str)
+    (
+        compiled["cell_offsets"],
+        compiled["cell_columns"],
+        compiled["cell_species"],
+        compiled["cell_rows"],
+        compiled["cell_values"],
+    ) = _pack_cells(columns, all_encoded)
+
+    n_species = len(names)
+
+    def grown(array, fill):
+        if len(array) == n_species:
+            return array.copy()
+        extra_shape = (n_species - len(array),) + array.shape[1:]
+        return np.concatenate([array, np.full(extra_shape, fill, dtype=array.dtype)])
+
+    species_fields = {
+        "first_key": -1, "country_count": 0, "above_count": 0, "max_value": 0.0,
+        "max_country": -1, "median_value": 0.0, "winner_key": -1, "winner_country": -1,
+        "winner_value": 0.0, "continent_presence": False,
+    }
+    for field, fill in species_fields.items():
+        compiled[field] = grown(previous[field], fill)
+    compiled["column_species_total"] = previous["column_species_total"].copy()
+    compiled["column_above_total"] = previous["column_above_total"].copy()
+    compiled["max_species_count"] = previous["max_species_count"].copy()
+    compiled["continent_totals"] = previous["continent_totals"].copy()
+    compiled["continent_unique"] = previous["continent_unique"].copy()
+    compiled["changed_columns"] = np.array([str(columns[j]["country"]) for j in changed], dtype=str)
+
+    if not changed:
+        return compiled
+
+    # Espèces touchées : présentes dans une colonne modifiée, avant ou après.
+    affected = np.zeros(n_species, dtype=bool)
+    for j in changed:
+        old_ids = previous_species[previous["cell_offsets"][j]:previous["cell_offsets"][j + 1]]
+        affected[old_ids[old_ids != NO_SPECIES]] = True
+        new_ids = encoded_by_column[j]
+        affected[new_ids[new_ids != NO_SPECIES]] = True
+    affected_ids = np.flatnonzero(affected)
+
+    old_winners = compiled["winner_country"][affected_ids]
+    old_presence = compiled["continent_presence"][affected_ids]
+
+    cell_mask = np.zeros(len(compiled["cell_species"]), dtype=bool)
+    valid = compiled["cell_species"] != NO_SPECIES
+    cell_mask[valid] = affected[compiled["cell_species"][valid]]
+    refreshed = aggregate(compiled, cell_mask, n_species)
+    for field in species_fields:
+        compiled[field][affected_ids] = refreshed[field][affected_ids]
+
+    # Totaux par pays : colonnes modifiées recalculées, "max species" par différence.
+    changed_ids = np.array(changed)
+    species_total, above_total = _column_totals(compiled, changed_ids)
+    compiled["column_species_total"][changed_ids] = species_total
+    compiled["column_above_total"][changed_ids] = above_total
+
+    n_columns = len(columns)
+    new_winners = compiled["winner_country"][affected_ids]
+    compiled["max_species_count"] -= np.bincount(old_winners[old_winners >= 0], minlength=n_columns).astype(np.int32)
+    compiled["max_species_count"] += np.bincount(new_winners[new_winners >= 0], minlength=n_columns).astype(np.int32)
+
+    # Totaux par continent : contribution des espèces touchées retirée puis rajoutée.
+    old_totals, old_unique = _continent_totals(old_presence)
+    new_totals, new_unique = _continent_totals(compiled["continent_presence"][affected_ids])
+    compiled["continent_totals"] += new_totals - old_totals
+    compiled["continent_unique"] += new_unique - old_unique
+
+    return compiled
+
+
+def compute_results_from_compiled(compiled):
+    """
+    Construit le même dictionnaire de résultats que ``compute_results_from_dv``
+    à partir d'un baseline compilé.
+    """
+    countries = [str(c) for c in compiled["countries"]]
+    continents = [str(c) for c in compiled["continents"]]
+    has_continent = compiled["has_continent"]
+    names = compiled["species_names"]
+    n_columns = len(countries)
+
+    # ---- Liste des blanks (une ligne par espèce) ----
+    listed = np.flatnonzero(compiled["first_key"] >= 0)
+    listed = listed[np.argsort(compiled["first_key"][listed], kind="stable")]
+
+    entry = (compiled["cell_species"] != NO_SPECIES) & ~np.isnan(compiled["cell_values"])
+    e_species = compiled["cell_species"][entry]
+    e_columns = compiled["cell_columns"][entry]
+    e_values = compiled["cell_values"][entry]
+
+    # Valeur retenue par (espèce, pays) : la dernière cellule rencontrée.
+    row_of_species = np.full(len(names), -1, dtype=np.int64)
+    row_of_species[listed] = np.arange(len(listed))
+    flat = row_of_species[e_species] * n_columns + e_columns
+    last = len(flat) - 1 - np.unique(flat[::-1], return_index=True)[1]
+    matrix = np.zeros((len(listed), n_columns), dtype=np.float64)
+    matrix.flat[flat[last]] = e_values[last]
+    matrix = np.round(matrix * 100, 4)
+    column_has_entry = np.zeros(n_columns, dtype=bool)
+    column_has_entry[e_columns] = True
+
+    max_percentage = np.round(compiled["max_value"][listed] * 100, 4)
+    country_count = compiled["country_count"][listed]
+    above_count = compiled["above_count"][listed]
+    ranking = np.lexsort((-max_percentage, -above_count, -country_count))
+
+    max_country = compiled["max_country"][listed]
+    median_value = compiled["median_value"][listed]
+    liste_blanks_records = []
+    for idx in ranking:
+        record = {
+            "Species": str(names[listed[idx]]),
+            "Country_Count": int(country_count[idx]),
+            "Above_Threshold_Count": int(above_count[idx]),
+            "Max_Percentage": float(max_percentage[idx]),
+            "Max_Percentage_Country": countries[max_country[idx]] if max_country[idx] >= 0 else None,
+            "Median Percentage": float(median_value[idx]),
+        }
+        values = matrix[idx].tolist()
+        for j, country in enumerate(countries):
+            record[country] = values[j] if column_has_entry[j] else 0
+        liste_blanks_records.append(record)
+
+    # ---- Statistiques par pays ----
+    stats_columns = np.flatnonzero(has_continent)
+    liste_pays_df = pd.DataFrame({
+        "Country": [countries[j] for j in stats_columns],
+        "Continent": [continents[j] for j in stats_columns],
+        "Total_Species": compiled["column_species_total"][stats_columns].astype(np.int64),
+        "Species_Above_00009": compiled["column_above_total"][stats_columns].astype(np.int64),
+        "Max_Species_Count": compiled["max_species_count"][stats_columns].astype(np.int64),
+    }).sort_values(by="Total_Species", ascending=False)
+
+    species_min = int(liste_pays_df["Total_Species"].min()) if not liste_pays_df.empty else 0
+    species_max = int(liste_pays_df["Total_Species"].max()) if not liste_pays_df.empty else 0
+    liste_pays_records = liste_pays_df.to_dict(orient="records")
+    country_continents = {row["Country"]: row["Continent"] for row in liste_pays_records}
+    pays_stats = {
+        row["Country"]: {
+            "Total_Species": int(row["Total_Species"]),
+            "Species_Above_00009": int(row["Species_Above_00009"]),
+            "Max_Species_Count": int(row["Max_Species_Count"]),
+        }
+        for row in liste_pays_records
+    }
+
+    # ---- Blanks importants par pays ----
+    winners = np.flatnonzero(compiled["winner_key"] >= 0)
+    winners = winners[np.argsort(compiled["winner_key"][winners], kind="stable")]
+    winner_country = compiled["winner_country"][winners]
+    winner_value = compiled["winner_value"][winners]
+    by_country = np.lexsort((-winner_value, winner_country))
+    rounded_values = np.round(winner_value * 100, 4)
+    starts = np.searchsorted(winner_country[by_country], stats_columns, side="left")
+    ends = np.searchsorted(winner_country[by_country], stats_columns, side="right")
+    blancks_par_pays = {}
+    for j, start, end in zip(stats_columns, starts, ends):
+        blancks_par_pays[countries[j]] = [
+            {"species": str(names[winners[idx]]), "value": float(rounded_values[idx])}
+            for idx in by_country[start:end]
+        ]
+
+    # ---- Continents ----
+    continents_records = [
+        {
+            "Continent": str(name),
+            "Total_Species": int(total),
+            "Unique_Species": int(unique),
+        }
+        for name, total, unique in sorted(
+            zip(compiled["continent_names"], compiled["continent_totals"], compiled["continent_unique"]),
+            key=lambda item: str(item[0]),
+        )
+    ]
+
+    return {
+        "liste_blanks_records": liste_blanks_records,
+        "liste_pays_records": liste_pays_records,
+        "continents_records": continents_records,
+        "pays_list": sorted(blancks_par_pays.keys()),
+        "blanks_country_cols": countries,
+        "blancks_par_pays": blancks_par_pays,
+        "pays_stats": pays_stats,
+        "country_continents": country_continents,
+        "species_min": species_min,
+        "species_max": species_max,
+    }
+
+
+def save_compiled_world_matrix(compiled, path):
+    tmp_path = f"{path}.tmp.npz"
+    np.savez(tmp_path, **compiled)
+    os.replace(tmp_path, path)
+
+
+def load_compiled_world_matrix(path):
+    with np.load(path, allow_pickle=False) as data:
+        return {key: data[key] for key in data.files}
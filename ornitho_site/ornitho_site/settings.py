@@ -45,10 +45,13 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "analyses.middleware.StageTimingMiddleware",
+    "analyses.middleware.PeakAllocationMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "analyses.middleware.ProfilerMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
@@ -80,7 +83,7 @@ WSGI_APPLICATION = "ornitho_site.wsgi.application"
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+        "NAME": os.getenv("DJANGO_SQLITE_PATH", BASE_DIR / "db.sqlite3"),
     }
 }
 
@@ -120,7 +123,7 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/5.2/howto/static-files/
 
 STATIC_URL = "/static/"
-STATIC_ROOT = BASE_DIR / "staticfiles"
+STATIC_ROOT = os.getenv("DJANGO_STATIC_ROOT", BASE_DIR / "staticfiles")
 STATICFILES_DIRS = [
     BASE_DIR / "static",
 ]
@@ -133,7 +136,75 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 
 MEDIA_URL = "/media/"
-MEDIA_ROOT = os.path.join(BASE_DIR, "media")
+MEDIA_ROOT = os.getenv("DJANGO_MEDIA_ROOT", os.path.join(BASE_DIR, "media"))
+
+# Baselines versionnés : artefacts JSON par version, nombre de versions gardées
+# en mémoire par worker, et épinglage des nouvelles analyses sur leur version.
+BASELINE_ARTIFACT_DIR = os.path.join(BASE_DIR, "core", "baselines")
+BASELINE_CACHE_MAX_VERSIONS = int(os.getenv("BASELINE_CACHE_MAX_VERSIONS", "2"))
+BASELINE_PIN_ANALYSES = os.getenv("BASELINE_PIN_ANALYSES", "False").lower() == "true"
+# Processus utilisés pour calculer le baseline (1 = en série).
+BASELINE_BUILD_WORKERS = int(os.getenv("BASELINE_BUILD_WORKERS", "1"))
+
+# Au-delà de cette taille (octets), une life list uploadée est parsée par
+# `manage.py run_jobs` plutôt que dans la requête.
+JOB_UPLOAD_PARSE_THRESHOLD = int(os.getenv("JOB_UPLOAD_PARSE_THRESHOLD", str(2 * 1024 * 1024)))
+
+# Un job "running" dont le runner n'a pas donné signe de vie depuis ce délai
+# (secondes) est remis en attente par `run_jobs`.
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "60"))
+
+# Préchargement du baseline et de ses index à l'import du module WSGI
+# (dans le master avec `gunicorn --preload`). Voir /analyses/ready/.
+BASELINE_WARMUP = os.getenv("BASELINE_WARMUP", "True").lower() == "true"
+
+# Part des requêtes dont les étapes sont chronométrées (en-tête Server-Timing
+# et histogrammes de /analyses/metrics/). 0 = instrumentation coupée.
+STAGE_TIMING_SAMPLE_RATE = float(os.getenv("STAGE_TIMING_SAMPLE_RATE", "0"))
+
+# Part des requêtes dont le pic d'allocation Python est mesuré avec
+# tracemalloc (en-tête X-Peak-Alloc et /analyses/metrics/). 0 = coupé.
+TRACEMALLOC_SAMPLE_RATE = float(os.getenv("TRACEMALLOC_SAMPLE_RATE", "0"))
+
+# Résultats JSON de `manage.py run_benchmarks`.
+BENCHMARK_OUTPUT_DIR = os.getenv("BENCHMARK_OUTPUT_DIR", os.path.join(BASE_DIR, "benchmarks"))
+
+# Profils capturés via `?profile=cprofile|sample` (staff uniquement), listés
+# par `manage.py list_profiles`. Intervalle d'échantillonnage en secondes.
+PROFILE_OUTPUT_DIR = os.getenv("PROFILE_OUTPUT_DIR", os.path.join(BASE_DIR, "profiles"))
+PROFILE_SAMPLE_INTERVAL = float(os.getenv("PROFILE_SAMPLE_INTERVAL", "0.001"))
+
+# Précalcul des résumés d'analyses après `rebuild_baseline --precompute` (ou
+# `manage.py precompute_summaries`) : analyses consultées depuis moins de
+# N jours, processus utilisés, et part du temps passée à calculer (le reste
+# en pause pour laisser la place au trafic). Les consultations sont datées
+# à ANALYSIS_ACCESS_RESOLUTION secondes près.
+PRECOMPUTE_RECENT_DAYS = int(os.getenv("PRECOMPUTE_RECENT_DAYS", "30"))
+PRECOMPUTE_WORKERS = int(os.getenv("PRECOMPUTE_WORKERS", "1"))
+PRECOMPUTE_DUTY_CYCLE = float(os.getenv("PRECOMPUTE_DUTY_CYCLE", "0.5"))
+BASELINE_PRECOMPUTE_AFTER_REBUILD = os.getenv("BASELINE_PRECOMPUTE_AFTER_REBUILD", "False").lower() == "true"
+ANALYSIS_ACCESS_RESOLUTION = int(os.getenv("ANALYSIS_ACCESS_RESOLUTION", "300"))
+
+# À l'upload, dériver le résumé précalculé de la nouvelle analyse de celui
+# de la précédente analyse de l'utilisateur (espèces modifiées seulement).
+INCREMENTAL_SUMMARY_ON_UPLOAD = os.getenv("INCREMENTAL_SUMMARY_ON_UPLOAD", "True").lower() == "true"
+
+# Nombre maximal d'analyses d'une analyse de groupe (/analyses/group/...).
+GROUP_ANALYSIS_MAX_MEMBERS = int(os.getenv("GROUP_ANALYSIS_MAX_MEMBERS", "20"))
+
+# Nombre maximal de pays d'un itinéraire (/analyses/<id>/itinerary/?k=).
+ITINERARY_MAX_COUNTRIES = int(os.getenv("ITINERARY_MAX_COUNTRIES", "20"))
+
+# Nombre maximal d'uploads de la progression d'un utilisateur
+# (/analyses/my-analyses/timeline/), les plus récents.
+USER_TIMELINE_MAX_ANALYSES = int(os.getenv("USER_TIMELINE_MAX_ANALYSES", "100"))
+
+# Espèces cibles par région (codes S/P eBird), CSV long : Species, Region,
+# Country, Value. Optionnel : sans ce fichier, les vues régionales répondent 503.
+REGION_TARGET_SPECIES_PATH = os.getenv(
+    "REGION_TARGET_SPECIES_PATH",
+    os.path.join(BASE_DIR, "core", "Especes_cibles_regions.csv"),
+)
 
 LOGIN_URL = "/analyses/accounts/login/"
 LOGIN_REDIRECT_URL = "/"
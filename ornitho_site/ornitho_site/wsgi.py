@@ -14,3 +14,12 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "ornitho_site.settings")
 
 application = get_wsgi_application()
+
+# Préchargement du baseline : avec `gunicorn --preload`, fait une seule fois
+# dans le master puis partagé en copy-on-write par les workers.
+from django.conf import settings  # noqa: E402
+
+if getattr(settings, "BASELINE_WARMUP", True):
+    from analyses.warmup import warm_up  # noqa: E402
+
+    warm_up()